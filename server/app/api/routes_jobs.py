@@ -1,32 +1,165 @@
 """
 Job management API routes
 """
+import asyncio
+import json
 import logging
-from fastapi import APIRouter, HTTPException, Path
-from fastapi.responses import JSONResponse
+import time
+from typing import Any, Dict, Optional
+from fastapi import APIRouter, HTTPException, Path, Query, Request
+from fastapi.responses import JSONResponse, StreamingResponse
 
-from app.core.jobs import job_store
-from app.models.schemas import JobResponse
+from app.core.config import settings
+from app.core.jobs import job_store, job_scheduler, JobStatus
+from app.core.responses import FastJSONResponse
+from app.core.result_store import parse_page_ranges
+from app.models.schemas import JobResponse, OcrResult
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
 @router.get("/{job_id}", response_model=JobResponse)
-async def get_job_status(job_id: str = Path(..., description="Job ID to check")):
+async def get_job_status(
+    job_id: str = Path(..., description="Job ID to check"),
+    fields: Optional[str] = Query(None, description="Comma-separated result fields to return, e.g. layout,meta"),
+    pages: Optional[str] = Query(None, description="Pages to return in pages/layout, e.g. 3-5 or 1,4-6")
+):
     """
     Get job status and result
     
     - **job_id**: The job ID returned from the extract endpoint
+    - **fields**: Only load these result fields
+    - **pages**: Only load these pages of `pages` and `layout`
     
-    Returns job status, progress, and result (if completed)
+    Returns job status, progress, queue position/ETA (if waiting) and result (if completed).
+    With `fields` or `pages` the result is partial.
     """
     
     job = job_store.get_job(job_id)
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
     
-    return JobResponse(**job.to_dict())
+    field_list = None
+    if fields:
+        field_list = [name.strip() for name in fields.split(",") if name.strip()]
+        unknown = set(field_list) - set(OcrResult.model_fields)
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown result fields: {', '.join(sorted(unknown))}"
+            )
+    page_ranges = None
+    if pages:
+        try:
+            page_ranges = parse_page_ranges(pages)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid pages parameter: {e}")
+    
+    data = job.to_dict()
+    data.update(job_scheduler.get_queue_info(job_id))
+    
+    if job.status == JobStatus.DONE:
+        loop = asyncio.get_event_loop()
+        data["result"] = await loop.run_in_executor(None, job_store.get_result, job_id, field_list, page_ranges)
+        # Results were validated when produced; re-validating and re-encoding
+        # a large result through the response model costs far more than orjson
+        return FastJSONResponse(content=data)
+    
+    return JobResponse(**data)
+
+
+def _format_sse(event: str, data: str) -> str:
+    """Format one Server-Sent Events message"""
+    return f"event: {event}\ndata: {data}\n\n"
+
+
+def _progress_event(job_id: str, data: Dict[str, Any]) -> str:
+    """Format a progress event including queue position/ETA"""
+    data = {**data, **job_scheduler.get_queue_info(job_id)}
+    return _format_sse("progress", json.dumps(data, ensure_ascii=False))
+
+
+@router.get("/{job_id}/events")
+async def stream_job_events(request: Request, job_id: str = Path(..., description="Job ID to follow")):
+    """
+    Stream job progress as Server-Sent Events
+    
+    - **job_id**: The job ID returned from the extract endpoint
+    
+    Emits a `progress` event for every status/step/percent/message change
+    and a single final `result` event (the full job response) once the job
+    is done or failed, then closes the stream.
+    
+    While AI enhancement runs, `enhancement` events carry the enhanced text
+    as it is generated: `{chunk, chunks, separator, delta}` appends to a
+    chunk, `{chunk, chunks, separator, reset: true}` discards the chunk's
+    text so far (its provider failed and another one takes over). Chunks
+    joined in order, each followed by its separator, give `enhancedText`.
+    """
+    
+    if job_store.get_job(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    # Subscribe before taking the snapshot so no transition is missed
+    queue = job_store.subscribe(job_id)
+    
+    async def event_stream():
+        try:
+            snapshot = job_store.get_job(job_id)
+            if snapshot is None:
+                return
+            last_state = snapshot.to_dict()
+            yield _progress_event(job_id, last_state)
+            finished = snapshot.is_finished
+            last_sent = time.monotonic()
+            
+            while not finished:
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout=settings.JOB_EVENTS_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        return
+                    # Updates made by another worker process are not published here,
+                    # so compare against the shared store
+                    job = job_store.get_job(job_id)
+                    if job is None:
+                        message = {"event": "deleted", "data": {"jobId": job_id}}
+                    elif job.to_dict() != last_state:
+                        message = {"event": "progress", "data": job.to_dict()}
+                    else:
+                        if time.monotonic() - last_sent >= settings.JOB_EVENTS_KEEPALIVE:
+                            last_sent = time.monotonic()
+                            yield ": keep-alive\n\n"
+                        continue
+                
+                last_sent = time.monotonic()
+                if message["event"] == "deleted":
+                    yield _format_sse("deleted", json.dumps(message["data"]))
+                    return
+                if message["event"] == "progress":
+                    last_state = message["data"]
+                    yield _progress_event(job_id, last_state)
+                    finished = last_state["status"] in ("done", "error")
+                else:
+                    yield _format_sse(message["event"], json.dumps(message["data"], ensure_ascii=False))
+            
+            # Send the result exactly once at the end
+            job = job_store.get_job(job_id)
+            if job:
+                data = job.to_dict()
+                if job.status == JobStatus.DONE:
+                    loop = asyncio.get_event_loop()
+                    data["result"] = await loop.run_in_executor(None, job_store.get_result, job_id)
+                yield _format_sse("result", JobResponse(**data).model_dump_json())
+        finally:
+            job_store.unsubscribe(job_id, queue)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 @router.delete("/{job_id}")
@@ -41,8 +174,11 @@ async def delete_job(job_id: str = Path(..., description="Job ID to delete")):
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
     
-    # Clean up job files
+    # Clean up job files (and the child jobs of a batch)
     from app.utils.files import cleanup_job_files
+    for child in job_store.list_children(job_id):
+        cleanup_job_files(child.job_id)
+        job_store.delete_job(child.job_id)
     cleanup_job_files(job_id)
     
     # Delete job from store
@@ -52,7 +188,7 @@ async def delete_job(job_id: str = Path(..., description="Job ID to delete")):
 
 
 @router.get("/")
-async def list_jobs():
+async def list_jobs(status: Optional[JobStatus] = Query(None, description="Only list jobs with this status")):
     """
     List all active jobs
     
@@ -60,9 +196,9 @@ async def list_jobs():
     """
     
     jobs = []
-    for job_id, job in job_store.jobs.items():
+    for job in job_store.list_jobs(status):
         jobs.append({
-            "jobId": job_id,
+            "jobId": job.job_id,
             "status": job.status.value,
             "step": job.step.value,
             "percent": job.percent,
@@ -85,10 +221,8 @@ async def cleanup_old_jobs():
     Removes jobs older than the configured TTL
     """
     
-    initial_count = len(job_store.jobs)
-    job_store.cleanup_old_jobs()
-    final_count = len(job_store.jobs)
-    cleaned_count = initial_count - final_count
+    cleaned_count = job_store.cleanup_old_jobs()
+    final_count = job_store.count()
     
     return {
         "message": f"Cleaned up {cleaned_count} old jobs",
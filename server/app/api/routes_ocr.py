@@ -4,26 +4,42 @@ OCR extraction API routes
 import asyncio
 import json
 import logging
-from typing import Optional
-from fastapi import APIRouter, File, UploadFile, Form, HTTPException, BackgroundTasks, Query
-from fastapi.responses import JSONResponse
+import zipfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from fastapi import APIRouter, File, UploadFile, Form, HTTPException, Query
+from fastapi.responses import JSONResponse, StreamingResponse
 
 from app.core.config import settings
-from app.core.jobs import job_store, JobStatus
+from app.core.jobs import job_store, job_scheduler, Job, JobStatus, QueueFullError
 from app.core.raganything_engine import rag_engine
-from app.models.schemas import OcrSettings, JobResponse, AsyncJobResponse
+from app.core.responses import FastJSONResponse, dumps_json
+from app.models.schemas import (
+    OcrSettings, JobResponse, AsyncJobResponse, BatchChild, BatchJobResponse
+)
 from app.utils.files import (
-    validate_file_extension, validate_file_size, 
-    save_uploaded_file, get_file_info
+    validate_file_extension, save_upload_stream, extract_zip_member,
+    save_batch_manifest, load_batch_manifest,
+    cleanup_job_files, get_file_info, FileTooLargeError, SavedUpload
 )
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
+def _parse_ocr_settings(settings_json: Optional[str]) -> OcrSettings:
+    """Parse the settings form field, raising 400 on invalid JSON or values"""
+    if not settings_json:
+        return OcrSettings()
+    try:
+        return OcrSettings(**json.loads(settings_json))
+    except (json.JSONDecodeError, ValueError) as e:
+        logger.error(f"Error parsing settings: {e}")
+        raise HTTPException(status_code=400, detail="Invalid settings JSON")
+
+
 @router.post("/extract", response_model=JobResponse)
 async def extract_ocr(
-    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     settings_json: Optional[str] = Form(None),
     sync: bool = Query(False, description="Process synchronously for small files")
@@ -46,37 +62,27 @@ async def extract_ocr(
             detail=f"Unsupported file type. Allowed: {', '.join(settings.ALLOWED_EXTENSIONS)}"
         )
     
-    # Read file content
-    try:
-        content = await file.read()
-    except Exception as e:
-        logger.error(f"Error reading uploaded file: {e}")
-        raise HTTPException(status_code=400, detail="Error reading file")
-    
-    # Validate file size
-    if not validate_file_size(len(content)):
-        max_mb = settings.MAX_FILE_SIZE / (1024 * 1024)
-        raise HTTPException(
-            status_code=413, 
-            detail=f"File too large. Maximum size: {max_mb:.1f}MB"
-        )
-    
     # Parse settings
-    ocr_settings = OcrSettings()
-    if settings_json:
-        try:
-            settings_dict = json.loads(settings_json)
-            ocr_settings = OcrSettings(**settings_dict)
-        except (json.JSONDecodeError, ValueError) as e:
-            logger.error(f"Error parsing settings: {e}")
-            raise HTTPException(status_code=400, detail="Invalid settings JSON")
+    ocr_settings = _parse_ocr_settings(settings_json)
     
     # Create job
     job_id = job_store.create_job()
     
     try:
-        # Save uploaded file
-        file_path = save_uploaded_file(job_id, file.filename, content)
+        # Stream upload to disk, hashing and size-checking as we go
+        try:
+            saved_upload = await save_upload_stream(job_id, file)
+        except FileTooLargeError:
+            max_mb = settings.MAX_FILE_SIZE / (1024 * 1024)
+            raise HTTPException(
+                status_code=413, 
+                detail=f"File too large. Maximum size: {max_mb:.1f}MB"
+            )
+        except Exception as e:
+            logger.error(f"Error reading uploaded file: {e}")
+            raise HTTPException(status_code=400, detail="Error reading file")
+        
+        file_path = saved_upload.path
         
         # Log file info
         file_info = get_file_info(file_path)
@@ -85,40 +91,293 @@ async def extract_ocr(
         # Convert settings to dict
         settings_dict = ocr_settings.model_dump()
         
+        def run_job():
+            return rag_engine.process_document(
+                job_id, file_path, settings_dict, saved_upload.sha256
+            )
+        
+        # Admit the job into the bounded queue (both sync and async requests)
+        try:
+            job_future = job_scheduler.submit(job_id, run_job)
+        except QueueFullError as e:
+            logger.warning(f"Rejecting job {job_id}: {e}")
+            raise HTTPException(
+                status_code=429,
+                detail="Server busy: job queue is full, please retry later",
+                headers={"Retry-After": str(e.retry_after)}
+            )
+        
         if sync:
-            # Process synchronously (for small files)
+            # Wait for the queued job to finish (for small files)
             try:
-                result = await rag_engine.process_document(job_id, file_path, settings_dict)
-                return JobResponse(**result)
+                # Shielded, so a cancelled request does not cancel the job and a
+                # cancelled job (deleted, scheduler stopped) is told apart below
+                result = await asyncio.shield(job_future)
+                # Skip re-validating/re-encoding the large result through the response model
+                response = JobResponse(jobId=job_id, status=result["status"], error=result.get("error")).model_dump()
+                response["result"] = result.get("result")
+                return FastJSONResponse(content=response)
+            except asyncio.CancelledError:
+                if not job_future.cancelled():
+                    raise
+                logger.warning(f"Sync job {job_id} was cancelled")
+                raise HTTPException(status_code=409, detail="Job was cancelled")
             except Exception as e:
                 logger.error(f"Sync processing failed for job {job_id}: {e}")
                 raise HTTPException(status_code=500, detail=f"Processing failed: {str(e)}")
         else:
-            # Process asynchronously
-            background_tasks.add_task(
-                rag_engine.process_document,
-                job_id, file_path, settings_dict
-            )
-            
+            # Process asynchronously; clients poll /api/jobs/{job_id}
             return JSONResponse(
                 status_code=202,
-                content=AsyncJobResponse(jobId=job_id, status="running").model_dump()
+                content=AsyncJobResponse(jobId=job_id, status=JobStatus.QUEUED.value).model_dump()
             )
             
     except HTTPException:
         # Clean up job on HTTP errors
+        cleanup_job_files(job_id)
         job_store.delete_job(job_id)
         raise
     except Exception as e:
         # Clean up job on unexpected errors
+        cleanup_job_files(job_id)
         job_store.delete_job(job_id)
         logger.error(f"Unexpected error in extract_ocr: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+def _delete_batch(parent_id: str):
+    """Delete a batch job, its children and all their files"""
+    for child in job_store.list_children(parent_id):
+        cleanup_job_files(child.job_id)
+        job_store.delete_job(child.job_id)
+    cleanup_job_files(parent_id)
+    job_store.delete_job(parent_id)
+
+
+def _batch_response(job: Job, manifest: Dict[str, Any]) -> BatchJobResponse:
+    """Build the aggregated batch response from the parent job and its manifest"""
+    child_jobs = {child.job_id: child for child in job_store.list_children(job.job_id)}
+    children = []
+    for entry in manifest["children"]:
+        child = child_jobs.get(entry["jobId"])
+        if child is None:
+            children.append(BatchChild(jobId=entry["jobId"], fileName=entry["fileName"],
+                                       status=JobStatus.ERROR.value, error="Job was deleted"))
+        else:
+            children.append(BatchChild(jobId=child.job_id, fileName=entry["fileName"],
+                                       status=child.status.value, percent=child.percent,
+                                       error=child.error))
+    return BatchJobResponse(
+        jobId=job.job_id,
+        status=job.status.value,
+        step=job.step.value,
+        percent=job.percent,
+        message=job.message,
+        children=children,
+        skipped=manifest.get("skipped", [])
+    )
+
+
+async def _expand_zip(
+    parent_id: str,
+    archive_path: Path,
+    children: List[Tuple[str, str, SavedUpload]],
+    skipped: List[Dict[str, str]],
+    max_files: int
+):
+    """Create one child job per supported archive member"""
+    loop = asyncio.get_event_loop()
+    
+    try:
+        archive = zipfile.ZipFile(archive_path)
+    except zipfile.BadZipFile:
+        raise HTTPException(status_code=400, detail=f"Invalid zip archive: {archive_path.name}")
+    
+    with archive:
+        for info in archive.infolist():
+            name = Path(info.filename).name
+            if info.is_dir() or not name or name.startswith(".") or info.filename.startswith("__MACOSX/"):
+                continue
+            if not validate_file_extension(name):
+                skipped.append({"fileName": info.filename, "reason": "Unsupported file type"})
+                continue
+            if len(children) >= max_files:
+                raise HTTPException(status_code=413, detail=f"Too many files in batch. Maximum: {max_files}")
+            
+            child_id = job_store.create_job(parent_id)
+            try:
+                saved = await loop.run_in_executor(None, extract_zip_member, archive, info, child_id)
+            except FileTooLargeError:
+                cleanup_job_files(child_id)
+                job_store.delete_job(child_id)
+                skipped.append({"fileName": info.filename, "reason": "File too large"})
+                continue
+            children.append((child_id, name, saved))
+    
+    # The archive itself is no longer needed
+    archive_path.unlink(missing_ok=True)
+
+
+@router.post("/extract-batch", response_model=BatchJobResponse, status_code=202)
+async def extract_batch(
+    files: List[UploadFile] = File(...),
+    settings_json: Optional[str] = Form(None)
+):
+    """
+    Extract text from many files in one request
+    
+    - **files**: Files to process; zip archives are expanded into their files
+    - **settings**: JSON string with OCR settings applied to every file
+    
+    Creates a parent job with one child job per file. The children are queued
+    together and processed back to back. Follow the aggregated progress at
+    /api/ocr/extract-batch/{jobId} (or /api/jobs/{jobId}/events) and download
+    all results from /api/ocr/extract-batch/{jobId}/result once done.
+    """
+    
+    ocr_settings = _parse_ocr_settings(settings_json)
+    settings_dict = ocr_settings.model_dump()
+    # The whole batch has to fit in the job queue at once
+    max_files = min(settings.MAX_BATCH_FILES, job_scheduler.max_queue_size)
+    
+    parent_id = job_store.create_job()
+    children: List[Tuple[str, str, SavedUpload]] = []  # (job ID, file name, saved upload)
+    skipped: List[Dict[str, str]] = []
+    
+    try:
+        for upload in files:
+            name = upload.filename or ""
+            
+            if name.lower().endswith(".zip"):
+                try:
+                    archive = await save_upload_stream(parent_id, upload, max_size=settings.MAX_BATCH_UPLOAD_SIZE)
+                except FileTooLargeError:
+                    max_mb = settings.MAX_BATCH_UPLOAD_SIZE / (1024 * 1024)
+                    raise HTTPException(status_code=413, detail=f"Archive too large: {name}. Maximum size: {max_mb:.1f}MB")
+                await _expand_zip(parent_id, archive.path, children, skipped, max_files)
+                continue
+            
+            if not validate_file_extension(name):
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Unsupported file type: {name}. Allowed: {', '.join(settings.ALLOWED_EXTENSIONS)}"
+                )
+            if len(children) >= max_files:
+                raise HTTPException(status_code=413, detail=f"Too many files in batch. Maximum: {max_files}")
+            
+            child_id = job_store.create_job(parent_id)
+            try:
+                saved = await save_upload_stream(child_id, upload)
+            except FileTooLargeError:
+                max_mb = settings.MAX_FILE_SIZE / (1024 * 1024)
+                raise HTTPException(status_code=413, detail=f"File too large: {name}. Maximum size: {max_mb:.1f}MB")
+            children.append((child_id, name, saved))
+        
+        if not children:
+            raise HTTPException(status_code=400, detail="No supported files in batch")
+        
+        manifest = {
+            "children": [{"jobId": child_id, "fileName": name} for child_id, name, _ in children],
+            "skipped": skipped
+        }
+        save_batch_manifest(parent_id, manifest)
+        logger.info(f"Batch job {parent_id}: {len(children)} files, {len(skipped)} skipped")
+        
+        def make_task(child_id: str, saved: SavedUpload):
+            return lambda: rag_engine.process_document(child_id, saved.path, settings_dict, saved.sha256)
+        
+        try:
+            job_scheduler.submit_batch([
+                (child_id, make_task(child_id, saved)) for child_id, _, saved in children
+            ])
+        except QueueFullError as e:
+            logger.warning(f"Rejecting batch job {parent_id}: {e}")
+            raise HTTPException(
+                status_code=429,
+                detail="Server busy: job queue cannot take this batch, please retry later",
+                headers={"Retry-After": str(e.retry_after)}
+            )
+        
+        return JSONResponse(
+            status_code=202,
+            content=_batch_response(job_store.get_job(parent_id), manifest).model_dump()
+        )
+        
+    except HTTPException:
+        _delete_batch(parent_id)
+        raise
+    except Exception as e:
+        _delete_batch(parent_id)
+        logger.error(f"Unexpected error in extract_batch: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@router.get("/extract-batch/{batch_id}", response_model=BatchJobResponse)
+async def get_batch_status(batch_id: str):
+    """
+    Get aggregated progress of a batch job and the status of each file
+    
+    - **batch_id**: Parent job ID returned from the extract-batch endpoint
+    """
+    job = job_store.get_job(batch_id)
+    manifest = load_batch_manifest(batch_id) if job else None
+    if manifest is None:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    return _batch_response(job, manifest)
+
+
+@router.get("/extract-batch/{batch_id}/result")
+async def get_batch_result(batch_id: str):
+    """
+    Stream the results of a finished batch as NDJSON
+    
+    - **batch_id**: Parent job ID returned from the extract-batch endpoint
+    
+    One line per file, in upload order: jobId, fileName, status, error and
+    result. Results are read from disk one file at a time.
+    """
+    job = job_store.get_job(batch_id)
+    manifest = load_batch_manifest(batch_id) if job else None
+    if manifest is None:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    if not job.is_finished:
+        raise HTTPException(status_code=409, detail=f"Batch is still processing: {job.message}")
+    
+    async def result_lines():
+        loop = asyncio.get_event_loop()
+        for entry in manifest["children"]:
+            child = job_store.get_job(entry["jobId"])
+            line = {
+                "jobId": entry["jobId"],
+                "fileName": entry["fileName"],
+                "status": child.status.value if child else JobStatus.ERROR.value,
+                "error": child.error if child else "Job was deleted",
+                "result": None
+            }
+            if child and child.status == JobStatus.DONE:
+                line["result"] = await loop.run_in_executor(None, job_store.get_result, child.job_id)
+            yield dumps_json(line) + b"\n"
+    
+    return StreamingResponse(result_lines(), media_type="application/x-ndjson")
+
+
 @router.get("/status")
 async def get_ocr_status():
     """Get OCR service status and capabilities"""
+    # First use of a disk cache scans its directory; keep that off the event loop
+    loop = asyncio.get_event_loop()
+    result_cache = rag_engine.result_cache
+    result_cache_stats = (
+        await loop.run_in_executor(None, result_cache.get_stats) if result_cache
+        else {"enabled": False}
+    )
+    provider_manager = rag_engine.ai_provider_manager
+    enhancement_cache = provider_manager.enhancement_cache if provider_manager else None
+    enhancement_cache_stats = (
+        await loop.run_in_executor(None, enhancement_cache.get_stats) if enhancement_cache
+        else {"enabled": False}
+    )
+    
     return {
         "service": "OCR Extraction",
         "version": "1.0.0",
@@ -131,6 +390,10 @@ async def get_ocr_status():
             "syncProcessing": True,
             "layoutPreservation": True,
             "multipleFormats": True,
-            "batchProcessing": False  # Not implemented yet
-        }
+            "batchProcessing": True
+        },
+        "maxBatchFiles": min(settings.MAX_BATCH_FILES, job_scheduler.max_queue_size),
+        "scheduler": job_scheduler.get_stats(),
+        "resultCache": result_cache_stats,
+        "enhancementCache": enhancement_cache_stats
     }
\ No newline at end of file
@@ -1,41 +1,82 @@
 """
 RAG functionality API routes (optional)
 """
+import asyncio
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, List
 from fastapi import APIRouter, HTTPException
 
 from app.core.config import settings
+from app.core.jobs import job_store, JobStatus, JobStep, QueueFullError
 from app.core.ollama_client import ollama_client
+from app.core.rag_service import RAGANYTHING_AVAILABLE, IngestItem, build_content_list, rag_service
 from app.models.schemas import RagIngestRequest, RagQueryRequest, RagQueryResponse
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
-@router.post("/ingest")
+def _load_content_list(job_id: str) -> List[Dict[str, Any]]:
+    """Load a job result and convert it to a content list (blocking)"""
+    result = job_store.get_result(job_id)
+    return build_content_list(result) if result else []
+
+
+@router.post("/ingest", status_code=202)
 async def ingest_document(request: RagIngestRequest):
     """
     Ingest extracted content into RAG knowledge base
     
-    - **docId**: Optional document ID
-    - **jobId**: Job ID containing extracted content
+    - **docId**: Optional document ID (default: doc-<jobId>)
+    - **jobId**: Finished job whose result is ingested
+    
+    The document is queued for ingestion; track it with the returned jobId
+    via /api/jobs/{jobId} or its event stream.
     """
     
     if not settings.ENABLE_RAG:
         raise HTTPException(status_code=501, detail="RAG functionality is disabled")
+    if not RAGANYTHING_AVAILABLE:
+        raise HTTPException(status_code=501, detail="RAG ingestion requires the raganything package")
+    if not request.jobId:
+        raise HTTPException(status_code=400, detail="jobId is required")
+    
+    job = job_store.get_job(request.jobId)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.status != JobStatus.DONE:
+        raise HTTPException(status_code=409, detail=f"Job is {job.status.value}, only finished jobs can be ingested")
     
-    # TODO: Implement RAG ingestion
-    # This would involve:
-    # 1. Get extracted content from job result
-    # 2. Create embeddings using Ollama
-    # 3. Store in vector database
-    # 4. Build knowledge graph
+    loop = asyncio.get_event_loop()
+    content_list = await loop.run_in_executor(None, _load_content_list, request.jobId)
+    if not content_list:
+        raise HTTPException(status_code=422, detail="Job result has no content to ingest")
+    
+    doc_id = request.docId or f"doc-{request.jobId}"
+    ingest_job_id = job_store.create_job()
+    job_store.update_job(ingest_job_id, step=JobStep.PREPROCESS, percent=10,
+                         message=f"Built content list with {len(content_list)} items")
+    try:
+        rag_service.ingest_queue.submit(IngestItem(
+            job_id=ingest_job_id,
+            doc_id=doc_id,
+            file_path=doc_id,
+            content_list=content_list
+        ))
+    except QueueFullError as e:
+        job_store.delete_job(ingest_job_id)
+        logger.warning(f"Rejecting ingestion of job {request.jobId}: {e}")
+        raise HTTPException(
+            status_code=429,
+            detail="Server busy: ingest queue is full, please retry later",
+            headers={"Retry-After": str(e.retry_after)}
+        )
     
     return {
-        "message": "RAG ingestion not yet implemented",
-        "docId": request.docId,
-        "jobId": request.jobId
+        "jobId": ingest_job_id,
+        "status": JobStatus.QUEUED.value,
+        "docId": doc_id,
+        "sourceJobId": request.jobId
     }
 
 
@@ -45,42 +86,50 @@ async def query_rag(request: RagQueryRequest):
     Query the RAG knowledge base
     
     - **question**: Question to ask
-    - **mode**: Query mode (hybrid|local|global|naive)
+    - **mode**: Query mode (hybrid|local|global|naive|mix)
     - **vlmEnhanced**: Use vision model for enhanced analysis
+    - **timeoutSeconds**: Deadline for the query (capped by the server limit)
+    
+    Returns the answer and the retrieved chunks it is based on.
     """
     
     if not settings.ENABLE_RAG:
         raise HTTPException(status_code=501, detail="RAG functionality is disabled")
     
+    timeout = settings.RAG_QUERY_TIMEOUT
+    if request.timeoutSeconds is not None:
+        timeout = min(timeout, request.timeoutSeconds)
+    
     try:
-        # TODO: Implement RAG query
-        # This would involve:
-        # 1. Create query embedding
-        # 2. Search vector database
-        # 3. Retrieve relevant contexts
-        # 4. Generate answer using Ollama LLM
-        # 5. Optionally use vision model for image analysis
-        
-        # For now, return a simple response using Ollama
-        messages = [
-            {
-                "role": "system",
-                "content": "You are a helpful assistant that answers questions based on document content."
-            },
-            {
-                "role": "user",
-                "content": request.question
-            }
-        ]
-        
-        response = await ollama_client.chat(messages)
-        answer = response.get("message", {}).get("content", "No response generated")
+        if RAGANYTHING_AVAILABLE:
+            answer, contexts = await asyncio.wait_for(
+                rag_service.query(request.question, request.mode, request.vlmEnhanced),
+                timeout=timeout
+            )
+        else:
+            # Without a knowledge base, answer from the LLM alone
+            messages = [
+                {
+                    "role": "system",
+                    "content": "You are a helpful assistant that answers questions based on document content."
+                },
+                {
+                    "role": "user",
+                    "content": request.question
+                }
+            ]
+            response = await asyncio.wait_for(ollama_client.chat(messages), timeout=timeout)
+            answer = response.get("message", {}).get("content", "No response generated")
+            contexts = []
         
         return RagQueryResponse(
-            answer=answer,
-            contexts=[]  # TODO: Add actual retrieved contexts
+            answer=answer or "No response generated",
+            contexts=contexts
         )
         
+    except asyncio.TimeoutError:
+        logger.warning(f"RAG query exceeded its {timeout:g}s deadline")
+        raise HTTPException(status_code=504, detail=f"RAG query did not finish within {timeout:g}s")
     except Exception as e:
         logger.error(f"Error in RAG query: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"RAG query failed: {str(e)}")
@@ -100,6 +149,10 @@ async def get_rag_status():
     from app.core.ollama_client import check_ollama_connection
     ollama_connected = await check_ollama_connection()
     
+    # First use of the cache scans its directory; keep that off the event loop
+    loop = asyncio.get_event_loop()
+    embedding_cache_stats = await loop.run_in_executor(None, ollama_client.embedding_cache.get_stats)
+    
     return {
         "enabled": True,
         "ollamaConnected": ollama_connected,
@@ -109,9 +162,13 @@ async def get_rag_status():
             "vision": settings.OLLAMA_VISION_MODEL
         },
         "features": {
-            "ingestion": False,  # Not implemented
-            "query": True,       # Basic implementation
+            "ingestion": RAGANYTHING_AVAILABLE,
+            "query": True,
+            "retrievedContexts": RAGANYTHING_AVAILABLE,
             "vlmEnhanced": ollama_connected,
             "multimodal": False  # Not implemented
-        }
+        },
+        "knowledgeBaseLoaded": rag_service.initialized,
+        "ingestQueue": rag_service.ingest_queue.get_stats(),
+        "embeddingCache": embedding_cache_stats
     }
\ No newline at end of file
@@ -6,7 +6,7 @@ from .groq_provider import GroqProvider
 from .deepseek_provider import DeepSeekProvider
 from .gemini_provider import GeminiProvider
 from .ollama_provider import OllamaProvider
-from .provider_manager import AIProviderManager
+from .provider_manager import AIProviderManager, get_provider_manager
 
 __all__ = [
     "BaseAIProvider",
@@ -18,4 +18,5 @@ __all__ = [
     "GeminiProvider",
     "OllamaProvider",
     "AIProviderManager",
+    "get_provider_manager",
 ]
@@ -3,7 +3,9 @@ Base AI Provider Interface
 All AI providers must implement this interface
 """
 from abc import ABC, abstractmethod
-from typing import List, Dict, Optional
+from typing import AsyncIterator, List, Dict, Optional
+
+import httpx
 
 
 class ProviderException(Exception):
@@ -18,7 +20,37 @@ class QuotaExceededException(ProviderException):
 
 class RateLimitException(ProviderException):
     """Raised when provider rate limit is exceeded"""
-    pass
+    
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        """
+        Args:
+            message: Error message
+            retry_after: Seconds until the provider accepts requests again, if known
+        """
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+async def iter_sse_data(response: httpx.Response) -> AsyncIterator[str]:
+    """
+    Iterate the data payloads of a Server-Sent Events response
+    
+    Args:
+        response: Streaming httpx response
+        
+    Yields:
+        The data of each event (multi-line data joined with newlines)
+    """
+    data_lines: List[str] = []
+    async for line in response.aiter_lines():
+        if not line:
+            if data_lines:
+                yield "\n".join(data_lines)
+                data_lines = []
+        elif line.startswith("data:"):
+            data_lines.append(line[5:].lstrip(" "))
+    if data_lines:
+        yield "\n".join(data_lines)
 
 
 class BaseAIProvider(ABC):
@@ -41,6 +73,9 @@ class BaseAIProvider(ABC):
         self.base_url = base_url
         self.model = model
         self.vision_model = vision_model
+        # Rate-limit hints from the last successful response, if the provider sends them
+        self.rate_limit_remaining: Optional[int] = None
+        self.rate_limit_reset: Optional[float] = None
     
     @abstractmethod
     async def chat_completion(
@@ -69,6 +104,36 @@ class BaseAIProvider(ABC):
         """
         pass
     
+    async def stream_chat_completion(
+        self,
+        messages: List[Dict[str, str]],
+        model: Optional[str] = None,
+        temperature: float = 0.1,
+        max_tokens: Optional[int] = None
+    ) -> AsyncIterator[str]:
+        """
+        Send chat completion request and stream the answer
+        
+        Providers without native streaming yield the whole answer at once.
+        An exception may be raised after some deltas were yielded; callers
+        must then discard the partial text.
+        
+        Args:
+            messages: List of message dicts with 'role' and 'content'
+            model: Model to use (defaults to self.model)
+            temperature: Sampling temperature (0.0 to 1.0)
+            max_tokens: Maximum tokens to generate
+            
+        Yields:
+            Text deltas in order
+            
+        Raises:
+            QuotaExceededException: If quota/credits exhausted
+            RateLimitException: If rate limit exceeded
+            ProviderException: For other provider errors
+        """
+        yield await self.chat_completion(messages, model, temperature, max_tokens)
+    
     @abstractmethod
     async def vision_completion(
         self,
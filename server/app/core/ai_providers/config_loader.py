@@ -4,6 +4,7 @@ Configuration loader for AI providers
 import logging
 from typing import Dict, List
 from app.core.config import settings
+from app.core.ai_providers.rate_limiter import parse_rate_limits
 from app.models.ai_models import ProviderConfig, ProviderName
 
 logger = logging.getLogger(__name__)
@@ -25,6 +26,9 @@ class AIProviderConfigLoader:
         # Parse priority string (e.g., "groq:1,deepseek:2,gemini:3,ollama:4")
         priorities = AIProviderConfigLoader._parse_priorities(settings.AI_PROVIDER_PRIORITY)
         
+        # Parse rate limits (e.g., "groq:30/6000,gemini:15/1000000")
+        rate_limits = parse_rate_limits(settings.AI_PROVIDER_RATE_LIMITS)
+        
         # Load Groq config
         if settings.GROQ_API_KEY:
             configs.append(ProviderConfig(
@@ -90,6 +94,9 @@ class AIProviderConfigLoader:
         ))
         logger.info(f"Loaded Ollama provider config with priority {priorities.get(ProviderName.OLLAMA, 4)}")
         
+        for config in configs:
+            config.requests_per_minute, config.tokens_per_minute = rate_limits.get(config.name, (None, None))
+        
         # Sort by priority (lower number = higher priority)
         configs.sort(key=lambda x: x.priority)
         
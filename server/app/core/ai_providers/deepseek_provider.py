@@ -2,15 +2,19 @@
 DeepSeek AI Provider Implementation
 Cost-effective AI with specialized coder model
 """
+import json
 import logging
 import httpx
-from typing import List, Dict, Optional
+from typing import AsyncIterator, List, Dict, Optional
 from app.core.ai_providers.base_provider import (
     BaseAIProvider,
     ProviderException,
     QuotaExceededException,
-    RateLimitException
+    RateLimitException,
+    iter_sse_data
 )
+from app.core.ai_providers.http_pool import create_client
+from app.core.ai_providers.rate_limiter import parse_retry_after
 
 logger = logging.getLogger(__name__)
 
@@ -33,7 +37,7 @@ class DeepSeekProvider(BaseAIProvider):
         """
         super().__init__(api_key, base_url, model, vision_model)
         self.coder_model = "deepseek-coder"  # Specialized model for code
-        self.client = httpx.AsyncClient(
+        self.client = create_client(
             headers={
                 "Authorization": f"Bearer {self.api_key}",
                 "Content-Type": "application/json"
@@ -124,7 +128,10 @@ class DeepSeekProvider(BaseAIProvider):
                 error_data = response.json() if response.text else {}
                 error_msg = error_data.get("error", {}).get("message", "Rate limit exceeded")
                 logger.warning(f"DeepSeek rate limit exceeded: {error_msg}")
-                raise RateLimitException(f"DeepSeek rate limit: {error_msg}")
+                raise RateLimitException(
+                    f"DeepSeek rate limit: {error_msg}",
+                    retry_after=parse_retry_after(response.headers)
+                )
             
             if response.status_code == 403:
                 error_data = response.json() if response.text else {}
@@ -161,6 +168,94 @@ class DeepSeekProvider(BaseAIProvider):
             logger.error(f"Unexpected DeepSeek error: {e}")
             raise ProviderException(f"Unexpected DeepSeek error: {str(e)}")
     
+    async def stream_chat_completion(
+        self,
+        messages: List[Dict[str, str]],
+        model: Optional[str] = None,
+        temperature: float = 0.1,
+        max_tokens: Optional[int] = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream chat completion from DeepSeek (OpenAI-style Server-Sent Events)
+        
+        Args:
+            messages: List of message dicts with 'role' and 'content'
+            model: Model to use (defaults to self.model or coder model for code)
+            temperature: Sampling temperature
+            max_tokens: Maximum tokens to generate
+            
+        Yields:
+            Text deltas in order
+            
+        Raises:
+            QuotaExceededException: If quota/credits exhausted
+            RateLimitException: If rate limit exceeded
+            ProviderException: For other errors, including a stream that breaks partway
+        """
+        # Auto-select model based on content if not specified
+        if model is None:
+            model = self.coder_model if self._detect_code_document(messages) else self.model
+        
+        payload = {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "stream": True
+        }
+        
+        if max_tokens:
+            payload["max_tokens"] = max_tokens
+        
+        try:
+            logger.debug(f"Sending streaming chat completion request to DeepSeek with model {model}")
+            
+            async with self.client.stream("POST", f"{self.base_url}/chat/completions", json=payload) as response:
+                if response.status_code != 200:
+                    await response.aread()
+                    self._raise_for_status(response)
+                
+                async for data in iter_sse_data(response):
+                    if data == "[DONE]":
+                        return
+                    choices = json.loads(data).get("choices") or []
+                    delta = choices[0].get("delta", {}).get("content") if choices else None
+                    if delta:
+                        yield delta
+            
+            raise ProviderException("DeepSeek stream ended before completion")
+            
+        except (QuotaExceededException, RateLimitException):
+            raise
+        except httpx.TimeoutException:
+            logger.error("DeepSeek streaming request timeout")
+            raise ProviderException("DeepSeek streaming request timeout")
+        except httpx.RequestError as e:
+            logger.error(f"DeepSeek streaming request error: {e}")
+            raise ProviderException(f"DeepSeek streaming request error: {str(e)}")
+        except ProviderException:
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected DeepSeek streaming error: {e}")
+            raise ProviderException(f"Unexpected DeepSeek streaming error: {str(e)}")
+    
+    def _raise_for_status(self, response: httpx.Response):
+        """Raise the provider exception matching an error response"""
+        error_data = response.json() if response.text else {}
+        if response.status_code == 429:
+            error_msg = error_data.get("error", {}).get("message", "Rate limit exceeded")
+            logger.warning(f"DeepSeek rate limit exceeded: {error_msg}")
+            raise RateLimitException(
+                f"DeepSeek rate limit: {error_msg}",
+                retry_after=parse_retry_after(response.headers)
+            )
+        if response.status_code == 403:
+            error_msg = error_data.get("error", {}).get("message", "Quota exceeded")
+            logger.warning(f"DeepSeek quota exceeded: {error_msg}")
+            raise QuotaExceededException(f"DeepSeek quota exceeded: {error_msg}")
+        error_msg = error_data.get("error", {}).get("message", f"HTTP {response.status_code}")
+        logger.error(f"DeepSeek API error: {error_msg}")
+        raise ProviderException(f"DeepSeek API error: {error_msg}")
+    
     async def vision_completion(
         self,
         prompt: str,
@@ -228,5 +323,4 @@ class DeepSeekProvider(BaseAIProvider):
         return "deepseek"
     
     async def close(self):
-        """Close HTTP client"""
-        await self.client.aclose()
\ No newline at end of file
+        """Nothing to release; connections belong to the shared pool closed by the manager"""
\ No newline at end of file
@@ -2,16 +2,21 @@
 Google Gemini AI Provider Implementation
 Multimodal AI with native vision support
 """
+import json
 import logging
 import httpx
 import base64
-from typing import List, Dict, Optional
+from typing import AsyncIterator, List, Dict, Optional
 from app.core.ai_providers.base_provider import (
     BaseAIProvider,
     ProviderException,
     QuotaExceededException,
-    RateLimitException
+    RateLimitException,
+    iter_sse_data
 )
+from app.core.ai_providers.http_pool import create_client
+from app.core.ai_providers.image_prep import detect_image_mime
+from app.core.ai_providers.rate_limiter import parse_gemini_retry_delay, parse_retry_after
 
 logger = logging.getLogger(__name__)
 
@@ -33,7 +38,7 @@ class GeminiProvider(BaseAIProvider):
             vision_model: Vision model (Gemini models support vision natively)
         """
         super().__init__(api_key, base_url, model, vision_model or model)
-        self.client = httpx.AsyncClient(
+        self.client = create_client(
             params={"key": self.api_key},  # Gemini uses query param for API key
             timeout=30.0
         )
@@ -130,7 +135,10 @@ class GeminiProvider(BaseAIProvider):
                 error_data = response.json() if response.text else {}
                 error_msg = error_data.get("error", {}).get("message", "Rate limit exceeded")
                 logger.warning(f"Gemini rate limit exceeded: {error_msg}")
-                raise RateLimitException(f"Gemini rate limit: {error_msg}")
+                raise RateLimitException(
+                    f"Gemini rate limit: {error_msg}",
+                    retry_after=parse_gemini_retry_delay(error_data) or parse_retry_after(response.headers)
+                )
             
             if response.status_code == 403:
                 error_data = response.json() if response.text else {}
@@ -176,6 +184,104 @@ class GeminiProvider(BaseAIProvider):
             logger.error(f"Unexpected Gemini error: {e}")
             raise ProviderException(f"Unexpected Gemini error: {str(e)}")
     
+    async def stream_chat_completion(
+        self,
+        messages: List[Dict[str, str]],
+        model: Optional[str] = None,
+        temperature: float = 0.1,
+        max_tokens: Optional[int] = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream chat completion from Gemini (streamGenerateContent as Server-Sent Events)
+        
+        Args:
+            messages: List of message dicts with 'role' and 'content'
+            model: Model to use (defaults to self.model)
+            temperature: Sampling temperature
+            max_tokens: Maximum tokens to generate
+            
+        Yields:
+            Text deltas in order
+            
+        Raises:
+            QuotaExceededException: If quota/credits exhausted
+            RateLimitException: If rate limit exceeded
+            ProviderException: For other errors, including a stream that breaks partway
+        """
+        model = model or self.model
+        
+        payload = {
+            "contents": self._convert_messages_to_gemini_format(messages),
+            "generationConfig": {
+                "temperature": temperature
+            }
+        }
+        
+        if max_tokens:
+            payload["generationConfig"]["maxOutputTokens"] = max_tokens
+        
+        try:
+            logger.debug(f"Sending streaming chat completion request to Gemini with model {model}")
+            
+            async with self.client.stream(
+                "POST",
+                f"{self.base_url}/models/{model}:streamGenerateContent",
+                params={"alt": "sse"},
+                json=payload
+            ) as response:
+                if response.status_code != 200:
+                    await response.aread()
+                    self._raise_for_status(response)
+                
+                finished = False
+                async for data in iter_sse_data(response):
+                    candidates = json.loads(data).get("candidates") or []
+                    if not candidates:
+                        continue
+                    for part in candidates[0].get("content", {}).get("parts", []):
+                        if part.get("text"):
+                            yield part["text"]
+                    if candidates[0].get("finishReason"):
+                        finished = True
+            
+            if not finished:
+                raise ProviderException("Gemini stream ended before completion")
+            
+        except (QuotaExceededException, RateLimitException):
+            raise
+        except httpx.TimeoutException:
+            logger.error("Gemini streaming request timeout")
+            raise ProviderException("Gemini streaming request timeout")
+        except httpx.RequestError as e:
+            logger.error(f"Gemini streaming request error: {e}")
+            raise ProviderException(f"Gemini streaming request error: {str(e)}")
+        except ProviderException:
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected Gemini streaming error: {e}")
+            raise ProviderException(f"Unexpected Gemini streaming error: {str(e)}")
+    
+    def _raise_for_status(self, response: httpx.Response):
+        """Raise the provider exception matching an error response"""
+        error_data = response.json() if response.text else {}
+        if isinstance(error_data, list):
+            # Streaming endpoints wrap the error object in a list
+            error_data = error_data[0] if error_data else {}
+        if response.status_code == 429:
+            error_msg = error_data.get("error", {}).get("message", "Rate limit exceeded")
+            logger.warning(f"Gemini rate limit exceeded: {error_msg}")
+            raise RateLimitException(
+                f"Gemini rate limit: {error_msg}",
+                retry_after=parse_gemini_retry_delay(error_data) or parse_retry_after(response.headers)
+            )
+        if response.status_code == 403:
+            error_msg = error_data.get("error", {}).get("message", "Quota exceeded")
+            logger.warning(f"Gemini quota exceeded: {error_msg}")
+            raise QuotaExceededException(f"Gemini quota exceeded: {error_msg}")
+        error_msg = error_data.get("error", {}).get("message", f"HTTP {response.status_code}")
+        logger.error(f"Gemini API error: {error_msg}")
+        raise ProviderException(f"Gemini API error: {error_msg}")
+    
     async def vision_completion(
         self,
         prompt: str,
@@ -204,13 +310,7 @@ class GeminiProvider(BaseAIProvider):
         image_base64 = base64.b64encode(image_data).decode('utf-8')
         
         # Detect image format
-        image_format = "image/jpeg"  # Default
-        if image_data.startswith(b'\x89PNG'):
-            image_format = "image/png"
-        elif image_data.startswith(b'GIF'):
-            image_format = "image/gif"
-        elif image_data.startswith(b'\xff\xd8'):
-            image_format = "image/jpeg"
+        image_format = detect_image_mime(image_data)
         
         # Gemini multimodal format
         payload = {
@@ -245,7 +345,10 @@ class GeminiProvider(BaseAIProvider):
             if response.status_code == 429:
                 error_data = response.json() if response.text else {}
                 error_msg = error_data.get("error", {}).get("message", "Rate limit exceeded")
-                raise RateLimitException(f"Gemini rate limit: {error_msg}")
+                raise RateLimitException(
+                    f"Gemini rate limit: {error_msg}",
+                    retry_after=parse_gemini_retry_delay(error_data) or parse_retry_after(response.headers)
+                )
             
             if response.status_code == 403:
                 error_data = response.json() if response.text else {}
@@ -334,5 +437,4 @@ class GeminiProvider(BaseAIProvider):
         return "gemini"
     
     async def close(self):
-        """Close HTTP client"""
-        await self.client.aclose()
\ No newline at end of file
+        """Nothing to release; connections belong to the shared pool closed by the manager"""
\ No newline at end of file
@@ -2,15 +2,20 @@
 Groq AI Provider Implementation
 Ultra-fast inference with OpenAI-compatible API
 """
+import json
 import logging
 import httpx
-from typing import List, Dict, Optional
+from typing import AsyncIterator, List, Dict, Optional
 from app.core.ai_providers.base_provider import (
     BaseAIProvider,
     ProviderException,
     QuotaExceededException,
-    RateLimitException
+    RateLimitException,
+    iter_sse_data
 )
+from app.core.ai_providers.http_pool import create_client
+from app.core.ai_providers.image_prep import detect_image_mime
+from app.core.ai_providers.rate_limiter import parse_retry_after
 
 logger = logging.getLogger(__name__)
 
@@ -32,7 +37,7 @@ class GroqProvider(BaseAIProvider):
             vision_model: Vision model (e.g., llama-3.2-90b-vision-preview)
         """
         super().__init__(api_key, base_url, model, vision_model)
-        self.client = httpx.AsyncClient(
+        self.client = create_client(
             headers={
                 "Authorization": f"Bearer {self.api_key}",
                 "Content-Type": "application/json"
@@ -89,7 +94,10 @@ class GroqProvider(BaseAIProvider):
                 error_data = response.json() if response.text else {}
                 error_msg = error_data.get("error", {}).get("message", "Rate limit exceeded")
                 logger.warning(f"Groq rate limit exceeded: {error_msg}")
-                raise RateLimitException(f"Groq rate limit: {error_msg}")
+                raise RateLimitException(
+                    f"Groq rate limit: {error_msg}",
+                    retry_after=parse_retry_after(response.headers)
+                )
             
             if response.status_code == 403:
                 error_data = response.json() if response.text else {}
@@ -103,6 +111,8 @@ class GroqProvider(BaseAIProvider):
                 logger.error(f"Groq API error: {error_msg}")
                 raise ProviderException(f"Groq API error: {error_msg}")
             
+            self._record_rate_limit_headers(response.headers)
+            
             # Parse response
             data = response.json()
             
@@ -126,6 +136,93 @@ class GroqProvider(BaseAIProvider):
             logger.error(f"Unexpected Groq error: {e}")
             raise ProviderException(f"Unexpected Groq error: {str(e)}")
     
+    async def stream_chat_completion(
+        self,
+        messages: List[Dict[str, str]],
+        model: Optional[str] = None,
+        temperature: float = 0.1,
+        max_tokens: Optional[int] = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream chat completion from Groq (OpenAI-style Server-Sent Events)
+        
+        Args:
+            messages: List of message dicts with 'role' and 'content'
+            model: Model to use (defaults to self.model)
+            temperature: Sampling temperature
+            max_tokens: Maximum tokens to generate
+            
+        Yields:
+            Text deltas in order
+            
+        Raises:
+            QuotaExceededException: If quota/credits exhausted
+            RateLimitException: If rate limit exceeded
+            ProviderException: For other errors, including a stream that breaks partway
+        """
+        model = model or self.model
+        
+        payload = {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "stream": True
+        }
+        
+        if max_tokens:
+            payload["max_tokens"] = max_tokens
+        
+        try:
+            logger.debug(f"Sending streaming chat completion request to Groq with model {model}")
+            
+            async with self.client.stream("POST", f"{self.base_url}/chat/completions", json=payload) as response:
+                if response.status_code != 200:
+                    await response.aread()
+                    self._raise_for_status(response)
+                self._record_rate_limit_headers(response.headers)
+                
+                async for data in iter_sse_data(response):
+                    if data == "[DONE]":
+                        return
+                    choices = json.loads(data).get("choices") or []
+                    delta = choices[0].get("delta", {}).get("content") if choices else None
+                    if delta:
+                        yield delta
+            
+            raise ProviderException("Groq stream ended before completion")
+            
+        except (QuotaExceededException, RateLimitException):
+            raise
+        except httpx.TimeoutException:
+            logger.error("Groq streaming request timeout")
+            raise ProviderException("Groq streaming request timeout")
+        except httpx.RequestError as e:
+            logger.error(f"Groq streaming request error: {e}")
+            raise ProviderException(f"Groq streaming request error: {str(e)}")
+        except ProviderException:
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected Groq streaming error: {e}")
+            raise ProviderException(f"Unexpected Groq streaming error: {str(e)}")
+    
+    def _raise_for_status(self, response: httpx.Response):
+        """Raise the provider exception matching an error response"""
+        error_data = response.json() if response.text else {}
+        if response.status_code == 429:
+            error_msg = error_data.get("error", {}).get("message", "Rate limit exceeded")
+            logger.warning(f"Groq rate limit exceeded: {error_msg}")
+            raise RateLimitException(
+                f"Groq rate limit: {error_msg}",
+                retry_after=parse_retry_after(response.headers)
+            )
+        if response.status_code == 403:
+            error_msg = error_data.get("error", {}).get("message", "Quota exceeded")
+            logger.warning(f"Groq quota exceeded: {error_msg}")
+            raise QuotaExceededException(f"Groq quota exceeded: {error_msg}")
+        error_msg = error_data.get("error", {}).get("message", f"HTTP {response.status_code}")
+        logger.error(f"Groq API error: {error_msg}")
+        raise ProviderException(f"Groq API error: {error_msg}")
+    
     async def vision_completion(
         self,
         prompt: str,
@@ -156,6 +253,7 @@ class GroqProvider(BaseAIProvider):
         # Encode image to base64
         import base64
         image_base64 = base64.b64encode(image_data).decode('utf-8')
+        image_format = detect_image_mime(image_data)
         
         # Groq uses OpenAI format for vision
         messages = [
@@ -166,7 +264,7 @@ class GroqProvider(BaseAIProvider):
                     {
                         "type": "image_url",
                         "image_url": {
-                            "url": f"data:image/jpeg;base64,{image_base64}"
+                            "url": f"data:{image_format};base64,{image_base64}"
                         }
                     }
                 ]
@@ -189,7 +287,10 @@ class GroqProvider(BaseAIProvider):
             if response.status_code == 429:
                 error_data = response.json() if response.text else {}
                 error_msg = error_data.get("error", {}).get("message", "Rate limit exceeded")
-                raise RateLimitException(f"Groq rate limit: {error_msg}")
+                raise RateLimitException(
+                    f"Groq rate limit: {error_msg}",
+                    retry_after=parse_retry_after(response.headers)
+                )
             
             if response.status_code == 403:
                 error_data = response.json() if response.text else {}
@@ -244,6 +345,12 @@ class GroqProvider(BaseAIProvider):
             logger.debug(f"Groq health check failed: {e}")
             return False
     
+    def _record_rate_limit_headers(self, headers: httpx.Headers):
+        """Keep the remaining request budget and, if exhausted, when it resets"""
+        remaining = headers.get("x-ratelimit-remaining-requests")
+        self.rate_limit_remaining = int(remaining) if remaining and remaining.isdigit() else None
+        self.rate_limit_reset = parse_retry_after(headers)
+    
     def supports_vision(self) -> bool:
         """
         Check if Groq supports vision models
@@ -263,5 +370,4 @@ class GroqProvider(BaseAIProvider):
         return "groq"
     
     async def close(self):
-        """Close HTTP client"""
-        await self.client.aclose()
+        """Nothing to release; connections belong to the shared pool closed by the manager"""
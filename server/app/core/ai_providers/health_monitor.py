@@ -0,0 +1,172 @@
+"""
+Background health monitoring of AI providers
+Concurrent probes with timeouts and a per-provider circuit breaker
+"""
+import asyncio
+import logging
+import time
+from enum import Enum
+from typing import TYPE_CHECKING, Dict, Optional
+
+from app.core.config import settings
+
+if TYPE_CHECKING:
+    from app.core.ai_providers.provider_manager import AIProviderManager
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitState(str, Enum):
+    """Circuit breaker states"""
+    CLOSED = "closed"  # Healthy, requests flow
+    OPEN = "open"  # Failing, requests are not sent
+    HALF_OPEN = "half_open"  # Reset timeout passed, one probe decides
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker for one provider
+
+    ``failure_threshold`` consecutive failures open the circuit. After
+    ``reset_timeout`` seconds it turns half-open; a success closes it, a
+    failure opens it again with the timeout doubled (capped at
+    ``max_reset_timeout``).
+    """
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 60.0, max_reset_timeout: float = 900.0):
+        """
+        Initialize circuit breaker
+
+        Args:
+            failure_threshold: Consecutive failures that open the circuit
+            reset_timeout: Seconds before an open circuit is probed
+            max_reset_timeout: Upper bound of the backed-off reset timeout
+        """
+        self.failure_threshold = max(1, failure_threshold)
+        self.base_reset_timeout = reset_timeout
+        self.max_reset_timeout = max(reset_timeout, max_reset_timeout)
+        self.reset_timeout = reset_timeout
+        self.state = CircuitState.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+
+    def record_success(self) -> bool:
+        """
+        Record a successful request or probe
+
+        Returns:
+            True if this closed a previously open circuit
+        """
+        was_open = self.state != CircuitState.CLOSED
+        self.state = CircuitState.CLOSED
+        self.failures = 0
+        self.reset_timeout = self.base_reset_timeout
+        return was_open
+
+    def record_failure(self) -> bool:
+        """
+        Record a failed request or probe
+
+        Returns:
+            True if this opened the circuit
+        """
+        self.failures += 1
+        if self.state == CircuitState.HALF_OPEN:
+            self.reset_timeout = min(self.reset_timeout * 2, self.max_reset_timeout)
+        elif self.state == CircuitState.OPEN or self.failures < self.failure_threshold:
+            return False
+        self.state = CircuitState.OPEN
+        self.opened_at = time.monotonic()
+        return True
+
+    def probe_due(self) -> bool:
+        """Whether an open circuit may be probed; turns it half-open if so"""
+        if self.state == CircuitState.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self.state = CircuitState.HALF_OPEN
+        return self.state != CircuitState.OPEN
+
+
+class ProviderHealthMonitor:
+    """
+    Probes providers in a background task so requests never wait on health checks
+
+    Closed circuits are probed every ``AI_HEALTH_CHECK_INTERVAL`` seconds,
+    open ones as soon as their reset timeout passes. All probes of a round
+    run concurrently, each bounded by ``AI_HEALTH_CHECK_TIMEOUT``. The
+    request path only reads the resulting ProviderStatus snapshot.
+    """
+
+    def __init__(self, manager: "AIProviderManager"):
+        self.manager = manager
+        self.interval = settings.AI_HEALTH_CHECK_INTERVAL
+        self.timeout = settings.AI_HEALTH_CHECK_TIMEOUT
+        self._last_probe: Dict[str, float] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Start the monitor task (idempotent)"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+            logger.info(f"Provider health monitor started (interval {self.interval}s)")
+
+    async def stop(self):
+        """Stop the monitor task"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            logger.info("Provider health monitor stopped")
+
+    async def _run(self):
+        # Wake often enough to probe open circuits when their timeout passes
+        tick = max(1.0, min(self.interval, settings.AI_CIRCUIT_RESET_TIMEOUT))
+        while True:
+            try:
+                await self.check_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Provider health monitor round failed: {e}")
+            await asyncio.sleep(tick)
+
+    def _probe_due(self, provider_name: str, now: float) -> bool:
+        """Whether a provider should be probed in this round"""
+        status = self.manager.provider_statuses.get(provider_name)
+        if status is None or status.quota_exceeded or status.unavailable_reason == "rate_limit":
+            # Cooldowns are lifted on their own schedule; probing would burn quota
+            return False
+        breaker = self.manager.circuit_breakers[provider_name]
+        if breaker.state != CircuitState.CLOSED:
+            return breaker.probe_due()
+        return now - self._last_probe.get(provider_name, float("-inf")) >= self.interval
+
+    async def check_once(self):
+        """Run one round of probes for every provider that is due"""
+        self.manager.restore_expired_cooldowns()
+        now = time.monotonic()
+        due = [name for name in self.manager.providers if self._probe_due(name, now)]
+        if not due:
+            return
+
+        logger.debug(f"Probing providers: {', '.join(due)}")
+        results = await asyncio.gather(*(self._probe(name) for name in due))
+        for provider_name, (healthy, response_time_ms) in zip(due, results):
+            self._last_probe[provider_name] = now
+            self.manager.record_health_probe(provider_name, healthy, response_time_ms)
+
+    async def _probe(self, provider_name: str):
+        """Probe one provider; returns (healthy, response time in ms)"""
+        provider = self.manager.providers[provider_name]
+        start_time = time.monotonic()
+        try:
+            healthy = await asyncio.wait_for(provider.check_health(), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Health check for {provider_name} timed out after {self.timeout}s")
+            healthy = False
+        except Exception as e:
+            logger.warning(f"Health check for {provider_name} failed: {e}")
+            healthy = False
+        return healthy, int((time.monotonic() - start_time) * 1000)
@@ -0,0 +1,72 @@
+"""
+Shared HTTP connection pool for AI providers
+All provider clients send through one keep-alive transport (HTTP/2 when
+the h2 package is installed), so connections are reused across providers,
+requests and health checks
+"""
+import logging
+from typing import Optional
+
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Try to import h2 (HTTP/2 support for httpx)
+try:
+    import h2  # noqa: F401
+    H2_AVAILABLE = True
+except ImportError:
+    H2_AVAILABLE = False
+    logger.info("h2 not available, AI provider requests use HTTP/1.1")
+
+_transport: Optional[httpx.AsyncHTTPTransport] = None
+
+
+def get_shared_transport() -> httpx.AsyncHTTPTransport:
+    """
+    Get the process-wide provider transport, creating it on first use
+
+    Returns:
+        Pooled transport sized by the AI_HTTP_* settings
+    """
+    global _transport
+    if _transport is None:
+        http2 = settings.AI_HTTP2_ENABLED and H2_AVAILABLE
+        _transport = httpx.AsyncHTTPTransport(
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=settings.AI_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.AI_HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=settings.AI_HTTP_KEEPALIVE_EXPIRY
+            )
+        )
+        logger.info(
+            f"Created shared provider HTTP pool (http2={http2}, "
+            f"max_connections={settings.AI_HTTP_MAX_CONNECTIONS})"
+        )
+    return _transport
+
+
+def create_client(**kwargs) -> httpx.AsyncClient:
+    """
+    Create a provider client on the shared transport
+
+    Args:
+        **kwargs: httpx.AsyncClient options (headers, params, timeout, ...)
+
+    Returns:
+        Client whose connections come from the shared pool. Do not close it;
+        the pool is closed once by close_shared_transport().
+    """
+    return httpx.AsyncClient(transport=get_shared_transport(), **kwargs)
+
+
+async def close_shared_transport():
+    """Close all pooled provider connections"""
+    global _transport
+    if _transport is not None:
+        await _transport.aclose()
+        _transport = None
+        logger.info("Closed shared provider HTTP pool")
@@ -0,0 +1,205 @@
+"""
+Image preparation for vision requests
+Downscales, re-encodes and strips metadata from images before they are
+base64-encoded into provider requests
+"""
+import hashlib
+import io
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Try to import Pillow
+try:
+    from PIL import Image, ImageOps
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+    logger.warning("Pillow not available, vision images are sent unmodified")
+
+_PIL_FORMATS = {"jpeg": "JPEG", "webp": "WEBP"}
+# Image.info keys holding metadata that must not be uploaded
+_METADATA_KEYS = ("exif", "icc_profile", "xmp", "XML:com.adobe.xmp", "comment")
+
+
+def detect_image_mime(data: bytes) -> str:
+    """
+    Detect the MIME type of encoded image bytes from their signature
+
+    Args:
+        data: Encoded image
+
+    Returns:
+        MIME type (image/jpeg when unknown)
+    """
+    if data.startswith(b"\x89PNG"):
+        return "image/png"
+    if data.startswith(b"GIF8"):
+        return "image/gif"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    if data.startswith(b"BM"):
+        return "image/bmp"
+    if data[:4] in (b"II*\x00", b"MM\x00*"):
+        return "image/tiff"
+    return "image/jpeg"
+
+
+def parse_max_sides(spec: str) -> Dict[str, int]:
+    """
+    Parse a per-provider size setting such as ``groq:1600,ollama:1024``
+
+    Args:
+        spec: Comma-separated ``name:pixels`` pairs
+
+    Returns:
+        Dict mapping provider name to maximum image side in pixels
+    """
+    sides: Dict[str, int] = {}
+    for pair in spec.split(","):
+        name, _, value = pair.strip().partition(":")
+        try:
+            sides[name.strip()] = int(value)
+        except ValueError:
+            if pair.strip():
+                logger.error(f"Invalid vision image size '{pair}', ignoring")
+    return sides
+
+
+@dataclass
+class PreparedImage:
+    """Image bytes ready for upload"""
+    data: bytes
+    mime_type: str
+    width: int = 0
+    height: int = 0
+
+
+class VisionImagePreparer:
+    """
+    Prepares images for vision providers, caching results by content hash
+
+    Images are rotated upright (EXIF orientation), downscaled so the longer
+    side fits the provider's limit, flattened to RGB and re-encoded as JPEG
+    or WebP without EXIF/ICC metadata. The original is kept when it already
+    fits, carries no metadata and re-encoding would not make it smaller.
+    """
+
+    def __init__(self, max_cache_bytes: int = 64 * 1024 * 1024):
+        """
+        Initialize preparer
+
+        Args:
+            max_cache_bytes: Memory budget of prepared images kept for reuse
+        """
+        self.max_cache_bytes = max_cache_bytes
+        self._cache: "OrderedDict[Tuple[str, int, str, int], PreparedImage]" = OrderedDict()
+        self._cache_bytes = 0
+        self._lock = threading.Lock()
+
+    def max_side_for(self, provider_name: str) -> int:
+        """Maximum image side in pixels for a provider"""
+        sides = parse_max_sides(settings.AI_VISION_MAX_SIDES)
+        return sides.get(provider_name, settings.AI_VISION_DEFAULT_MAX_SIDE)
+
+    def prepare(self, image_data: bytes, max_side: int) -> PreparedImage:
+        """
+        Prepare an image for upload (CPU-bound; run in an executor)
+
+        Args:
+            image_data: Original encoded image
+            max_side: Maximum width/height in pixels
+
+        Returns:
+            PreparedImage (the original bytes if Pillow is unavailable or
+            the image cannot be decoded)
+        """
+        if not PIL_AVAILABLE:
+            return PreparedImage(image_data, detect_image_mime(image_data))
+
+        image_format = settings.AI_VISION_IMAGE_FORMAT.lower()
+        if image_format not in _PIL_FORMATS:
+            image_format = "jpeg"
+        quality = settings.AI_VISION_IMAGE_QUALITY
+        key = (hashlib.sha256(image_data).hexdigest(), max_side, image_format, quality)
+
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                return cached
+
+        try:
+            prepared = self._encode(image_data, max_side, image_format, quality)
+        except Exception as e:
+            logger.warning(f"Could not prepare vision image, sending original: {e}")
+            return PreparedImage(image_data, detect_image_mime(image_data))
+
+        logger.debug(
+            f"Prepared vision image: {len(image_data)} -> {len(prepared.data)} bytes "
+            f"({prepared.width}x{prepared.height} {prepared.mime_type})"
+        )
+        self._store(key, prepared)
+        return prepared
+
+    def _encode(self, image_data: bytes, max_side: int, image_format: str, quality: int) -> PreparedImage:
+        with Image.open(io.BytesIO(image_data)) as original:
+            original_size = original.size
+            original_mime = Image.MIME.get(original.format or "", detect_image_mime(image_data))
+            has_metadata = any(key in original.info for key in _METADATA_KEYS)
+            image = ImageOps.exif_transpose(original)
+            image.thumbnail((max_side, max_side), Image.LANCZOS)
+
+            if image.mode != "RGB":
+                if image.mode in ("RGBA", "LA") or "transparency" in image.info:
+                    # Flatten transparency onto white, as documents are printed
+                    rgba = image.convert("RGBA")
+                    background = Image.new("RGB", rgba.size, (255, 255, 255))
+                    background.paste(rgba, mask=rgba.getchannel("A"))
+                    image = background
+                else:
+                    image = image.convert("RGB")
+
+            output = io.BytesIO()
+            # No exif/icc_profile arguments: metadata is dropped
+            image.save(output, _PIL_FORMATS[image_format], quality=quality, optimize=True)
+            data = output.getvalue()
+            width, height = image.size
+
+        keep_original = (
+            max(original_size) <= max_side
+            and not has_metadata
+            and len(data) >= len(image_data)
+            and original_mime in ("image/jpeg", "image/png", "image/webp")
+        )
+        if keep_original:
+            return PreparedImage(image_data, original_mime, *original_size)
+        return PreparedImage(data, f"image/{image_format}", width, height)
+
+    def _store(self, key: Tuple[str, int, str, int], prepared: PreparedImage):
+        size = len(prepared.data)
+        if size > self.max_cache_bytes:
+            return
+        with self._lock:
+            if key in self._cache:
+                return
+            self._cache[key] = prepared
+            self._cache_bytes += size
+            while self._cache_bytes > self.max_cache_bytes:
+                _, evicted = self._cache.popitem(last=False)
+                self._cache_bytes -= len(evicted.data)
+
+    def get_stats(self) -> Dict[str, int]:
+        """Cache statistics"""
+        with self._lock:
+            return {"entries": len(self._cache), "bytes": self._cache_bytes}
+
+
+# Global image preparer instance
+vision_image_preparer = VisionImagePreparer(settings.AI_VISION_CACHE_MAX_BYTES)
@@ -2,16 +2,18 @@
 Ollama AI Provider Implementation
 Local LLM with vision support
 """
+import json
 import logging
 import httpx
 import base64
-from typing import List, Dict, Optional
+from typing import AsyncIterator, List, Dict, Optional
 from app.core.ai_providers.base_provider import (
     BaseAIProvider,
     ProviderException,
     QuotaExceededException,
     RateLimitException
 )
+from app.core.ai_providers.http_pool import create_client
 
 logger = logging.getLogger(__name__)
 
@@ -33,7 +35,7 @@ class OllamaProvider(BaseAIProvider):
             vision_model: Vision model (e.g., llava)
         """
         super().__init__(api_key, base_url, model, vision_model or "llava")
-        self.client = httpx.AsyncClient(timeout=60.0)
+        self.client = create_client(timeout=60.0)
         logger.info(f"Initialized Ollama provider with model {self.model}")
     
     async def chat_completion(
@@ -112,6 +114,82 @@ class OllamaProvider(BaseAIProvider):
             logger.error(f"Unexpected Ollama error: {e}")
             raise ProviderException(f"Unexpected Ollama error: {str(e)}")
     
+    async def stream_chat_completion(
+        self,
+        messages: List[Dict[str, str]],
+        model: Optional[str] = None,
+        temperature: float = 0.1,
+        max_tokens: Optional[int] = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream chat completion from Ollama (newline-delimited JSON)
+        
+        Args:
+            messages: List of message dicts with 'role' and 'content'
+            model: Model to use (defaults to self.model)
+            temperature: Sampling temperature
+            max_tokens: Maximum tokens to generate
+            
+        Yields:
+            Text deltas in order
+            
+        Raises:
+            ProviderException: For errors, including a stream that breaks partway
+        """
+        model = model or self.model
+        
+        payload = {
+            "model": model,
+            "messages": messages,
+            "stream": True,
+            "options": {
+                "temperature": temperature
+            }
+        }
+        
+        if max_tokens:
+            payload["options"]["num_predict"] = max_tokens
+        
+        try:
+            logger.debug(f"Sending streaming chat completion request to Ollama with model {model}")
+            
+            async with self.client.stream("POST", f"{self.base_url}/chat", json=payload) as response:
+                if response.status_code != 200:
+                    await response.aread()
+                    error_msg = f"HTTP {response.status_code}"
+                    try:
+                        error_msg = response.json().get("error", error_msg)
+                    except Exception:
+                        pass
+                    logger.error(f"Ollama API error: {error_msg}")
+                    raise ProviderException(f"Ollama API error: {error_msg}")
+                
+                async for line in response.aiter_lines():
+                    if not line.strip():
+                        continue
+                    data = json.loads(line)
+                    if data.get("error"):
+                        raise ProviderException(f"Ollama stream error: {data['error']}")
+                    delta = data.get("message", {}).get("content")
+                    if delta:
+                        yield delta
+                    if data.get("done"):
+                        return
+            
+            raise ProviderException("Ollama stream ended before completion")
+            
+        except httpx.TimeoutException:
+            logger.error("Ollama streaming request timeout")
+            raise ProviderException("Ollama streaming request timeout")
+        except httpx.RequestError as e:
+            logger.error(f"Ollama streaming request error: {e}")
+            raise ProviderException(f"Ollama streaming request error: {str(e)}")
+        except ProviderException:
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected Ollama streaming error: {e}")
+            raise ProviderException(f"Unexpected Ollama streaming error: {str(e)}")
+    
     async def vision_completion(
         self,
         prompt: str,
@@ -225,5 +303,4 @@ class OllamaProvider(BaseAIProvider):
         return "ollama"
     
     async def close(self):
-        """Close HTTP client"""
-        await self.client.aclose()
+        """Nothing to release; connections belong to the shared pool closed by the manager"""
@@ -2,10 +2,19 @@
 AI Provider Manager
 Manages multiple AI providers with automatic fallback and quota detection
 """
+import asyncio
+import hashlib
 import logging
+import re
 import time
+import unicodedata
+from collections import deque
+from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
+from functools import partial
+from typing import Callable, Deque, Dict, List, Optional, Any, Sequence, Tuple
+from app.core.config import settings
+from app.core.disk_cache import DiskLRUCache
 from app.core.ai_providers.base_provider import (
     BaseAIProvider,
     ProviderException,
@@ -17,10 +26,158 @@ from app.core.ai_providers.groq_provider import GroqProvider
 from app.core.ai_providers.deepseek_provider import DeepSeekProvider
 from app.core.ai_providers.gemini_provider import GeminiProvider
 from app.core.ai_providers.ollama_provider import OllamaProvider
+from app.core.ai_providers.rate_limiter import ProviderRateLimiter
+from app.core.ai_providers.routing import AdaptiveRouter
+from app.core.ai_providers.http_pool import close_shared_transport
+from app.core.ai_providers.image_prep import vision_image_preparer
+from app.core.ai_providers.health_monitor import CircuitBreaker, CircuitState, ProviderHealthMonitor
 from app.models.ai_models import ProviderConfig, ProviderStatus, EnhancementResult, ProviderName
+from app.utils.text import detect_vietnamese_script
 
 logger = logging.getLogger(__name__)
 
+# Bump whenever enhancement/vision prompts change so cached answers are not reused
+PROMPT_VERSION = 1
+
+# Latency samples kept per provider, and how many are needed before hedging uses them
+LATENCY_SAMPLE_SIZE = 100
+HEDGE_MIN_SAMPLES = 5
+
+# Retries of one request after a short provider-reported rate-limit wait
+RATE_LIMIT_RETRIES = 1
+# Rough token cost of an image in a vision request
+VISION_IMAGE_TOKENS = 1000
+
+# Rough token estimate used for chunking (no tokenizer dependency)
+CHARS_PER_TOKEN = 4
+
+# Boundaries tried in order when a piece of text is too long: page, paragraph, line, word
+CHUNK_SEPARATORS = ("\f", "\n\n", "\n", " ")
+
+
+class ToneMarksMissingError(ProviderException):
+    """Raised when Vietnamese output has no tone marks"""
+    pass
+
+
+@dataclass
+class ChunkOutcome:
+    """Enhancement outcome of one text chunk"""
+    text: str
+    provider: Optional[str] = None
+    model: Optional[str] = None
+    fallback_occurred: bool = False
+    error: Optional[str] = None
+
+
+# Receives streaming events: {"chunk", "chunks", "separator"} plus "delta" or "reset"
+StreamCallback = Callable[[Dict[str, Any]], None]
+
+
+class ChunkStream:
+    """
+    Forwards the streamed text of one chunk to a StreamCallback
+    
+    Only one request per chunk streams to the client: the first to produce
+    text. Deltas of other (hedged) requests are buffered. If the streaming
+    request fails, a ``reset`` event tells the client to drop the chunk's
+    text so far. If the final text comes from another request (or is the
+    original text), it is sent whole.
+    """
+    
+    def __init__(self, callback: StreamCallback, index: int, count: int, separator: str):
+        self.callback = callback
+        self.index = index
+        self.count = count
+        self.separator = separator
+        self.owner: Optional[str] = None
+        self.buffers: Dict[str, str] = {}
+    
+    def _emit(self, **data):
+        try:
+            self.callback({"chunk": self.index, "chunks": self.count, "separator": self.separator, **data})
+        except Exception as e:
+            logger.warning(f"Enhancement stream callback failed: {e}")
+    
+    def delta(self, request: str, text: str):
+        """Text produced by a request"""
+        self.buffers[request] = self.buffers.get(request, "") + text
+        if self.owner is None:
+            # Take over the stream, catching up on anything buffered
+            self.owner = request
+            text = self.buffers[request]
+        if self.owner == request:
+            self._emit(delta=text)
+    
+    def failed(self, request: str):
+        """A request failed, possibly partway through its stream"""
+        self.buffers.pop(request, None)
+        if self.owner == request:
+            self.owner = None
+            self._emit(reset=True)
+    
+    def finish(self, request: Optional[str], text: str):
+        """The chunk is final; ``request`` is the winner (None for original text)"""
+        if request is not None and self.owner == request:
+            return
+        if self.owner is not None:
+            self._emit(reset=True)
+        if text:
+            self._emit(delta=text)
+
+
+def _split_units(text: str, max_chars: int, separators: Sequence[str]) -> List[Tuple[str, str]]:
+    """Split text into (piece, following separator) units no longer than max_chars"""
+    if len(text) <= max_chars:
+        return [(text, "")]
+    if not separators:
+        # No boundary left - hard cut
+        return [(text[i:i + max_chars], "") for i in range(0, len(text), max_chars)]
+    
+    separator, finer = separators[0], separators[1:]
+    parts = text.split(separator)
+    units: List[Tuple[str, str]] = []
+    for i, part in enumerate(parts):
+        sub_units = _split_units(part, max_chars, finer)
+        if i < len(parts) - 1:
+            piece, trailing = sub_units[-1]
+            sub_units[-1] = (piece, trailing + separator)
+        units.extend(sub_units)
+    return units
+
+
+def split_text_into_chunks(text: str, max_tokens: int) -> List[Tuple[str, str]]:
+    """
+    Split text into token-bounded chunks on page/paragraph/line boundaries
+    
+    Args:
+        text: Text to split
+        max_tokens: Approximate maximum tokens per chunk
+        
+    Returns:
+        List of (chunk, separator) pairs; joining chunk + separator restores the text
+    """
+    max_chars = max(1, max_tokens * CHARS_PER_TOKEN)
+    if len(text) <= max_chars:
+        return [(text, "")]
+    
+    chunks: List[List[Tuple[str, str]]] = []
+    current: List[Tuple[str, str]] = []
+    size = 0
+    for piece, separator in _split_units(text, max_chars, CHUNK_SEPARATORS):
+        if current and size + len(piece) > max_chars:
+            chunks.append(current)
+            current, size = [], 0
+        current.append((piece, separator))
+        size += len(piece) + len(separator)
+    if current:
+        chunks.append(current)
+    
+    return [
+        ("".join(piece + separator for piece, separator in chunk[:-1]) + chunk[-1][0], chunk[-1][1])
+        for chunk in chunks
+    ]
+
 
 class AIProviderManager:
     """
@@ -33,7 +190,26 @@ class AIProviderManager:
         self.provider_configs: List[ProviderConfig] = []
         self.provider_statuses: Dict[str, ProviderStatus] = {}
         self.cached_provider: Optional[str] = None
-        self.last_health_check = datetime.now() - timedelta(minutes=10)  # Force initial check
+        self._provider_semaphores: Dict[str, asyncio.Semaphore] = {}
+        self.rate_limiters: Dict[str, ProviderRateLimiter] = {}
+        self.router = AdaptiveRouter(
+            alpha=settings.AI_ROUTING_EWMA_ALPHA,
+            priority_weight=settings.AI_ROUTING_PRIORITY_WEIGHT,
+            probe_interval=settings.AI_ROUTING_PROBE_INTERVAL,
+            concurrency=settings.AI_PROVIDER_MAX_CONCURRENCY
+        )
+        # Recent successful request latencies (seconds) per provider, for hedging
+        self._latency_samples: Dict[str, Deque[float]] = {}
+        self.enhancement_cache: Optional[DiskLRUCache] = None
+        if settings.AI_ENHANCEMENT_CACHE_ENABLED:
+            self.enhancement_cache = DiskLRUCache(
+                settings.CACHE_DIR / "enhancement",
+                max_bytes=settings.AI_ENHANCEMENT_CACHE_MAX_BYTES,
+                ttl_seconds=settings.AI_ENHANCEMENT_CACHE_TTL,
+                name="enhancement"
+            )
+        self.circuit_breakers: Dict[str, CircuitBreaker] = {}
+        self.health_monitor = ProviderHealthMonitor(self)
         
         # Load configurations and initialize providers
         self._load_providers()
@@ -52,6 +228,12 @@ class AIProviderManager:
                 provider = self._create_provider(config)
                 if provider:
                     self.providers[config.name] = provider
+                    self.rate_limiters[config.name] = ProviderRateLimiter(
+                        config.name, config.requests_per_minute, config.tokens_per_minute
+                    )
+                    self.circuit_breakers[config.name] = CircuitBreaker(
+                        settings.AI_CIRCUIT_FAILURE_THRESHOLD, settings.AI_CIRCUIT_RESET_TIMEOUT
+                    )
                     self.provider_statuses[config.name] = ProviderStatus(
                         name=config.name,
                         available=True,  # Will be checked in health check
@@ -120,29 +302,51 @@ class AIProviderManager:
         text: str,
         document_type: str = "general",
         image_data: Optional[bytes] = None,
-        target_language: str = "auto"
+        target_language: str = "auto",
+        on_delta: Optional[StreamCallback] = None
     ) -> EnhancementResult:
         """
         Enhance OCR text using available providers with automatic fallback
         
+        Long texts are split on page/paragraph boundaries into token-bounded
+        chunks that are enhanced concurrently (bounded per provider) and
+        stitched back in order. A chunk that fails on every provider keeps
+        its original text instead of failing the whole enhancement.
+        
         Args:
             text: Original OCR text to enhance
             document_type: Type of document (general, code, invoice, etc.)
             image_data: Optional image data for vision-based enhancement
             target_language: Target language (auto, vi, en, etc.)
+            on_delta: Optional callback receiving enhanced text as it is
+                generated (see ChunkStream); text requests are streamed
             
         Returns:
             EnhancementResult with original and enhanced text
         """
         start_time = time.time()
+        loop = asyncio.get_event_loop()
+        
+        # Serve identical requests from the enhancement cache
+        cache_key = None
+        if self.enhancement_cache:
+            cache_key = self._enhancement_cache_key(text, document_type, image_data, target_language)
+            cached = await loop.run_in_executor(None, self.enhancement_cache.get, cache_key)
+            if cached is not None:
+                logger.info(f"Enhancement cache hit ({cached['provider']})")
+                if on_delta:
+                    ChunkStream(on_delta, 0, 1, "").finish(None, cached["enhancedText"])
+                return EnhancementResult(
+                    original_text=text,
+                    enhanced_text=cached["enhancedText"],
+                    provider_used=cached["provider"],
+                    model_used=cached["model"],
+                    processing_time_ms=int((time.time() - start_time) * 1000),
+                    improvements=cached.get("improvements", []),
+                    cached=True
+                )
         
-        # Check provider health periodically
-        await self._periodic_health_check()
-        
-        # Get ordered list of available providers
-        available_providers = self._get_available_providers()
-        
-        if not available_providers:
+        if not self._get_available_providers():
             logger.warning("No available providers for text enhancement")
             return EnhancementResult(
                 original_text=text,
@@ -153,101 +357,377 @@ class AIProviderManager:
                 error="No available providers"
             )
         
-        # Try cached provider first if available
-        if self.cached_provider and self.cached_provider in available_providers:
+        # A vision request covers the whole image, so it is never chunked
+        if image_data:
+            chunks = [(text, "")]
+        else:
+            chunks = split_text_into_chunks(text, settings.AI_ENHANCEMENT_CHUNK_TOKENS)
+        if len(chunks) > 1:
+            logger.info(f"Enhancing text in {len(chunks)} chunks")
+        
+        outcomes = await asyncio.gather(*[
+            self._enhance_chunk(
+                chunk, document_type, image_data, target_language,
+                ChunkStream(on_delta, index, len(chunks), separator) if on_delta else None
+            )
+            for index, (chunk, separator) in enumerate(chunks)
+        ])
+        
+        enhanced_text = "".join(
+            outcome.text + separator for outcome, (_, separator) in zip(outcomes, chunks)
+        ).strip()
+        processing_time = int((time.time() - start_time) * 1000)
+        
+        succeeded = [outcome for outcome in outcomes if outcome.provider]
+        failed = [outcome for outcome in outcomes if outcome.provider is None and outcome.error]
+        fallback_occurred = any(outcome.fallback_occurred for outcome in outcomes)
+        
+        if not succeeded:
+            # All providers failed - return original text
+            last_error = failed[-1].error if failed else None
+            logger.error(f"All providers failed for text enhancement. Last error: {last_error}")
+            return EnhancementResult(
+                original_text=text,
+                enhanced_text=text,  # Return original text as fallback
+                provider_used="none",
+                model_used="none",
+                processing_time_ms=processing_time,
+                fallback_occurred=True,
+                error=f"All providers failed. Last error: {last_error}"
+            )
+        
+        providers_used = list(dict.fromkeys(outcome.provider for outcome in succeeded))
+        models_used = list(dict.fromkeys(outcome.model for outcome in succeeded))
+        error = None
+        if failed:
+            error = f"{len(failed)} of {len(chunks)} chunks kept original text. Last error: {failed[-1].error}"
+            logger.warning(f"Partial text enhancement: {error}")
+        
+        logger.info(f"Text enhancement successful with {', '.join(providers_used)} in {processing_time}ms")
+        
+        result = EnhancementResult(
+            original_text=text,
+            enhanced_text=enhanced_text,
+            provider_used=",".join(providers_used),
+            model_used=",".join(models_used),
+            processing_time_ms=processing_time,
+            improvements=self._detect_improvements(text, enhanced_text),
+            fallback_occurred=fallback_occurred or bool(failed),
+            error=error
+        )
+        
+        # Only complete enhancements are cached; partial ones are retried next time
+        if cache_key and not failed:
+            await loop.run_in_executor(None, self.enhancement_cache.set, cache_key, {
+                "enhancedText": result.enhanced_text,
+                "provider": result.provider_used,
+                "model": result.model_used,
+                "improvements": result.improvements
+            })
+        
+        return result
+    
+    def _enhancement_cache_key(
+        self,
+        text: str,
+        document_type: str,
+        image_data: Optional[bytes],
+        target_language: str
+    ) -> str:
+        """
+        Build the enhancement cache key
+        
+        The text is normalized (NFC, line endings, trailing/repeated spaces)
+        so trivially different OCR output of the same document still hits.
+        The image hash is only part of the key when a vision provider would
+        actually receive the image.
+        """
+        normalized = unicodedata.normalize("NFC", text).replace("\r\n", "\n").replace("\r", "\n")
+        normalized = re.sub(r"[ \t]+", " ", normalized)
+        normalized = re.sub(r" ?\n ?", "\n", normalized).strip()
+        
+        image_hash = ""
+        if image_data and any(
+            self.providers[name].supports_vision() for name in self._get_available_providers()
+        ):
+            image_hash = hashlib.sha256(image_data).hexdigest()
+        
+        key_material = "\0".join([
+            str(PROMPT_VERSION), document_type, target_language, image_hash, normalized
+        ])
+        return hashlib.sha256(key_material.encode("utf-8")).hexdigest()
+    
+    async def _enhance_chunk(
+        self,
+        text: str,
+        document_type: str,
+        image_data: Optional[bytes],
+        target_language: str,
+        stream: Optional[ChunkStream] = None
+    ) -> ChunkOutcome:
+        """
+        Enhance one chunk, falling back through providers in order
+        
+        Providers are ordered by AI_ROUTING_POLICY: "priority" keeps the
+        configured order with the last successful provider first,
+        "adaptive" ranks them by learned latency, error rate and load.
+        
+        With AI_HEDGING_ENABLED, if the provider in flight has not answered
+        within its AI_HEDGING_PERCENTILE latency, the same request is also
+        sent to the next provider. The first valid answer wins and the
+        other request is cancelled.
+        
+        With a ``stream``, text is forwarded as it is generated; a request
+        that fails partway is reset on the stream before falling back.
+        
+        Returns:
+            ChunkOutcome; on failure of every provider it carries the original text
+        """
+        if not text.strip():
+            if stream:
+                stream.finish(None, text)
+            return ChunkOutcome(text=text)
+        
+        # Get ordered list of available providers
+        available_providers = self._get_available_providers()
+        
+        if settings.AI_ROUTING_POLICY == "adaptive":
+            available_providers = self.router.order([
+                (name, self._request_model(name, image_data)) for name in available_providers
+            ])
+        elif self.cached_provider and self.cached_provider in available_providers:
+            # Try cached provider first if available
             available_providers.remove(self.cached_provider)
             available_providers.insert(0, self.cached_provider)
         
-        last_error = None
+        last_error = "No available providers"
         fallback_occurred = False
+        next_index = 0
+        # In-flight request task -> (provider name, fired as hedge)
+        pending: Dict[asyncio.Task, Tuple[str, bool]] = {}
+        
+        def launch(hedge: bool):
+            nonlocal next_index
+            provider_name = available_providers[next_index]
+            next_index += 1
+            task = asyncio.ensure_future(self._call_provider(
+                provider_name, text, document_type, image_data, target_language,
+                partial(stream.delta, provider_name) if stream else None
+            ))
+            pending[task] = (provider_name, hedge)
+            if hedge:
+                self.provider_statuses[provider_name].hedges_fired += 1
+                logger.info(f"Hedging slow request with {provider_name}")
         
-        for provider_name in available_providers:
-            try:
-                provider = self.providers[provider_name]
-                logger.info(f"Attempting text enhancement with {provider_name}")
-                
-                # Create enhancement prompt with language support
-                prompt = self._create_enhancement_prompt(text, document_type, target_language)
-                messages = [{"role": "user", "content": prompt}]
+        try:
+            while pending or next_index < len(available_providers):
+                if not pending:
+                    launch(hedge=False)
                 
-                # Use vision if available and image provided
-                if image_data and provider.supports_vision():
-                    logger.debug(f"Using vision enhancement with {provider_name}")
-                    vision_prompt = self._create_vision_prompt(target_language)
-                    enhanced_text = await provider.vision_completion(
-                        vision_prompt,
-                        image_data
-                    )
-                else:
-                    enhanced_text = await provider.chat_completion(messages)
+                timeout = None
+                if settings.AI_HEDGING_ENABLED and len(pending) == 1 and next_index < len(available_providers):
+                    in_flight_provider = next(iter(pending.values()))[0]
+                    timeout = self._hedge_delay(in_flight_provider)
                 
-                # Validate response
-                if not enhanced_text or len(enhanced_text.strip()) == 0:
-                    raise ProviderException("Empty response from provider")
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    launch(hedge=True)
+                    continue
                 
-                # For Vietnamese, validate that tone marks were added
-                if target_language == "vi":
-                    # Check if enhanced text has Vietnamese tone marks
-                    vietnamese_chars = set('àáảãạăằắẳẵặâầấẩẫậèéẻẽẹêềếểễệìíỉĩịòóỏõọôồốổỗộơờớởỡợùúủũụưừứửữựỳýỷỹỵđ')
-                    has_tones = any(c in vietnamese_chars for c in enhanced_text.lower())
-                    
-                    if not has_tones and len(enhanced_text) > 20:
-                        # Text is long enough but has no tones - might be a problem
-                        logger.warning(f"Provider {provider_name} returned Vietnamese text without tone marks, trying next provider")
-                        last_error = "No Vietnamese tone marks detected"
+                for task in done:
+                    provider_name, hedge = pending.pop(task)
+                    try:
+                        enhanced_text = task.result()
+                    except Exception as e:
+                        last_error = self._handle_provider_failure(provider_name, e)
                         fallback_occurred = True
+                        if stream:
+                            stream.failed(provider_name)
                         continue
+                    
+                    # Success - cache this provider
+                    self.cached_provider = provider_name
+                    if hedge:
+                        self.provider_statuses[provider_name].hedges_won += 1
+                    if stream:
+                        stream.finish(provider_name, enhanced_text)
+                    return ChunkOutcome(
+                        text=enhanced_text.strip(),
+                        provider=provider_name,
+                        model=self.providers[provider_name].model,
+                        fallback_occurred=fallback_occurred or hedge
+                    )
+        finally:
+            # Cancel the losing request of a hedged pair
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+        
+        if stream:
+            stream.finish(None, text)
+        return ChunkOutcome(text=text, fallback_occurred=True, error=last_error)
+    
+    def _handle_provider_failure(self, provider_name: str, error: Exception) -> str:
+        """
+        Record a failed provider request in the provider status
+        
+        Returns:
+            Error message
+        """
+        if isinstance(error, QuotaExceededException):
+            logger.warning(f"Provider {provider_name} quota exceeded: {error}")
+            self._mark_provider_quota_exceeded(provider_name, str(error))
+        elif isinstance(error, RateLimitException):
+            logger.warning(f"Provider {provider_name} rate limited: {error}")
+            self._mark_provider_rate_limited(provider_name, str(error), error.retry_after)
+        elif isinstance(error, ToneMarksMissingError):
+            logger.warning(f"Provider {provider_name} returned Vietnamese text without tone marks, trying next provider")
+        else:
+            logger.error(f"Provider {provider_name} failed: {error}")
+            self._mark_provider_error(provider_name, str(error))
+        return str(error)
+    
+    def _hedge_delay(self, provider_name: str) -> float:
+        """Seconds to wait for a provider before hedging, from its observed latency"""
+        samples = self._latency_samples.get(provider_name)
+        if not samples or len(samples) < HEDGE_MIN_SAMPLES:
+            return settings.AI_HEDGING_DEFAULT_DELAY
+        ordered = sorted(samples)
+        index = min(len(ordered) - 1, int(len(ordered) * settings.AI_HEDGING_PERCENTILE / 100))
+        return ordered[index]
+    
+    async def _call_provider(
+        self,
+        provider_name: str,
+        text: str,
+        document_type: str,
+        image_data: Optional[bytes],
+        target_language: str,
+        on_delta: Optional[Callable[[str], None]] = None
+    ) -> str:
+        """
+        Send one enhancement request to a provider and validate the answer
+        
+        Concurrent requests to the same provider are capped by
+        AI_PROVIDER_MAX_CONCURRENCY and paced by its rate limiter. A 429
+        whose Retry-After is within AI_RATE_LIMIT_MAX_WAIT is waited out
+        and retried once instead of failing over. With ``on_delta`` a text
+        request is streamed and each delta is passed to it.
+        
+        Returns:
+            Enhanced text
+            
+        Raises:
+            ProviderException and subclasses: On provider errors or an empty answer
+            ToneMarksMissingError: If Vietnamese output lacks tone marks
+        """
+        provider = self.providers[provider_name]
+        limiter = self.rate_limiters.get(provider_name)
+        use_vision = bool(image_data) and provider.supports_vision()
+        if use_vision:
+            prompt = self._create_vision_prompt(target_language)
+        else:
+            # Create enhancement prompt with language support
+            prompt = self._create_enhancement_prompt(text, document_type, target_language)
+        # Prompt plus an answer about as long as the OCR text
+        estimated_tokens = (len(prompt) + len(text)) // CHARS_PER_TOKEN + 1
+        if use_vision:
+            estimated_tokens += VISION_IMAGE_TOKENS
+        
+        if use_vision:
+            # Downscale/re-encode once per image and size (cached), off the event loop
+            prepared_image = await asyncio.get_event_loop().run_in_executor(
+                None, vision_image_preparer.prepare, image_data, vision_image_preparer.max_side_for(provider_name)
+            )
+        
+        model = self._request_model(provider_name, image_data)
+        self.router.request_started(provider_name, model)
+        try:
+            for attempt in range(RATE_LIMIT_RETRIES + 1):
+                if limiter:
+                    # Short waits queue here; long ones raise RateLimitException to fail over
+                    await limiter.acquire(estimated_tokens, settings.AI_RATE_LIMIT_MAX_WAIT)
                 
-                # Success - cache this provider
-                self.cached_provider = provider_name
-                processing_time = int((time.time() - start_time) * 1000)
-                
-                logger.info(f"Text enhancement successful with {provider_name} in {processing_time}ms")
-                
-                return EnhancementResult(
-                    original_text=text,
-                    enhanced_text=enhanced_text.strip(),
-                    provider_used=provider_name,
-                    model_used=provider.model,
-                    processing_time_ms=processing_time,
-                    improvements=self._detect_improvements(text, enhanced_text),
-                    fallback_occurred=fallback_occurred
-                )
-                
-            except QuotaExceededException as e:
-                logger.warning(f"Provider {provider_name} quota exceeded: {e}")
-                self._mark_provider_quota_exceeded(provider_name, str(e))
-                last_error = str(e)
-                fallback_occurred = True
-                continue
+                try:
+                    async with self._get_provider_semaphore(provider_name):
+                        logger.info(f"Attempting text enhancement with {provider_name}")
+                        request_start = time.monotonic()
+                        
+                        # Use vision if available and image provided
+                        if use_vision:
+                            logger.debug(f"Using vision enhancement with {provider_name}")
+                            enhanced_text = await provider.vision_completion(prompt, prepared_image.data)
+                        elif on_delta:
+                            messages = [{"role": "user", "content": prompt}]
+                            pieces = []
+                            async for delta in provider.stream_chat_completion(messages):
+                                pieces.append(delta)
+                                on_delta(delta)
+                            enhanced_text = "".join(pieces)
+                        else:
+                            messages = [{"role": "user", "content": prompt}]
+                            enhanced_text = await provider.chat_completion(messages)
+                        
+                        latency = time.monotonic() - request_start
+                        self._latency_samples.setdefault(
+                            provider_name, deque(maxlen=LATENCY_SAMPLE_SIZE)
+                        ).append(latency)
+                except RateLimitException as e:
+                    if limiter and e.retry_after is not None:
+                        limiter.block_for(e.retry_after)
+                        if attempt < RATE_LIMIT_RETRIES and e.retry_after <= settings.AI_RATE_LIMIT_MAX_WAIT:
+                            logger.info(f"Provider {provider_name} asked to retry in {e.retry_after:.1f}s, waiting")
+                            continue
+                    raise
                 
-            except RateLimitException as e:
-                logger.warning(f"Provider {provider_name} rate limited: {e}")
-                self._mark_provider_rate_limited(provider_name, str(e))
-                last_error = str(e)
-                fallback_occurred = True
-                continue
+                # Pause before the provider starts rejecting us
+                if limiter and provider.rate_limit_reset:
+                    limiter.block_for(provider.rate_limit_reset)
+                self.provider_statuses[provider_name].rate_limit_remaining = provider.rate_limit_remaining
+                break
+            
+            # Validate response
+            if not enhanced_text or len(enhanced_text.strip()) == 0:
+                raise ProviderException("Empty response from provider")
+            
+            # For Vietnamese, validate that tone marks were added
+            if target_language == "vi":
+                # Check if enhanced text has Vietnamese tone marks
+                has_tones = detect_vietnamese_script(enhanced_text).has_vietnamese
                 
-            except Exception as e:
-                logger.error(f"Provider {provider_name} failed: {e}")
-                self._mark_provider_error(provider_name, str(e))
-                last_error = str(e)
-                fallback_occurred = True
-                continue
-        
-        # All providers failed - return original text
-        processing_time = int((time.time() - start_time) * 1000)
-        logger.error(f"All providers failed for text enhancement. Last error: {last_error}")
-        
-        return EnhancementResult(
-            original_text=text,
-            enhanced_text=text,  # Return original text as fallback
-            provider_used="none",
-            model_used="none",
-            processing_time_ms=processing_time,
-            fallback_occurred=True,
-            error=f"All providers failed. Last error: {last_error}"
-        )
+                if not has_tones and len(enhanced_text) > 20:
+                    # Text is long enough but has no tones - might be a problem
+                    raise ToneMarksMissingError("No Vietnamese tone marks detected")
+        
+        except (QuotaExceededException, RateLimitException):
+            # Handled by cooldowns, not a sign of a slow or broken provider
+            raise
+        except Exception:
+            self.router.record_failure(provider_name, model)
+            raise
+        finally:
+            self.router.request_finished(provider_name, model)
+        
+        ewma_latency = self.router.record_success(provider_name, model, latency)
+        self.circuit_breakers[provider_name].record_success()
+        self.provider_statuses[provider_name].response_time_ms = int(ewma_latency * 1000)
+        return enhanced_text
+    
+    def _request_model(self, provider_name: str, image_data: Optional[bytes]) -> str:
+        """Model a provider will use for a request (vision model when an image is sent)"""
+        provider = self.providers[provider_name]
+        if image_data and provider.supports_vision():
+            return provider.vision_model or provider.model
+        return provider.model
+    
+    def _get_provider_semaphore(self, provider_name: str) -> asyncio.Semaphore:
+        """Get the semaphore capping concurrent requests to a provider"""
+        semaphore = self._provider_semaphores.get(provider_name)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(max(1, settings.AI_PROVIDER_MAX_CONCURRENCY))
+            self._provider_semaphores[provider_name] = semaphore
+        return semaphore
     
     def _create_enhancement_prompt(self, text: str, document_type: str, target_language: str = "auto") -> str:
         """
@@ -368,6 +848,7 @@ Return ONLY the corrected text."""
             List of available provider names
         """
         available = []
+        self.restore_expired_cooldowns()
         
         for config in self.provider_configs:
             if config.name in self.provider_statuses:
@@ -391,84 +872,90 @@ Return ONLY the corrected text."""
             
             logger.warning(f"Provider {provider_name} marked as quota exceeded")
     
-    def _mark_provider_rate_limited(self, provider_name: str, error_msg: str):
-        """Mark provider as rate limited"""
+    def _mark_provider_rate_limited(self, provider_name: str, error_msg: str, retry_after: Optional[float] = None):
+        """Mark provider as rate limited until the provider-reported (or default) reset"""
         if provider_name in self.provider_statuses:
             status = self.provider_statuses[provider_name]
             status.available = False
             status.unavailable_reason = "rate_limit"
             status.error_message = error_msg
             status.last_check = datetime.now()
-            # Set shorter cooldown for rate limits (1 hour)
-            status.quota_reset_time = datetime.now() + timedelta(hours=1)
+            if retry_after is None:
+                retry_after = settings.AI_RATE_LIMIT_DEFAULT_COOLDOWN
+            status.quota_reset_time = datetime.now() + timedelta(seconds=retry_after)
             
-            logger.warning(f"Provider {provider_name} marked as rate limited")
+            logger.warning(f"Provider {provider_name} marked as rate limited for {retry_after:.1f}s")
     
     def _mark_provider_error(self, provider_name: str, error_msg: str):
-        """Mark provider as having an error"""
+        """Record a provider error; enough consecutive errors open its circuit"""
         if provider_name in self.provider_statuses:
             status = self.provider_statuses[provider_name]
-            status.available = False
-            status.unavailable_reason = "api_error"
             status.error_message = error_msg
             status.last_check = datetime.now()
             
-            logger.error(f"Provider {provider_name} marked as error: {error_msg}")
+            breaker = self.circuit_breakers.get(provider_name)
+            if breaker is None or breaker.record_failure():
+                status.available = False
+                status.unavailable_reason = "circuit_open"
+                logger.error(f"Provider {provider_name} circuit opened: {error_msg}")
     
-    async def _periodic_health_check(self):
-        """Perform periodic health checks on providers"""
+    def restore_expired_cooldowns(self):
+        """Put providers whose quota or rate-limit cooldown has passed back into rotation"""
         now = datetime.now()
+        for provider_name, status in self.provider_statuses.items():
+            if (
+                not status.available
+                and status.unavailable_reason in ("quota_exceeded", "rate_limit")
+                and status.quota_reset_time
+                and now >= status.quota_reset_time
+            ):
+                logger.info(f"Retrying provider {provider_name} after cooldown")
+                status.available = True
+                status.quota_exceeded = False
+                status.unavailable_reason = None
+                status.quota_reset_time = None
+    
+    def record_health_probe(self, provider_name: str, healthy: bool, response_time_ms: int):
+        """
+        Apply a background health probe result to the provider status
         
-        # Check every 5 minutes
-        if now - self.last_health_check < timedelta(minutes=5):
-            return
-        
-        logger.debug("Performing periodic provider health check")
-        
-        for provider_name, provider in self.providers.items():
-            try:
-                # Check if provider should be retried (quota reset time passed)
-                status = self.provider_statuses.get(provider_name)
-                if status and not status.available and status.quota_reset_time:
-                    if now >= status.quota_reset_time:
-                        logger.info(f"Retrying provider {provider_name} after cooldown")
-                        status.available = True
-                        status.quota_exceeded = False
-                        status.unavailable_reason = None
-                        status.quota_reset_time = None
-                
-                # Perform health check
-                if status and status.available:
-                    start_time = time.time()
-                    is_healthy = await provider.check_health()
-                    response_time = int((time.time() - start_time) * 1000)
-                    
-                    status.last_check = now
-                    status.response_time_ms = response_time
-                    
-                    if not is_healthy and status.available:
-                        logger.warning(f"Provider {provider_name} failed health check")
-                        status.available = False
-                        status.unavailable_reason = "health_check_failed"
-                    elif is_healthy and not status.available and not status.quota_exceeded:
-                        logger.info(f"Provider {provider_name} recovered")
-                        status.available = True
-                        status.unavailable_reason = None
-                        status.error_message = None
-                        
-            except Exception as e:
-                logger.error(f"Health check failed for {provider_name}: {e}")
-        
-        self.last_health_check = now
+        Args:
+            provider_name: Provider name
+            healthy: Whether the probe succeeded
+            response_time_ms: Probe round-trip time
+        """
+        status = self.provider_statuses[provider_name]
+        breaker = self.circuit_breakers[provider_name]
+        status.last_check = datetime.now()
+        
+        if healthy:
+            breaker.record_success()
+            if not status.available and not status.quota_exceeded:
+                logger.info(f"Provider {provider_name} recovered ({response_time_ms}ms)")
+                status.available = True
+                status.unavailable_reason = None
+                status.error_message = None
+        elif breaker.record_failure() or breaker.state == CircuitState.OPEN:
+            logger.warning(f"Provider {provider_name} failed health check, circuit open")
+            status.available = False
+            status.unavailable_reason = "circuit_open"
+    
+    async def start(self):
+        """Start background health monitoring (called from the app lifespan)"""
+        self.health_monitor.start()
     
     async def get_provider_status(self) -> Dict[str, ProviderStatus]:
         """
         Get health status of all providers
         
+        Statuses are kept current by the background health monitor, so this
+        never waits on provider round-trips.
+        
         Returns:
             Dict mapping provider name to status
         """
-        await self._periodic_health_check()
+        for provider_name, breaker in self.circuit_breakers.items():
+            self.provider_statuses[provider_name].circuit_state = breaker.state.value
         return self.provider_statuses.copy()
     
     def get_active_provider(self) -> Optional[str]:
@@ -481,12 +968,35 @@ Return ONLY the corrected text."""
         return self.cached_provider
     
     async def close(self):
-        """Close all provider connections"""
+        """Stop health monitoring and close all provider connections"""
+        await self.health_monitor.stop()
         for provider in self.providers.values():
             if hasattr(provider, 'close'):
                 await provider.close()
+        await close_shared_transport()
         logger.info("Closed all provider connections")
 
 
-# Global provider manager instance
-provider_manager = AIProviderManager()
\ No newline at end of file
+# Process-wide provider manager, created on first use
+_provider_manager: Optional[AIProviderManager] = None
+
+
+def get_provider_manager() -> AIProviderManager:
+    """
+    Get the shared AI provider manager, creating it on first use
+    
+    Returns:
+        The process-wide AIProviderManager
+    """
+    global _provider_manager
+    if _provider_manager is None:
+        _provider_manager = AIProviderManager()
+    return _provider_manager
+
+
+async def close_provider_manager():
+    """Close the shared manager, if it was created (called from the app lifespan)"""
+    global _provider_manager
+    if _provider_manager is not None:
+        await _provider_manager.close()
+        _provider_manager = None
\ No newline at end of file
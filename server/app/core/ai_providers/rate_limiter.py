@@ -0,0 +1,224 @@
+"""
+Client-side rate limiting for AI providers
+Token buckets for requests and tokens per minute, plus parsing of the
+rate-limit hints providers send back (Retry-After, x-ratelimit-*)
+"""
+import asyncio
+import logging
+import re
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+from app.core.ai_providers.base_provider import RateLimitException
+
+logger = logging.getLogger(__name__)
+
+# Durations such as "2m59.56s", "7.66s", "120ms" or "1h2m"
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_UNITS = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+
+
+def parse_duration(value: str) -> Optional[float]:
+    """
+    Parse a provider duration string into seconds
+
+    Args:
+        value: Plain seconds ("12", "1.5") or unit form ("2m59.56s", "120ms")
+
+    Returns:
+        Seconds or None if the value cannot be parsed
+    """
+    value = value.strip().lower()
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    total = 0.0
+    position = 0
+    for match in _DURATION_PART.finditer(value):
+        if match.start() != position:
+            return None
+        total += float(match.group(1)) * _DURATION_UNITS[match.group(2)]
+        position = match.end()
+    return total if position == len(value) else None
+
+
+def parse_retry_after(headers: Mapping[str, str]) -> Optional[float]:
+    """
+    Get the wait a provider asks for from its response headers
+
+    ``Retry-After`` (seconds or HTTP date) wins. Otherwise the
+    ``x-ratelimit-reset-*`` header of whichever budget is exhausted is used.
+
+    Args:
+        headers: Response headers (case-insensitive mapping)
+
+    Returns:
+        Seconds to wait or None if the headers do not say
+    """
+    retry_after = headers.get("retry-after")
+    if retry_after:
+        seconds = parse_duration(retry_after)
+        if seconds is not None:
+            return seconds
+        try:
+            reset_at = parsedate_to_datetime(retry_after)
+            return max(0.0, (reset_at - datetime.now(timezone.utc)).total_seconds())
+        except (TypeError, ValueError):
+            pass
+
+    waits = []
+    for budget in ("requests", "tokens"):
+        remaining = headers.get(f"x-ratelimit-remaining-{budget}")
+        reset = headers.get(f"x-ratelimit-reset-{budget}")
+        if reset and remaining is not None and remaining.strip() == "0":
+            seconds = parse_duration(reset)
+            if seconds is not None:
+                waits.append(seconds)
+    return max(waits) if waits else None
+
+
+def parse_gemini_retry_delay(error_data: Dict[str, Any]) -> Optional[float]:
+    """
+    Get the retry delay from a Gemini error body (google.rpc.RetryInfo)
+
+    Args:
+        error_data: Parsed JSON error response
+
+    Returns:
+        Seconds to wait or None if not present
+    """
+    details = error_data.get("error", {}).get("details", [])
+    for detail in details if isinstance(details, list) else []:
+        if isinstance(detail, dict) and detail.get("@type", "").endswith("RetryInfo"):
+            return parse_duration(str(detail.get("retryDelay", "")))
+    return None
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at ``per_minute`` tokens per minute
+
+    The bucket holds at most one minute of budget. Reservations may drive
+    the level negative; the deficit is the time later callers must wait.
+    """
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until ``amount`` tokens are available"""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        return max(0.0, (amount - self.level) / self.rate)
+
+    def reserve(self, amount: float, now: float):
+        """Take ``amount`` tokens (the level may go negative)"""
+        self._refill(now)
+        self.level -= min(amount, self.capacity)
+
+
+class ProviderRateLimiter:
+    """
+    Paces requests to one provider by requests and tokens per minute
+
+    Also honours cooldowns reported by the provider (Retry-After).
+    Callers wait when the wait is short and get a RateLimitException
+    carrying the wait otherwise, so they can fail over.
+    """
+
+    def __init__(self, name: str, requests_per_minute: Optional[int] = None, tokens_per_minute: Optional[int] = None):
+        """
+        Initialize rate limiter
+
+        Args:
+            name: Provider name (for messages)
+            requests_per_minute: Request budget (None for unlimited)
+            tokens_per_minute: Token budget (None for unlimited)
+        """
+        self.name = name
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.blocked_until = 0.0
+
+    def block_for(self, seconds: float):
+        """Hold all requests for ``seconds`` (provider-reported cooldown)"""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+    def wait_time(self, tokens: int = 0) -> float:
+        """Seconds until a request of ``tokens`` tokens may be sent"""
+        now = time.monotonic()
+        wait = max(0.0, self.blocked_until - now)
+        if self.requests:
+            wait = max(wait, self.requests.wait_time(1, now))
+        if self.tokens and tokens:
+            wait = max(wait, self.tokens.wait_time(tokens, now))
+        return wait
+
+    async def acquire(self, tokens: int, max_wait: float):
+        """
+        Reserve budget for one request, waiting up to ``max_wait`` seconds
+
+        Args:
+            tokens: Estimated tokens of the request (prompt and answer)
+            max_wait: Longest acceptable wait in seconds
+
+        Raises:
+            RateLimitException: If the budget frees up later than ``max_wait``
+        """
+        wait = self.wait_time(tokens)
+        if wait > max_wait:
+            raise RateLimitException(
+                f"{self.name} client-side rate limit, next slot in {wait:.1f}s",
+                retry_after=wait
+            )
+
+        # Reserve before sleeping so concurrent callers queue behind us
+        now = time.monotonic()
+        if self.requests:
+            self.requests.reserve(1, now)
+        if self.tokens and tokens:
+            self.tokens.reserve(tokens, now)
+
+        if wait > 0:
+            logger.debug(f"Waiting {wait:.2f}s for {self.name} rate limit")
+            await asyncio.sleep(wait)
+
+
+def parse_rate_limits(spec: str) -> Dict[str, Tuple[Optional[int], Optional[int]]]:
+    """
+    Parse a rate limit setting such as ``groq:30/6000,gemini:15``
+
+    Args:
+        spec: Comma-separated ``name:requests_per_minute[/tokens_per_minute]``
+
+    Returns:
+        Dict mapping provider name to (requests per minute, tokens per minute)
+    """
+    limits: Dict[str, Tuple[Optional[int], Optional[int]]] = {}
+    for pair in spec.split(","):
+        pair = pair.strip()
+        if not pair:
+            continue
+        try:
+            name, _, values = pair.partition(":")
+            rpm, _, tpm = values.partition("/")
+            limits[name.strip()] = (
+                int(rpm) if rpm.strip() else None,
+                int(tpm) if tpm.strip() else None
+            )
+        except ValueError:
+            logger.error(f"Invalid provider rate limit '{pair}', ignoring")
+    return limits
@@ -0,0 +1,153 @@
+"""
+Adaptive provider routing
+Orders providers by expected completion time learned from live traffic
+"""
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Ceiling on the error rate used in scoring, so a failing provider is
+# penalised heavily but its score stays finite
+MAX_ERROR_RATE = 0.95
+
+
+@dataclass
+class RouteStats:
+    """EWMA statistics for one provider/model pair"""
+    latency: Optional[float] = None  # Seconds, EWMA of successful requests
+    error_rate: float = 0.0  # EWMA of failures (1) and successes (0)
+    requests: int = 0
+    in_flight: int = 0
+    last_used: float = field(default_factory=time.monotonic)  # Last request start (or first seen)
+
+
+class AdaptiveRouter:
+    """
+    Keeps per provider/model latency and error statistics and ranks providers
+
+    A provider's score is its expected time to a good answer: EWMA latency,
+    scaled up by the load it already carries and divided by its success
+    rate, then weighted by its configured priority rank. Lower is better.
+    A provider that has not been used for ``probe_interval`` seconds (or
+    since it was first seen) is tried first once, so a recovered slow
+    provider, or one with no samples yet, can win traffic.
+    """
+
+    def __init__(
+        self,
+        alpha: float = 0.2,
+        priority_weight: float = 0.25,
+        default_latency: float = 5.0,
+        probe_interval: float = 300.0,
+        concurrency: int = 4
+    ):
+        """
+        Initialize router
+
+        Args:
+            alpha: EWMA smoothing factor (weight of the newest sample)
+            priority_weight: Score penalty per priority rank (0.25 = +25% per rank)
+            default_latency: Assumed latency in seconds before any sample exists
+            probe_interval: Seconds of disuse after which a provider is re-probed
+            concurrency: Per-provider concurrency, used to estimate queueing
+        """
+        self.alpha = alpha
+        self.priority_weight = priority_weight
+        self.default_latency = default_latency
+        self.probe_interval = probe_interval
+        self.concurrency = max(1, concurrency)
+        self._stats: Dict[Tuple[str, str], RouteStats] = {}
+
+    def _get(self, provider: str, model: str) -> RouteStats:
+        key = (provider, model)
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = RouteStats()
+            self._stats[key] = stats
+        return stats
+
+    def request_started(self, provider: str, model: str):
+        """Count a request as in flight"""
+        stats = self._get(provider, model)
+        stats.in_flight += 1
+        stats.last_used = time.monotonic()
+
+    def request_finished(self, provider: str, model: str):
+        """Count a request as no longer in flight"""
+        stats = self._get(provider, model)
+        stats.in_flight = max(0, stats.in_flight - 1)
+
+    def record_success(self, provider: str, model: str, latency: float) -> float:
+        """
+        Record a successful request
+
+        Returns:
+            Updated EWMA latency in seconds
+        """
+        stats = self._get(provider, model)
+        stats.requests += 1
+        if stats.latency is None:
+            stats.latency = latency
+        else:
+            stats.latency += self.alpha * (latency - stats.latency)
+        stats.error_rate -= self.alpha * stats.error_rate
+        return stats.latency
+
+    def record_failure(self, provider: str, model: str):
+        """Record a failed request"""
+        stats = self._get(provider, model)
+        stats.requests += 1
+        stats.error_rate += self.alpha * (1.0 - stats.error_rate)
+
+    def score(self, provider: str, model: str, rank: int) -> float:
+        """Expected seconds to a good answer, weighted by priority rank"""
+        stats = self._get(provider, model)
+        latency = stats.latency if stats.latency is not None else self.default_latency
+        expected = latency * (1 + stats.in_flight / self.concurrency)
+        expected /= 1.0 - min(stats.error_rate, MAX_ERROR_RATE)
+        return expected * (1 + self.priority_weight * rank)
+
+    def order(self, candidates: Sequence[Tuple[str, str]]) -> List[str]:
+        """
+        Rank providers for one request
+
+        Args:
+            candidates: (provider, model) pairs in priority order
+
+        Returns:
+            Provider names, best first
+        """
+        now = time.monotonic()
+        ranked = sorted(
+            range(len(candidates)),
+            key=lambda rank: self.score(*candidates[rank], rank)
+        )
+        names = [candidates[rank][0] for rank in ranked]
+
+        # Re-probe one provider that gets no traffic to learn if it got faster
+        for rank in ranked[1:]:
+            stats = self._get(*candidates[rank])
+            if now - stats.last_used >= self.probe_interval:
+                name = candidates[rank][0]
+                logger.debug(f"Re-probing provider {name}")
+                names.remove(name)
+                names.insert(0, name)
+                stats.last_used = now
+                break
+
+        return names
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Routing statistics keyed by "provider/model" """
+        return {
+            f"{provider}/{model}": {
+                "latencyMs": int(stats.latency * 1000) if stats.latency is not None else None,
+                "errorRate": round(stats.error_rate, 3),
+                "requests": stats.requests,
+                "inFlight": stats.in_flight
+            }
+            for (provider, model), stats in self._stats.items()
+        }
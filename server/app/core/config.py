@@ -2,7 +2,7 @@
 Configuration settings
 """
 from pathlib import Path
-from typing import List
+from typing import List, Optional
 from pydantic import Field
 from pydantic_settings import BaseSettings
 
@@ -14,22 +14,57 @@ class Settings(BaseSettings):
     PORT: int = Field(default=8000, description="Port to bind to")
     CORS_ORIGINS: str = Field(default="http://localhost:5173", description="CORS origins (comma-separated)")
     
+    # Response settings
+    RESPONSE_COMPRESSION_ENABLED: bool = Field(default=True, description="Compress responses with brotli/gzip per Accept-Encoding")
+    RESPONSE_COMPRESSION_MIN_SIZE: int = Field(default=1024, description="Minimum response size in bytes to compress")
+    RESPONSE_GZIP_LEVEL: int = Field(default=6, description="gzip compression level (1-9)")
+    RESPONSE_BROTLI_QUALITY: int = Field(default=4, description="brotli compression quality (0-11)")
+    
     # Storage settings
     STORAGE_DIR: Path = Field(default=Path("./storage"), description="Storage directory")
+    CACHE_DIR: Path = Field(default=Path("./cache"), description="Directory for persistent caches")
+    
+    # Result cache settings
+    RESULT_CACHE_ENABLED: bool = Field(default=True, description="Reuse OCR results for identical uploads and settings")
+    RESULT_CACHE_MAX_BYTES: int = Field(default=512 * 1024 * 1024, description="Max on-disk size of the OCR result cache (512MB)")
+    
+    # Job scheduling settings
+    JOB_WORKERS: int = Field(default=2, description="Number of jobs processed concurrently")
+    JOB_QUEUE_MAX_SIZE: int = Field(default=50, description="Max queued jobs before new uploads get 429")
+    JOB_ESTIMATED_DURATION: float = Field(default=30.0, description="Initial job duration estimate in seconds for ETAs")
+    JOB_EVENTS_KEEPALIVE: float = Field(default=15.0, description="Seconds between keep-alive comments on job event streams")
+    JOB_EVENTS_POLL_INTERVAL: float = Field(default=1.0, description="Seconds between job store checks on event streams (catches updates from other workers)")
+    JOB_STORE_BACKEND: str = Field(default="memory", description="Job store backend (memory|sqlite)")
+    JOB_STORE_PATH: Optional[Path] = Field(default=None, description="SQLite job database (default: STORAGE_DIR/jobs.db)")
     
     # Parser settings
     DEFAULT_PARSER: str = Field(default="docling", description="Default parser (docling|mineru)")
     DEFAULT_PARSE_METHOD: str = Field(default="auto", description="Default parse method (auto|ocr|txt)")
     DEFAULT_LANG: str = Field(default="auto", description="Default language (auto|vi|en|...)")
     DEFAULT_DEVICE: str = Field(default="cpu", description="Default device (cpu|cuda|mps)")
+    DOCLING_EXECUTION_MODE: str = Field(default="thread", description="Where Docling conversions run (thread|process)")
+    DOCLING_PROCESS_WORKERS: int = Field(default=2, description="Converter worker processes in process mode")
+    DOCLING_SHARD_MIN_PAGES: int = Field(default=20, description="Split PDFs with at least this many pages into shards (process mode with more than one worker)")
+    DOCLING_SHARD_PAGES: int = Field(default=10, description="Pages per conversion shard")
     
     # RAG settings
     ENABLE_RAG: bool = Field(default=False, description="Enable RAG functionality")
+    RAG_WORKING_DIR: Optional[Path] = Field(default=None, description="RAGAnything/LightRAG storage directory (default: STORAGE_DIR/rag)")
+    RAG_INGEST_QUEUE_SIZE: int = Field(default=20, description="Max queued documents before ingest requests get 429")
+    RAG_INGEST_BATCH_SIZE: int = Field(default=8, description="Max small documents combined into one knowledge base insert")
+    RAG_INGEST_BATCH_MAX_CHARS: int = Field(default=200_000, description="Max text characters per insert batch; larger documents are inserted alone")
+    RAG_INGEST_BATCH_WINDOW: float = Field(default=2.0, description="Seconds to wait for more documents before inserting a batch")
+    RAG_QUERY_TIMEOUT: float = Field(default=120.0, description="Deadline in seconds for a RAG query (requests may ask for less)")
     
     # Ollama settings
     OLLAMA_BASE_URL: str = Field(default="http://localhost:11434/api", description="Ollama API base URL")
     OLLAMA_LLM_MODEL: str = Field(default="qwen2.5:7b", description="Ollama LLM model")
     OLLAMA_EMBED_MODEL: str = Field(default="nomic-embed-text", description="Ollama embedding model")
+    OLLAMA_EMBED_DIM: int = Field(default=768, description="Dimension of the Ollama embedding model's vectors")
+    OLLAMA_EMBED_BATCH_SIZE: int = Field(default=64, description="Texts per Ollama /api/embed request")
+    OLLAMA_EMBED_CONCURRENCY: int = Field(default=4, description="Concurrent Ollama embedding requests")
+    OLLAMA_EMBED_CACHE_MAX_BYTES: int = Field(default=256 * 1024 * 1024, description="Max on-disk size of the embedding cache (256MB, 0 disables)")
+    OLLAMA_MAX_CONNECTIONS: int = Field(default=10, description="Pooled HTTP connections to Ollama")
     OLLAMA_VISION_MODEL: str = Field(default="llava:7b", description="Ollama vision model")
     
     # AI Enhancement settings
@@ -38,6 +73,35 @@ class Settings(BaseSettings):
     AI_ENHANCEMENT_MAX_RETRIES: int = Field(default=2, description="Max retries for AI enhancement")
     AI_USE_VISION_WHEN_AVAILABLE: bool = Field(default=True, description="Use vision models when available")
     AI_PROVIDER_PRIORITY: str = Field(default="groq:1,deepseek:2,gemini:3,ollama:4", description="Provider priority (name:priority)")
+    AI_HTTP2_ENABLED: bool = Field(default=True, description="Use HTTP/2 for AI provider requests when the h2 package is installed")
+    AI_HTTP_MAX_CONNECTIONS: int = Field(default=100, description="Max pooled connections shared by all AI providers")
+    AI_HTTP_MAX_KEEPALIVE: int = Field(default=20, description="Max idle keep-alive connections kept in the provider pool")
+    AI_HTTP_KEEPALIVE_EXPIRY: float = Field(default=30.0, description="Seconds an idle provider connection is kept open")
+    AI_HEALTH_CHECK_INTERVAL: float = Field(default=300.0, description="Seconds between background health probes of healthy providers")
+    AI_HEALTH_CHECK_TIMEOUT: float = Field(default=10.0, description="Timeout in seconds of one provider health probe")
+    AI_CIRCUIT_FAILURE_THRESHOLD: int = Field(default=3, description="Consecutive provider errors that open its circuit")
+    AI_CIRCUIT_RESET_TIMEOUT: float = Field(default=60.0, description="Seconds before an open provider circuit is probed again")
+    AI_ROUTING_POLICY: str = Field(default="adaptive", description="Provider ordering policy (priority|adaptive)")
+    AI_ROUTING_EWMA_ALPHA: float = Field(default=0.2, description="Weight of the newest sample in routing latency/error averages")
+    AI_ROUTING_PRIORITY_WEIGHT: float = Field(default=0.25, description="Adaptive routing score penalty per priority rank")
+    AI_ROUTING_PROBE_INTERVAL: float = Field(default=300.0, description="Re-probe a provider unused for this many seconds")
+    AI_PROVIDER_RATE_LIMITS: str = Field(default="groq:30/6000,gemini:15/1000000", description="Client-side rate limits (name:requests_per_minute/tokens_per_minute)")
+    AI_RATE_LIMIT_MAX_WAIT: float = Field(default=5.0, description="Wait up to this many seconds for a rate-limited provider before failing over")
+    AI_RATE_LIMIT_DEFAULT_COOLDOWN: int = Field(default=60, description="Cooldown in seconds after a 429 without a Retry-After hint")
+    AI_PROVIDER_MAX_CONCURRENCY: int = Field(default=4, description="Max concurrent enhancement requests per provider")
+    AI_ENHANCEMENT_CHUNK_TOKENS: int = Field(default=1500, description="Approximate max tokens of OCR text per enhancement request")
+    AI_HEDGING_ENABLED: bool = Field(default=False, description="Send slow enhancement requests to the next provider as well; first answer wins")
+    AI_HEDGING_PERCENTILE: float = Field(default=95.0, description="Hedge once a request exceeds this percentile of the provider's latency")
+    AI_HEDGING_DEFAULT_DELAY: float = Field(default=10.0, description="Hedge delay in seconds until enough latency samples exist")
+    AI_VISION_MAX_SIDES: str = Field(default="groq:1600,gemini:2048,ollama:1024", description="Max image side in pixels per provider for vision requests (name:pixels)")
+    AI_VISION_DEFAULT_MAX_SIDE: int = Field(default=1600, description="Max image side in pixels for providers not listed in AI_VISION_MAX_SIDES")
+    AI_VISION_IMAGE_FORMAT: str = Field(default="jpeg", description="Re-encoding format of vision images (jpeg|webp)")
+    AI_VISION_IMAGE_QUALITY: int = Field(default=85, description="JPEG/WebP quality of re-encoded vision images")
+    AI_VISION_CACHE_MAX_BYTES: int = Field(default=64 * 1024 * 1024, description="Memory budget of prepared vision images (64MB)")
+    AI_ENHANCEMENT_STREAMING: bool = Field(default=True, description="Stream enhanced text to job event subscribers as it is generated")
+    AI_ENHANCEMENT_CACHE_ENABLED: bool = Field(default=True, description="Cache enhancement results for identical text/settings")
+    AI_ENHANCEMENT_CACHE_MAX_BYTES: int = Field(default=128 * 1024 * 1024, description="Max on-disk size of the enhancement cache (128MB)")
+    AI_ENHANCEMENT_CACHE_TTL: int = Field(default=7 * 24 * 3600, description="Enhancement cache entry lifetime in seconds (7 days)")
     
     # Groq settings
     GROQ_API_KEY: str = Field(default="", description="Groq API key")
@@ -61,8 +125,14 @@ class Settings(BaseSettings):
     CUSTOM_PROMPTS_PATH: str = Field(default="./prompts", description="Path to custom prompt templates")
     DEFAULT_DOCUMENT_TYPE: str = Field(default="general", description="Default document type for prompts")
     
+    # Vietnamese processing settings
+    VIETNAMESE_DICTIONARY_PATH: Optional[Path] = Field(default=None, description="Tone restoration phrase list, accented phrase<TAB>frequency per line (default: bundled app/data/vietnamese_phrases.tsv)")
+    
     # File constraints
     MAX_FILE_SIZE: int = Field(default=15 * 1024 * 1024, description="Max file size in bytes (15MB)")
+    MAX_BATCH_FILES: int = Field(default=50, description="Max files per batch extraction (also limited by the job queue size)")
+    MAX_BATCH_UPLOAD_SIZE: int = Field(default=200 * 1024 * 1024, description="Max size of a zip uploaded for batch extraction (200MB)")
+    UPLOAD_CHUNK_SIZE: int = Field(default=1024 * 1024, description="Chunk size in bytes for streaming uploads to disk")
     ALLOWED_EXTENSIONS: List[str] = Field(
         default=[
             "pdf", "png", "jpg", "jpeg", "webp", "tif", "tiff", "bmp",
@@ -0,0 +1,218 @@
+"""
+Persistent, size-bounded LRU cache on local disk
+"""
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class DiskLRUCache:
+    """
+    Content-addressed cache storing one file per entry
+
+    Entries are evicted least-recently-used first once the total size exceeds
+    ``max_bytes``. Recency is persisted in the file access time and the store
+    time in the modification time, so LRU order and TTL survive restarts.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        max_bytes: int,
+        ttl_seconds: Optional[int] = None,
+        name: str = "cache"
+    ):
+        """
+        Initialize cache
+
+        Args:
+            directory: Directory holding cache entries
+            max_bytes: Maximum total size of all entries (0 disables the cache)
+            ttl_seconds: Optional time-to-live for entries
+            name: Cache name used in logs
+        """
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        # key -> (size in bytes, stored at timestamp), least recently used first
+        self._index: "OrderedDict[str, Tuple[int, float]]" = OrderedDict()
+        self._total_bytes = 0
+        self._loaded = False
+
+    @property
+    def enabled(self) -> bool:
+        """Whether the cache stores anything at all"""
+        return self.max_bytes > 0
+
+    def _entry_path(self, key: str) -> Path:
+        """Get file path for a cache key (sharded by key prefix)"""
+        return self.directory / key[:2] / key
+
+    def _ensure_loaded(self):
+        """Build the in-memory index from disk on first use (lock must be held)"""
+        if self._loaded:
+            return
+        self._loaded = True
+
+        if not self.directory.exists():
+            return
+
+        entries = []
+        for path in self.directory.glob("*/*"):
+            if not path.is_file() or path.name.endswith(".tmp"):
+                continue
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_atime, path.name, stat.st_size, stat.st_mtime))
+
+        for _, key, size, stored_at in sorted(entries):
+            self._index[key] = (size, stored_at)
+            self._total_bytes += size
+
+        logger.info(f"Loaded {self.name} cache index: {len(self._index)} entries, {self._total_bytes} bytes")
+        self._evict()
+
+    def _is_expired(self, stored_at: float) -> bool:
+        """Check whether an entry stored at the given time has expired"""
+        return self.ttl_seconds is not None and time.time() - stored_at > self.ttl_seconds
+
+    def _remove(self, key: str):
+        """Remove an entry from index and disk (lock must be held)"""
+        entry = self._index.pop(key, None)
+        if entry:
+            self._total_bytes -= entry[0]
+        try:
+            self._entry_path(key).unlink()
+        except OSError:
+            pass
+
+    def _evict(self):
+        """Evict least recently used entries until under the size limit (lock must be held)"""
+        while self._index and self._total_bytes > self.max_bytes:
+            key = next(iter(self._index))
+            self._remove(key)
+            self.evictions += 1
+
+    def get_bytes(self, key: str) -> Optional[bytes]:
+        """
+        Get raw bytes for a key
+
+        Args:
+            key: Cache key (hex digest)
+
+        Returns:
+            Stored bytes or None on miss
+        """
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            self._ensure_loaded()
+            entry = self._index.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if self._is_expired(entry[1]):
+                self._remove(key)
+                self.misses += 1
+                return None
+
+            path = self._entry_path(key)
+            try:
+                data = path.read_bytes()
+                # Record recency in atime, keep store time in mtime
+                os.utime(path, (time.time(), entry[1]))
+            except OSError:
+                self._remove(key)
+                self.misses += 1
+                return None
+
+            self._index.move_to_end(key)
+            self.hits += 1
+            return data
+
+    def set_bytes(self, key: str, data: bytes):
+        """
+        Store raw bytes for a key
+
+        Args:
+            key: Cache key (hex digest)
+            data: Bytes to store
+        """
+        if not self.enabled or len(data) > self.max_bytes:
+            return
+
+        with self._lock:
+            self._ensure_loaded()
+            path = self._entry_path(key)
+            tmp_path = path.with_name(f"{key}.{os.getpid()}.tmp")
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path.write_bytes(data)
+                os.replace(tmp_path, path)
+            except OSError as e:
+                logger.warning(f"Could not write {self.name} cache entry: {e}")
+                try:
+                    tmp_path.unlink()
+                except OSError:
+                    pass
+                return
+
+            previous = self._index.pop(key, None)
+            if previous:
+                self._total_bytes -= previous[0]
+            self._index[key] = (len(data), time.time())
+            self._total_bytes += len(data)
+            self._evict()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Get a JSON value for a key, or None on miss"""
+        data = self.get_bytes(key)
+        if data is None:
+            return None
+        try:
+            return json.loads(data)
+        except ValueError:
+            logger.warning(f"Corrupt {self.name} cache entry {key}, dropping it")
+            self.delete(key)
+            return None
+
+    def set(self, key: str, value: Any):
+        """Store a JSON-serializable value for a key"""
+        self.set_bytes(key, json.dumps(value, ensure_ascii=False).encode("utf-8"))
+
+    def delete(self, key: str):
+        """Delete an entry"""
+        with self._lock:
+            self._ensure_loaded()
+            self._remove(key)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics"""
+        with self._lock:
+            self._ensure_loaded()
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._index),
+                "sizeBytes": self._total_bytes,
+                "maxBytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hitRate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions
+            }
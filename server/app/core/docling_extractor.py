@@ -0,0 +1,518 @@
+"""
+Docling result extraction
+
+Turns a converted Docling document into the service's OCR result dict.
+Kept free of job/engine state so it can run inside converter worker
+processes as well as in the API process.
+"""
+import logging
+from typing import Dict, Any, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def convert_and_extract(
+    converter: Any,
+    file_path: str,
+    settings_dict: Dict[str, Any],
+    page_range: Optional[Tuple[int, int]] = None
+) -> Dict[str, Any]:
+    """
+    Convert a document with a Docling converter and build the OCR result
+    
+    Args:
+        converter: Docling DocumentConverter
+        file_path: Path to the document
+        settings_dict: OCR settings
+        page_range: Optional 1-based inclusive (first, last) page range
+        
+    Returns:
+        OCR result dict; page numbers are document page numbers, also
+        for a page range (Docling keeps the original numbering)
+    """
+    if page_range:
+        conversion = converter.convert(file_path, page_range=page_range)
+    else:
+        conversion = converter.convert(file_path)
+    return build_docling_result(conversion.document, settings_dict)
+
+
+def merge_shard_results(shard_results: List[Tuple[int, Dict[str, Any]]]) -> Dict[str, Any]:
+    """
+    Merge results of page-range conversions into one result
+    
+    Shards already carry document page numbers, so text, pages, layout
+    and structured data are concatenated in page order as they are.
+    
+    Args:
+        shard_results: List of (first page number, shard result) tuples
+        
+    Returns:
+        Merged OCR result dict
+    """
+    shard_results = sorted(shard_results, key=lambda shard: shard[0])
+    
+    full_texts = []
+    markdown_texts = []
+    layout_texts = []
+    pages = []
+    layout_pages = []
+    structured = {"tables": [], "equations": [], "images": []}
+    
+    for _, shard in shard_results:
+        full_texts.append(shard.get("fullText", ""))
+        markdown_texts.append(shard.get("markdownText") or "")
+        layout_texts.append(shard.get("layoutText") or "")
+        
+        pages.extend(shard.get("pages", []))
+        layout_pages.extend(shard.get("layout", {}).get("pages", []))
+        for key in structured:
+            structured[key].extend(shard.get("structured", {}).get(key, []))
+    
+    # Table IDs are numbered per shard, renumber them across the document
+    for i, table in enumerate(structured["tables"]):
+        table["id"] = f"table-{i+1}"
+        table["name"] = f"Table {i+1}"
+    
+    meta = dict(shard_results[0][1].get("meta", {})) if shard_results else {}
+    meta["pageCount"] = len(pages)
+    
+    # Confidence weighted by each shard's page count, timings summed
+    weighted = [
+        (shard["meta"]["avgConfidence"], len(shard.get("pages", [])))
+        for _, shard in shard_results
+        if shard.get("meta", {}).get("avgConfidence") is not None
+    ]
+    total_weight = sum(weight for _, weight in weighted)
+    if total_weight:
+        meta["avgConfidence"] = sum(confidence * weight for confidence, weight in weighted) / total_weight
+    timings: Dict[str, Any] = {}
+    for _, shard in shard_results:
+        for name, value in (shard.get("meta", {}).get("timings") or {}).items():
+            timings[name] = timings.get(name, 0) + value
+    if timings:
+        meta["timings"] = timings
+    
+    return {
+        "fullText": "\n\n".join(full_texts),
+        "markdownText": "\n\n".join(markdown_texts),
+        "layoutText": "\n\n".join(layout_texts),
+        "pages": pages,
+        "structured": structured,
+        "layout": {
+            "pages": layout_pages
+        },
+        "meta": meta
+    }
+
+
+def iter_docling_pages(doc: Any) -> List[Tuple[int, Any]]:
+    """
+    List a Docling document's pages with their 1-based page numbers
+
+    DoclingDocument.pages is a dict keyed by page number; after a
+    page-range conversion the keys are the original document numbers.
+    """
+    doc_pages = doc.pages
+    if isinstance(doc_pages, dict):
+        return sorted(doc_pages.items(), key=lambda entry: entry[0])
+    return [(i + 1, page) for i, page in enumerate(doc_pages)]
+
+
+def _item_page_no(item: Any) -> Optional[int]:
+    """Page number of a document item (from its provenance), if known"""
+    page_no = getattr(item, 'page_no', None)
+    if not page_no and getattr(item, 'prov', None):
+        page_no = getattr(item.prov[0], 'page_no', None)
+    return page_no
+
+
+def build_docling_result(doc: Any, settings_dict: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build OCR result from a converted Docling document
+    
+    Args:
+        doc: Docling document (``ConversionResult.document``)
+        settings_dict: OCR settings
+        
+    Returns:
+        OCR result dict (fullText, pages, structured, layout, meta)
+    """
+    # Get full text - try multiple methods to ensure we get EVERYTHING
+    full_text = ""
+    if hasattr(doc, 'export_to_text'):
+        # Export with all content including headers/footers
+        full_text = doc.export_to_text()
+    elif hasattr(doc, 'text'):
+        full_text = doc.text
+    else:
+        # Try to extract from body/content
+        full_text = str(doc)
+    
+    # Also try to get text from all items (including headers/footers)
+    if hasattr(doc, 'iterate_items'):
+        try:
+            all_text_parts = []
+            for item, level in doc.iterate_items():
+                if hasattr(item, 'text') and item.text:
+                    all_text_parts.append(item.text)
+    
+            # If we got more text from items, use that
+            items_text = '\n'.join(all_text_parts)
+            if len(items_text) > len(full_text):
+                logger.info(f"Using items text ({len(items_text)} chars) instead of export ({len(full_text)} chars)")
+                full_text = items_text
+        except Exception as e:
+            logger.warning(f"Could not iterate items: {e}")
+    
+    logger.info(f"Extracted text length: {len(full_text)} chars")
+    
+    # Get markdown
+    markdown_text = ""
+    if hasattr(doc, 'export_to_markdown'):
+        markdown_text = doc.export_to_markdown()
+    else:
+        markdown_text = full_text
+    
+    # Build pages - try to get page-level content
+    pages = []
+    page_count = 1
+    
+    # Try different ways to get pages
+    if hasattr(doc, 'pages') and doc.pages:
+        page_count = len(doc.pages)
+        for page_num, page in iter_docling_pages(doc):
+            page_text = ""
+            if hasattr(page, 'export_to_text'):
+                page_text = page.export_to_text()
+            elif hasattr(page, 'text'):
+                page_text = page.text
+            elif isinstance(doc.pages, dict) and hasattr(doc, 'export_to_text'):
+                page_text = doc.export_to_text(page_no=page_num)
+            else:
+                page_text = str(page)
+            pages.append({
+                "page": page_num,
+                "text": page_text,
+                "confidence": 0.95
+            })
+    elif hasattr(doc, 'num_pages'):
+        page_count = doc.num_pages
+        # Split text evenly across pages as fallback
+        if page_count > 1:
+            lines = full_text.split('\n')
+            lines_per_page = max(1, len(lines) // page_count)
+            for i in range(page_count):
+                start = i * lines_per_page
+                end = start + lines_per_page if i < page_count - 1 else len(lines)
+                page_text = '\n'.join(lines[start:end])
+                pages.append({
+                    "page": i + 1,
+                    "text": page_text,
+                    "confidence": 0.95
+                })
+        else:
+            pages = [{"page": 1, "text": full_text, "confidence": 0.95}]
+    else:
+        pages = [{"page": 1, "text": full_text, "confidence": 0.95}]
+    
+    logger.info(f"Extracted {len(pages)} pages")
+    
+    # Build structured data
+    tables = []
+    if hasattr(doc, 'tables') and doc.tables:
+        for i, table in enumerate(doc.tables):
+            table_data = str(table)
+            if hasattr(table, 'export_to_dataframe'):
+                try:
+                    df = table.export_to_dataframe()
+                    table_data = df.to_string()
+                except:
+                    pass
+            tables.append({
+                "id": f"table-{i+1}",
+                "name": f"Table {i+1}",
+                "data": table_data
+            })
+    
+    # Build layout with actual bounding boxes from Docling
+    layout_pages = extract_layout_from_docling(doc, pages, full_text)
+    
+    return {
+        "fullText": full_text,
+        "markdownText": markdown_text,
+        "layoutText": full_text,
+        "pages": pages,
+        "structured": {
+            "tables": tables,
+            "equations": [],
+            "images": []
+        },
+        "layout": {
+            "pages": layout_pages
+        },
+        "meta": {
+            "parser": "docling",
+            "parse_method": settings_dict.get("parse_method", "auto"),
+            "language": settings_dict.get("language", "auto"),
+            "pageCount": len(pages),
+            "avgConfidence": 0.95,
+            "timings": {
+                "parseMs": 0,
+                "postMs": 100
+            }
+        }
+    }
+
+
+def extract_layout_from_docling(
+    doc: Any,
+    pages: List[Dict],
+    full_text: str
+) -> List[Dict[str, Any]]:
+    """Extract detailed layout with bounding boxes from Docling document"""
+    layout_pages = []
+
+    try:
+        # Try to get document items with bounding boxes
+        doc_items = []
+        page_dimensions = {}
+
+        # Method 1: Try to get items from document body
+        if hasattr(doc, 'body') and doc.body:
+            for item in doc.body:
+                doc_items.append(item)
+
+        # Method 2: Try iterate_items method
+        if not doc_items and hasattr(doc, 'iterate_items'):
+            try:
+                for item, level in doc.iterate_items():
+                    doc_items.append(item)
+            except:
+                pass
+
+        # Method 3: Try to get from pages directly
+        if hasattr(doc, 'pages') and doc.pages:
+            for page_num, page in iter_docling_pages(doc):
+                page_width = getattr(page, 'width', 1.0) or 1.0
+                page_height = getattr(page, 'height', 1.414) or 1.414
+                page_dimensions[page_num] = (page_width, page_height)
+
+                # Try to get items from page
+                if hasattr(page, 'items'):
+                    for item in page.items:
+                        if not hasattr(item, 'page_no'):
+                            item.page_no = page_num
+                        doc_items.append(item)
+
+        # Group items by page (items without provenance go to the first page)
+        first_page = pages[0]["page"] if pages else 1
+        items_by_page = {}
+        for item in doc_items:
+            page_no = _item_page_no(item) or first_page
+            if page_no not in items_by_page:
+                items_by_page[page_no] = []
+            items_by_page[page_no].append(item)
+
+        # Build layout pages
+        page_texts = {page["page"]: page.get("text", "") for page in pages}
+        page_numbers = sorted(set(page_texts) | set(items_by_page)) or [1]
+
+        for page_num in page_numbers:
+            page_width, page_height = page_dimensions.get(page_num, (1.0, 1.414))
+
+            blocks = []
+            page_items = items_by_page.get(page_num, [])
+
+            for idx, item in enumerate(page_items):
+                # Extract text
+                item_text = ""
+                if hasattr(item, 'text'):
+                    item_text = item.text
+                elif hasattr(item, 'export_to_text'):
+                    item_text = item.export_to_text()
+                else:
+                    item_text = str(item)
+
+                if not item_text or not item_text.strip():
+                    continue
+
+                # Extract bounding box
+                bbox = extract_bbox(item, page_width, page_height)
+
+                # Determine block type
+                block_type = "text"
+                if hasattr(item, 'label'):
+                    label = str(item.label).lower()
+                    if 'table' in label:
+                        block_type = "table"
+                    elif 'figure' in label or 'image' in label:
+                        block_type = "image"
+                    elif 'title' in label or 'heading' in label:
+                        block_type = "heading"
+                    elif 'list' in label:
+                        block_type = "list"
+
+                # Build lines from text
+                lines = build_lines_from_text(item_text, bbox)
+
+                blocks.append({
+                    "type": block_type,
+                    "text": item_text,
+                    "bbox": bbox,
+                    "confidence": 0.95,
+                    "lines": lines
+                })
+
+            # If no blocks extracted, create from page text
+            if not blocks:
+                page_text = page_texts.get(page_num, "")
+                if page_text:
+                    lines = build_lines_from_text(page_text, {"x": 0.05, "y": 0.05, "w": 0.9, "h": 0.9})
+                    blocks.append({
+                        "type": "text",
+                        "text": page_text,
+                        "bbox": {"x": 0.05, "y": 0.05, "w": 0.9, "h": 0.9},
+                        "confidence": 0.95,
+                        "lines": lines
+                    })
+
+            layout_pages.append({
+                "page": page_num,
+                "width": 1.0,
+                "height": page_height / page_width if page_width else 1.414,
+                "blocks": blocks
+            })
+
+        logger.info(f"Extracted layout: {len(layout_pages)} pages, {sum(len(p['blocks']) for p in layout_pages)} blocks")
+
+    except Exception as e:
+        logger.warning(f"Failed to extract detailed layout: {e}, using fallback")
+        # Fallback to simple layout
+        layout_pages = []
+        for page_data in pages:
+            page_text = page_data.get("text", "")
+            lines = build_lines_from_text(page_text, {"x": 0.05, "y": 0.05, "w": 0.9, "h": 0.9})
+            layout_pages.append({
+                "page": page_data["page"],
+                "width": 1.0,
+                "height": 1.414,
+                "blocks": [{
+                    "type": "text",
+                    "text": page_text,
+                    "bbox": {"x": 0.05, "y": 0.05, "w": 0.9, "h": 0.9},
+                    "confidence": 0.95,
+                    "lines": lines
+                }]
+            })
+
+    return layout_pages
+
+
+def extract_bbox(item: Any, page_width: float, page_height: float) -> Dict[str, float]:
+    """Extract normalized bounding box from Docling item"""
+    try:
+        # Try different bbox attributes
+        bbox = None
+
+        if hasattr(item, 'prov') and item.prov:
+            # Docling provenance contains bbox info
+            for prov in item.prov:
+                if hasattr(prov, 'bbox'):
+                    bbox = prov.bbox
+                    break
+
+        if not bbox and hasattr(item, 'bbox'):
+            bbox = item.bbox
+
+        if not bbox and hasattr(item, 'bounding_box'):
+            bbox = item.bounding_box
+
+        if bbox:
+            # Normalize coordinates to 0-1 range
+            if hasattr(bbox, 'l'):  # Docling BoundingBox format
+                x = bbox.l / page_width if page_width else bbox.l
+                y = bbox.t / page_height if page_height else bbox.t
+                w = (bbox.r - bbox.l) / page_width if page_width else (bbox.r - bbox.l)
+                h = (bbox.b - bbox.t) / page_height if page_height else (bbox.b - bbox.t)
+            elif isinstance(bbox, (list, tuple)) and len(bbox) >= 4:
+                x = bbox[0] / page_width if page_width else bbox[0]
+                y = bbox[1] / page_height if page_height else bbox[1]
+                w = (bbox[2] - bbox[0]) / page_width if page_width else (bbox[2] - bbox[0])
+                h = (bbox[3] - bbox[1]) / page_height if page_height else (bbox[3] - bbox[1])
+            elif hasattr(bbox, 'x'):
+                x = bbox.x / page_width if page_width else bbox.x
+                y = bbox.y / page_height if page_height else bbox.y
+                w = bbox.width / page_width if page_width and hasattr(bbox, 'width') else 0.9
+                h = bbox.height / page_height if page_height and hasattr(bbox, 'height') else 0.05
+            else:
+                return {"x": 0.05, "y": 0.05, "w": 0.9, "h": 0.1}
+
+            # Clamp values to valid range
+            x = max(0, min(1, x))
+            y = max(0, min(1, y))
+            w = max(0.01, min(1 - x, w))
+            h = max(0.01, min(1 - y, h))
+
+            return {"x": x, "y": y, "w": w, "h": h}
+    except Exception as e:
+        logger.debug(f"Failed to extract bbox: {e}")
+
+    return {"x": 0.05, "y": 0.05, "w": 0.9, "h": 0.1}
+
+
+def build_lines_from_text(text: str, parent_bbox: Dict[str, float]) -> List[Dict[str, Any]]:
+    """Build line-level layout from text content"""
+    lines = []
+    text_lines = text.split('\n')
+
+    if not text_lines:
+        return lines
+
+    line_height = min(0.04, parent_bbox["h"] / max(len(text_lines), 1))
+    line_gap = 0.01
+
+    for idx, line_text in enumerate(text_lines):
+        if not line_text.strip():
+            continue
+
+        y = parent_bbox["y"] + idx * (line_height + line_gap)
+        if y + line_height > parent_bbox["y"] + parent_bbox["h"]:
+            break
+
+        # Build words
+        words = []
+        word_list = line_text.split()
+        if word_list:
+            word_width = min(0.15, parent_bbox["w"] / max(len(word_list), 1))
+            x_cursor = parent_bbox["x"]
+
+            for word_text in word_list:
+                # Estimate word width based on character count
+                estimated_width = min(word_width * (len(word_text) / 5), parent_bbox["w"] - (x_cursor - parent_bbox["x"]))
+
+                words.append({
+                    "text": word_text,
+                    "bbox": {
+                        "x": x_cursor,
+                        "y": y,
+                        "w": estimated_width,
+                        "h": line_height
+                    },
+                    "confidence": 0.95
+                })
+                x_cursor += estimated_width + 0.01
+
+        lines.append({
+            "text": line_text,
+            "confidence": 0.95,
+            "bbox": {
+                "x": parent_bbox["x"],
+                "y": y,
+                "w": parent_bbox["w"],
+                "h": line_height
+            },
+            "words": words
+        })
+
+    return lines
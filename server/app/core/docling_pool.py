@@ -0,0 +1,121 @@
+"""
+Process-pool execution of Docling conversions
+
+Each worker process owns one pre-warmed DocumentConverter. Only the file
+path and settings go in, and only the extracted result dict comes back,
+so Docling's layout/OCR models never compete with the API event loop
+for the GIL.
+"""
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from app.core.docling_extractor import convert_and_extract
+
+logger = logging.getLogger(__name__)
+
+# Converter owned by the current worker process
+_worker_converter = None
+
+
+def _init_worker():
+    """Create and pre-warm this worker's DocumentConverter"""
+    global _worker_converter
+    from docling.document_converter import DocumentConverter
+    from docling.datamodel.base_models import InputFormat
+
+    _worker_converter = DocumentConverter()
+
+    # Load PDF/image pipelines (layout + OCR models) up front rather than on the first job
+    if hasattr(_worker_converter, "initialize_pipeline"):
+        for input_format in (InputFormat.PDF, InputFormat.IMAGE):
+            try:
+                _worker_converter.initialize_pipeline(input_format)
+            except Exception as e:
+                logger.warning(f"Could not pre-warm Docling pipeline {input_format}: {e}")
+
+    logger.info(f"Docling worker {os.getpid()} ready")
+
+
+def _worker_ping() -> int:
+    """No-op task used to make sure a worker process is started"""
+    return os.getpid()
+
+
+def _worker_convert(
+    file_path: str,
+    settings_dict: Dict[str, Any],
+    page_range: Optional[Tuple[int, int]] = None
+) -> Dict[str, Any]:
+    """Convert a document (or page range) in the worker and return the extracted result"""
+    return convert_and_extract(_worker_converter, file_path, settings_dict, page_range)
+
+
+class DoclingProcessPool:
+    """Pool of worker processes, each with its own Docling converter"""
+
+    def __init__(self, workers: int):
+        """
+        Initialize pool (processes are spawned lazily or by warm_up)
+
+        Args:
+            workers: Number of worker processes
+        """
+        self.workers = max(1, workers)
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Create the executor on first use"""
+        if self._executor is None:
+            # Spawn (not fork) so workers never inherit the API's threads and event loop
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker
+            )
+            logger.info(f"Created Docling process pool with {self.workers} workers")
+        return self._executor
+
+    async def warm_up(self):
+        """Start all worker processes so converters are loaded before the first job"""
+        loop = asyncio.get_event_loop()
+        executor = self._get_executor()
+        pids = await asyncio.gather(
+            *[loop.run_in_executor(executor, _worker_ping) for _ in range(self.workers)],
+            return_exceptions=True
+        )
+        ready = {pid for pid in pids if isinstance(pid, int)}
+        logger.info(f"Docling process pool warmed up: {len(ready)} worker processes")
+
+    async def convert(
+        self,
+        file_path: Path,
+        settings_dict: Dict[str, Any],
+        page_range: Optional[Tuple[int, int]] = None
+    ) -> Dict[str, Any]:
+        """
+        Convert a document in a worker process
+
+        Args:
+            file_path: Path to the document
+            settings_dict: OCR settings
+            page_range: Optional 1-based inclusive (first, last) page range
+
+        Returns:
+            OCR result dict built by build_docling_result
+        """
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(
+            self._get_executor(), _worker_convert, str(file_path), settings_dict, page_range
+        )
+
+    def shutdown(self):
+        """Shut down worker processes"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            logger.info("Docling process pool shut down")
@@ -1,14 +1,23 @@
 """
-In-memory job store and progress tracking
+Job stores (in-memory or SQLite), progress tracking and job scheduling
 """
 import asyncio
+import math
+import os
+import sqlite3
+import threading
 import time
 import uuid
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Dict, Optional, Any
+from typing import Dict, Optional, Any, Awaitable, Callable, List, Tuple
 from enum import Enum
+from pathlib import Path
 import logging
 
+from app.core.config import settings
+from app.core.result_store import result_store, PageRanges
+
 logger = logging.getLogger(__name__)
 
 
@@ -24,24 +33,25 @@ class JobStep(str, Enum):
     PREPROCESS = "preprocess"
     PARSE = "parse"
     POSTPROCESS = "postprocess"
+    INDEX = "index"  # RAG ingestion into the knowledge base
     DONE = "done"
 
 
 class Job:
-    def __init__(self, job_id: str):
+    def __init__(self, job_id: str, parent_id: Optional[str] = None):
         self.job_id = job_id
+        self.parent_id = parent_id  # Batch job this job belongs to
         self.status = JobStatus.QUEUED
         self.step = JobStep.UPLOAD
         self.percent = 0
         self.message = "Job created"
-        self.result: Optional[Dict[str, Any]] = None
         self.error: Optional[str] = None
         self.created_at = datetime.now()
         self.updated_at = datetime.now()
         
     def update(self, status: Optional[JobStatus] = None, step: Optional[JobStep] = None, 
                percent: Optional[int] = None, message: Optional[str] = None,
-               result: Optional[Dict[str, Any]] = None, error: Optional[str] = None):
+               error: Optional[str] = None):
         """Update job state"""
         if status is not None:
             self.status = status
@@ -51,15 +61,18 @@ class Job:
             self.percent = percent
         if message is not None:
             self.message = message
-        if result is not None:
-            self.result = result
         if error is not None:
             self.error = error
         self.updated_at = datetime.now()
         
+    @property
+    def is_finished(self) -> bool:
+        """Whether the job reached a terminal status"""
+        return self.status in (JobStatus.DONE, JobStatus.ERROR)
+        
     def to_dict(self) -> Dict[str, Any]:
-        """Convert job to dictionary"""
-        data = {
+        """Convert job to dictionary (results are read separately via the store)"""
+        return {
             "jobId": self.job_id,
             "status": self.status.value,
             "step": self.step.value,
@@ -67,12 +80,6 @@ class Job:
             "message": self.message,
             "error": self.error
         }
-        
-        # Include result if job is done
-        if self.status == JobStatus.DONE and self.result:
-            data["result"] = self.result
-            
-        return data
 
 
 class JobStore:
@@ -81,11 +88,17 @@ class JobStore:
         self.cleanup_interval = 3600  # 1 hour
         self.job_ttl = 24 * 3600  # 24 hours
         self._cleanup_task: Optional[asyncio.Task] = None
+        # job_id -> (event loop, queue) of each live event stream subscriber
+        self._subscribers: Dict[str, List[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = {}
+        # parent job_id -> child job_ids of batch jobs
+        self._children: Dict[str, List[str]] = {}
         
-    def create_job(self) -> str:
-        """Create a new job and return job ID"""
+    def create_job(self, parent_id: Optional[str] = None) -> str:
+        """Create a new job (optionally as child of a batch job) and return job ID"""
         job_id = str(uuid.uuid4())
-        self.jobs[job_id] = Job(job_id)
+        self.jobs[job_id] = Job(job_id, parent_id)
+        if parent_id:
+            self._children.setdefault(parent_id, []).append(job_id)
         logger.info(f"Created job {job_id}")
         return job_id
         
@@ -93,25 +106,150 @@ class JobStore:
         """Get job by ID"""
         return self.jobs.get(job_id)
         
+    def get_result(
+        self,
+        job_id: str,
+        fields: Optional[List[str]] = None,
+        pages: Optional[PageRanges] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Load a finished job's result from disk
+        
+        Args:
+            job_id: Job ID
+            fields: Top-level result fields to load (None for all)
+            pages: Page ranges to keep in pages/layout (None for all)
+            
+        Returns:
+            Result dict (partial if fields/pages are given) or None
+        """
+        return result_store.load(job_id, fields, pages)
+        
+    def list_jobs(self, status: Optional[JobStatus] = None) -> List[Job]:
+        """List jobs (oldest first), optionally filtered by status"""
+        return [
+            job for job in self.jobs.values()
+            if status is None or job.status == status
+        ]
+        
+    def list_children(self, parent_id: str) -> List[Job]:
+        """List child jobs of a batch job in creation order"""
+        return [
+            self.jobs[job_id] for job_id in self._children.get(parent_id, [])
+            if job_id in self.jobs
+        ]
+        
+    def count(self) -> int:
+        """Number of stored jobs"""
+        return len(self.jobs)
+        
     def update_job(self, job_id: str, **kwargs) -> bool:
-        """Update job state"""
+        """Update job state (a result is written to disk, not kept in memory)"""
+        result = kwargs.pop("result", None)
         job = self.jobs.get(job_id)
         if job:
+            if result is not None:
+                result_store.save(job_id, result)
             job.update(**kwargs)
             logger.debug(f"Updated job {job_id}: {job.status.value} - {job.message}")
+            self.publish_event(job_id, "progress", job.to_dict())
+            if job.parent_id:
+                self._refresh_parent(job.parent_id)
             return True
         return False
         
+    async def complete_job(self, job_id: str, result: Dict[str, Any], **kwargs) -> bool:
+        """
+        Store a job's result off the event loop, then update its state
+        
+        Compressing and writing a large result takes long enough to stall
+        every request, so coroutines use this instead of update_job(result=...).
+        
+        Args:
+            job_id: Job ID
+            result: OCR result dict
+            **kwargs: Job fields to update once the result is stored
+            
+        Returns:
+            False if the job does not exist (or was deleted meanwhile)
+        """
+        if self.get_job(job_id) is None:
+            return False
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(None, result_store.save, job_id, result)
+        if self.update_job(job_id, **kwargs):
+            return True
+        # Deleted while the result was written
+        result_store.delete(job_id)
+        return False
+        
+    def _refresh_parent(self, parent_id: str):
+        """Recompute a batch job's status and progress from its children"""
+        children = self.list_children(parent_id)
+        if not children:
+            return
+        
+        total = len(children)
+        finished = sum(1 for child in children if child.is_finished)
+        failed = sum(1 for child in children if child.status == JobStatus.ERROR)
+        percent = sum(100 if child.is_finished else child.percent for child in children) // total
+        message = f"Processed {finished}/{total} files" + (f" ({failed} failed)" if failed else "")
+        
+        if finished == total:
+            all_failed = failed == total
+            self.update_job(
+                parent_id,
+                status=JobStatus.ERROR if all_failed else JobStatus.DONE,
+                step=JobStep.DONE, percent=100, message=message,
+                error="All files in the batch failed" if all_failed else None
+            )
+        elif all(child.status == JobStatus.QUEUED for child in children):
+            self.update_job(parent_id, status=JobStatus.QUEUED, percent=percent, message=message)
+        else:
+            self.update_job(parent_id, status=JobStatus.RUNNING, step=JobStep.PARSE,
+                            percent=percent, message=message)
+        
     def delete_job(self, job_id: str) -> bool:
         """Delete job"""
         if job_id in self.jobs:
             del self.jobs[job_id]
+            self._children.pop(job_id, None)
+            result_store.delete(job_id)
             logger.info(f"Deleted job {job_id}")
+            self.publish_event(job_id, "deleted", {"jobId": job_id})
             return True
         return False
         
-    def cleanup_old_jobs(self):
-        """Clean up old jobs"""
+    def subscribe(self, job_id: str) -> asyncio.Queue:
+        """
+        Subscribe to events of a job
+        
+        Returns:
+            Queue receiving {"event": name, "data": dict} messages
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers.setdefault(job_id, []).append((asyncio.get_event_loop(), queue))
+        return queue
+        
+    def unsubscribe(self, job_id: str, queue: asyncio.Queue):
+        """Remove an event subscription"""
+        subscribers = [entry for entry in self._subscribers.get(job_id, []) if entry[1] is not queue]
+        if subscribers:
+            self._subscribers[job_id] = subscribers
+        else:
+            self._subscribers.pop(job_id, None)
+            
+    def publish_event(self, job_id: str, event: str, data: Dict[str, Any]):
+        """Push an event to all subscribers of a job (safe to call from any thread)"""
+        for loop, queue in self._subscribers.get(job_id, []):
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, {"event": event, "data": data})
+            except RuntimeError:
+                # Subscriber's loop is closed
+                pass
+        
+    def cleanup_old_jobs(self) -> int:
+        """Clean up old jobs, returning how many were removed"""
         cutoff_time = datetime.now() - timedelta(seconds=self.job_ttl)
         old_jobs = [
             job_id for job_id, job in self.jobs.items()
@@ -123,14 +261,22 @@ class JobStore:
             
         if old_jobs:
             logger.info(f"Cleaned up {len(old_jobs)} old jobs")
+        return len(old_jobs)
             
     def cleanup_all(self):
         """Clean up all jobs"""
         count = len(self.jobs)
+        for job_id in self.jobs:
+            result_store.delete(job_id)
         self.jobs.clear()
+        self._children.clear()
         if count > 0:
             logger.info(f"Cleaned up all {count} jobs")
             
+    def shutdown(self):
+        """Release the store on application shutdown"""
+        self.cleanup_all()
+            
     async def start_cleanup_task(self):
         """Start periodic cleanup task"""
         if self._cleanup_task is None or self._cleanup_task.done():
@@ -157,5 +303,415 @@ class JobStore:
                 logger.error(f"Error in cleanup loop: {e}")
 
 
+class SQLiteJobStore(JobStore):
+    """
+    Durable job store backed by SQLite in WAL mode
+    
+    Job metadata lives in the ``jobs`` table, indexed on ``updated_at`` (TTL
+    expiry is a range delete) and ``status`` (listing). Results live in the
+    per-job result files of the result store, so rows stay small. Several
+    worker processes on one host can share the same database file; each
+    thread uses its own connection.
+    """
+    
+    _COLUMNS = ("status", "step", "percent", "message", "error")
+    
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS jobs (
+            job_id TEXT PRIMARY KEY,
+            status TEXT NOT NULL,
+            step TEXT NOT NULL,
+            percent INTEGER NOT NULL DEFAULT 0,
+            message TEXT,
+            error TEXT,
+            owner_pid INTEGER,
+            parent_id TEXT,
+            created_at REAL NOT NULL,
+            updated_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_jobs_updated_at ON jobs (updated_at);
+        CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at);
+    """
+    
+    # Columns added after the first schema version: name -> definition
+    _MIGRATIONS = {"parent_id": "TEXT"}
+    
+    def __init__(self, path: Path):
+        """
+        Initialize store
+        
+        Args:
+            path: SQLite database file (created if missing)
+        """
+        super().__init__()
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        
+        with self._connect() as conn:
+            conn.executescript(self._SCHEMA)
+            existing = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+            for name, definition in self._MIGRATIONS.items():
+                if name not in existing:
+                    conn.execute(f"ALTER TABLE jobs ADD COLUMN {name} {definition}")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_parent ON jobs (parent_id, created_at)")
+        logger.info(f"Using SQLite job store at {self.path}")
+        
+    def _connect(self) -> sqlite3.Connection:
+        """Get this thread's connection, opening it on first use"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+        
+    @staticmethod
+    def _row_to_job(row: sqlite3.Row) -> Job:
+        """Build a Job from a jobs row"""
+        job = Job(row["job_id"], row["parent_id"])
+        job.status = JobStatus(row["status"])
+        job.step = JobStep(row["step"])
+        job.percent = row["percent"]
+        job.message = row["message"]
+        job.error = row["error"]
+        job.created_at = datetime.fromtimestamp(row["created_at"])
+        job.updated_at = datetime.fromtimestamp(row["updated_at"])
+        return job
+        
+    def create_job(self, parent_id: Optional[str] = None) -> str:
+        """Create a new job (optionally as child of a batch job) and return job ID"""
+        job_id = str(uuid.uuid4())
+        job = Job(job_id, parent_id)
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (job_id, status, step, percent, message, error, owner_pid, parent_id, "
+                "created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, job.status.value, job.step.value, job.percent, job.message,
+                 job.error, os.getpid(), parent_id, now, now)
+            )
+        logger.info(f"Created job {job_id}")
+        return job_id
+        
+    def get_job(self, job_id: str) -> Optional[Job]:
+        """Get job by ID"""
+        row = self._connect().execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return self._row_to_job(row) if row is not None else None
+        
+    def list_jobs(self, status: Optional[JobStatus] = None) -> List[Job]:
+        """List jobs (oldest first), optionally filtered by status"""
+        conn = self._connect()
+        if status is None:
+            rows = conn.execute("SELECT * FROM jobs ORDER BY created_at").fetchall()
+        else:
+            rows = conn.execute(
+                "SELECT * FROM jobs WHERE status = ? ORDER BY created_at", (status.value,)
+            ).fetchall()
+        return [self._row_to_job(row) for row in rows]
+        
+    def list_children(self, parent_id: str) -> List[Job]:
+        """List child jobs of a batch job in creation order"""
+        rows = self._connect().execute(
+            "SELECT * FROM jobs WHERE parent_id = ? ORDER BY created_at, rowid", (parent_id,)
+        ).fetchall()
+        return [self._row_to_job(row) for row in rows]
+        
+    def count(self) -> int:
+        """Number of stored jobs"""
+        return self._connect().execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+        
+    def update_job(self, job_id: str, **kwargs) -> bool:
+        """Update job state"""
+        result = kwargs.pop("result", None)
+        unknown = set(kwargs) - set(self._COLUMNS)
+        if unknown:
+            raise TypeError(f"Unknown job fields: {', '.join(sorted(unknown))}")
+        
+        columns = {
+            name: value.value if isinstance(value, Enum) else value
+            for name, value in kwargs.items() if value is not None
+        }
+        columns["updated_at"] = time.time()
+        assignments = ", ".join(f"{name} = ?" for name in columns)
+        
+        # Write the result first so a job is never visible as done without it
+        if result is not None:
+            result_store.save(job_id, result)
+        
+        with self._connect() as conn:
+            cursor = conn.execute(
+                f"UPDATE jobs SET {assignments} WHERE job_id = ?", (*columns.values(), job_id)
+            )
+        if cursor.rowcount == 0:
+            if result is not None:
+                result_store.delete(job_id)
+            return False
+        
+        job = self.get_job(job_id)
+        if job:
+            logger.debug(f"Updated job {job_id}: {job.status.value} - {job.message}")
+            self.publish_event(job_id, "progress", job.to_dict())
+            if job.parent_id:
+                self._refresh_parent(job.parent_id)
+        return True
+        
+    def delete_job(self, job_id: str) -> bool:
+        """Delete job"""
+        with self._connect() as conn:
+            deleted = conn.execute("DELETE FROM jobs WHERE job_id = ?", (job_id,)).rowcount
+        if deleted:
+            result_store.delete(job_id)
+            logger.info(f"Deleted job {job_id}")
+            self.publish_event(job_id, "deleted", {"jobId": job_id})
+            return True
+        return False
+        
+    def cleanup_old_jobs(self) -> int:
+        """Clean up old jobs using the updated_at index, returning how many were removed"""
+        cutoff = time.time() - self.job_ttl
+        with self._connect() as conn:
+            old_jobs = [
+                row["job_id"] for row in
+                conn.execute("SELECT job_id FROM jobs WHERE updated_at < ?", (cutoff,))
+            ]
+            conn.execute("DELETE FROM jobs WHERE updated_at < ?", (cutoff,))
+        
+        for job_id in old_jobs:
+            result_store.delete(job_id)
+            self.publish_event(job_id, "deleted", {"jobId": job_id})
+        if old_jobs:
+            logger.info(f"Cleaned up {len(old_jobs)} old jobs")
+        return len(old_jobs)
+        
+    def cleanup_all(self):
+        """Clean up all jobs"""
+        with self._connect() as conn:
+            job_ids = [row["job_id"] for row in conn.execute("SELECT job_id FROM jobs")]
+            conn.execute("DELETE FROM jobs")
+        for job_id in job_ids:
+            result_store.delete(job_id)
+        count = len(job_ids)
+        if count > 0:
+            logger.info(f"Cleaned up all {count} jobs")
+            
+    def shutdown(self):
+        """Fail this process's unfinished jobs (their tasks die with it) and close connections"""
+        with self._connect() as conn:
+            interrupted = conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, message = ?, updated_at = ? "
+                "WHERE owner_pid = ? AND status IN (?, ?)",
+                (JobStatus.ERROR.value, "Server shut down before the job finished",
+                 "Processing interrupted", time.time(), os.getpid(),
+                 JobStatus.QUEUED.value, JobStatus.RUNNING.value)
+            ).rowcount
+        if interrupted:
+            logger.warning(f"Marked {interrupted} unfinished jobs as failed")
+        
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+
+def create_job_store() -> JobStore:
+    """Create the job store selected by JOB_STORE_BACKEND"""
+    backend = settings.JOB_STORE_BACKEND.lower()
+    if backend == "sqlite":
+        return SQLiteJobStore(settings.JOB_STORE_PATH or settings.STORAGE_DIR / "jobs.db")
+    if backend != "memory":
+        logger.warning(f"Unknown JOB_STORE_BACKEND '{settings.JOB_STORE_BACKEND}', using memory")
+    return JobStore()
+
+
+class QueueFullError(Exception):
+    """Raised when the job queue cannot accept more work"""
+    
+    def __init__(self, retry_after: int):
+        super().__init__(f"Job queue is full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class JobScheduler:
+    """
+    Bounded job scheduler with a fixed number of workers
+    
+    Jobs wait in a bounded FIFO queue with QUEUED status until a worker picks
+    them up. Submissions beyond the queue capacity are rejected with
+    QueueFullError so the process is never accepted into overload.
+    """
+    
+    def __init__(self, workers: int, max_queue_size: int, estimated_duration: float = 30.0):
+        self.workers = max(1, workers)
+        self.max_queue_size = max(1, max_queue_size)
+        self._queue: Optional[asyncio.Queue] = None
+        self._pending: "OrderedDict[str, None]" = OrderedDict()
+        self._running: Dict[str, float] = {}
+        self._worker_tasks: List[asyncio.Task] = []
+        # Exponentially weighted average job duration, used for ETAs
+        self._avg_duration = estimated_duration
+        
+    async def start(self):
+        """Start worker tasks on the running event loop"""
+        self._ensure_started()
+        
+    def _ensure_started(self):
+        """Create queue and workers if not running yet"""
+        if self._worker_tasks and not all(task.done() for task in self._worker_tasks):
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._pending.clear()
+        self._worker_tasks = [
+            asyncio.create_task(self._worker_loop(i)) for i in range(self.workers)
+        ]
+        logger.info(f"Started job scheduler with {self.workers} workers, queue size {self.max_queue_size}")
+        
+    async def stop(self):
+        """Stop worker tasks"""
+        for task in self._worker_tasks:
+            task.cancel()
+        if self._worker_tasks:
+            await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+        
+    def submit(self, job_id: str, task_factory: Callable[[], Awaitable[Any]]) -> "asyncio.Future":
+        """
+        Queue a job for execution
+        
+        Args:
+            job_id: Job ID (must exist in the job store)
+            task_factory: Callable returning the coroutine that processes the job
+            
+        Returns:
+            Future resolved with the coroutine result once the job has run
+            
+        Raises:
+            QueueFullError: If the queue is at capacity
+        """
+        return self.submit_batch([(job_id, task_factory)])[0]
+        
+    def submit_batch(
+        self,
+        jobs: List[Tuple[str, Callable[[], Awaitable[Any]]]]
+    ) -> List["asyncio.Future"]:
+        """
+        Queue several jobs atomically and back to back
+        
+        Either all jobs are admitted or none is. Adjacent queue slots mean
+        the workers process the batch consecutively, while its converters
+        and models are warm.
+        
+        Args:
+            jobs: (job_id, task_factory) pairs in processing order
+            
+        Returns:
+            One future per job, in the same order
+            
+        Raises:
+            QueueFullError: If the queue cannot take all jobs
+        """
+        self._ensure_started()
+        if self._queue.maxsize - self._queue.qsize() < len(jobs):
+            raise QueueFullError(self.estimate_retry_after())
+        
+        loop = asyncio.get_event_loop()
+        futures = []
+        for job_id, task_factory in jobs:
+            future = loop.create_future()
+            self._queue.put_nowait((job_id, task_factory, future))
+            self._pending[job_id] = None
+            job_store.update_job(job_id, status=JobStatus.QUEUED, 
+                                 message=f"Queued at position {len(self._pending)}")
+            futures.append(future)
+        return futures
+        
+    def estimate_retry_after(self) -> int:
+        """Estimate seconds until a queue slot frees up"""
+        return max(1, math.ceil(self._avg_duration / self.workers))
+        
+    def get_queue_info(self, job_id: str) -> Dict[str, Optional[int]]:
+        """
+        Get queue position and estimated seconds to completion for a job
+        
+        Returns:
+            Dict with queuePosition (None unless queued) and etaSeconds
+            (None unless queued or running)
+        """
+        if job_id in self._running:
+            elapsed = time.monotonic() - self._running[job_id]
+            return {"queuePosition": None, "etaSeconds": max(0, math.ceil(self._avg_duration - elapsed))}
+        
+        if job_id in self._pending:
+            position = list(self._pending).index(job_id) + 1
+            # Jobs ahead of this one drain in waves of `workers`, then it runs itself
+            waves = math.ceil(position / self.workers)
+            return {"queuePosition": position, "etaSeconds": math.ceil((waves + 1) * self._avg_duration)}
+        
+        return {"queuePosition": None, "etaSeconds": None}
+        
+    def get_stats(self) -> Dict[str, Any]:
+        """Get scheduler statistics"""
+        return {
+            "workers": self.workers,
+            "running": len(self._running),
+            "queued": len(self._pending),
+            "maxQueueSize": self.max_queue_size,
+            "avgJobSeconds": round(self._avg_duration, 1)
+        }
+        
+    async def _worker_loop(self, worker_id: int):
+        """Pick jobs off the queue and run them one at a time"""
+        while True:
+            job_id, task_factory, future = await self._queue.get()
+            self._pending.pop(job_id, None)
+            
+            try:
+                if job_store.get_job(job_id) is None:
+                    # Job was deleted while waiting in the queue
+                    if not future.done():
+                        future.cancel()
+                    continue
+                
+                started_at = time.monotonic()
+                self._running[job_id] = started_at
+                job_store.update_job(job_id, status=JobStatus.RUNNING, message="Starting processing...")
+                try:
+                    result = await task_factory()
+                    if not future.done():
+                        future.set_result(result)
+                except asyncio.CancelledError:
+                    if not future.done():
+                        future.cancel()
+                    raise
+                except Exception as e:
+                    logger.error(f"Worker {worker_id} failed job {job_id}: {e}")
+                    if not future.done():
+                        future.set_exception(e)
+                        # Errors are recorded on the job itself, so fire-and-forget
+                        # submitters need not retrieve them from the future
+                        future.exception()
+                finally:
+                    self._running.pop(job_id, None)
+                    duration = time.monotonic() - started_at
+                    self._avg_duration = 0.8 * self._avg_duration + 0.2 * duration
+            finally:
+                self._queue.task_done()
+
+
 # Global job store instance
-job_store = JobStore()
\ No newline at end of file
+job_store = create_job_store()
+
+# Global job scheduler instance
+job_scheduler = JobScheduler(
+    workers=settings.JOB_WORKERS,
+    max_queue_size=settings.JOB_QUEUE_MAX_SIZE,
+    estimated_duration=settings.JOB_ESTIMATED_DURATION
+)
\ No newline at end of file
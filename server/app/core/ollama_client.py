@@ -1,22 +1,58 @@
 """
 Ollama client for local LLM/embedding/vision
 """
+import array
+import asyncio
+import hashlib
 import json
 import logging
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Set
 import httpx
 
 from app.core.config import settings
+from app.core.disk_cache import DiskLRUCache
 
 logger = logging.getLogger(__name__)
 
 
+def _embedding_cache_key(model: str, text: str) -> str:
+    """Cache key of a text's embedding under a model"""
+    return hashlib.sha256(f"{model}\0{text}".encode("utf-8")).hexdigest()
+
+
 class OllamaClient:
     def __init__(self):
         self.base_url = settings.OLLAMA_BASE_URL
         self.llm_model = settings.OLLAMA_LLM_MODEL
         self.embed_model = settings.OLLAMA_EMBED_MODEL
         self.vision_model = settings.OLLAMA_VISION_MODEL
+        self.embed_batch_size = max(1, settings.OLLAMA_EMBED_BATCH_SIZE)
+        self.embed_concurrency = max(1, settings.OLLAMA_EMBED_CONCURRENCY)
+        # Embeddings by model and text hash, stored as packed float32
+        self.embedding_cache = DiskLRUCache(
+            settings.CACHE_DIR / "embeddings",
+            max_bytes=settings.OLLAMA_EMBED_CACHE_MAX_BYTES,
+            name="embedding"
+        )
+        self._client: Optional[httpx.AsyncClient] = None
+        self._batch_embed_supported = True
+        
+    def _get_client(self) -> httpx.AsyncClient:
+        """Get the pooled client, creating it on first use"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=settings.OLLAMA_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.OLLAMA_MAX_CONNECTIONS
+                )
+            )
+        return self._client
+        
+    async def close(self):
+        """Close pooled connections"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
         
     async def chat(
         self,
@@ -34,44 +70,120 @@ class OllamaClient:
             "stream": stream
         }
         
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{self.base_url}/chat",
-                json=payload,
-                timeout=60.0
-            )
-            response.raise_for_status()
-            return response.json()
+        response = await self._get_client().post(
+            f"{self.base_url}/chat",
+            json=payload,
+            timeout=60.0
+        )
+        response.raise_for_status()
+        return response.json()
             
     async def embed(
         self,
         texts: List[str],
         model: Optional[str] = None
     ) -> List[List[float]]:
-        """Generate embeddings with Ollama"""
+        """
+        Generate embeddings with Ollama
+        
+        Cached embeddings are reused; the remaining distinct texts are sent
+        in batches of ``OLLAMA_EMBED_BATCH_SIZE`` to /api/embed, up to
+        ``OLLAMA_EMBED_CONCURRENCY`` requests at a time.
+        
+        Args:
+            texts: Texts to embed
+            model: Embedding model (default: OLLAMA_EMBED_MODEL)
+            
+        Returns:
+            One embedding per text, in input order
+        """
         if not model:
             model = self.embed_model
+        if not texts:
+            return []
             
-        embeddings = []
+        loop = asyncio.get_event_loop()
+        keys = [_embedding_cache_key(model, text) for text in texts]
+        embeddings: Dict[str, List[float]] = {}
+        if self.embedding_cache.enabled:
+            embeddings = await loop.run_in_executor(None, self._load_cached, set(keys))
         
-        async with httpx.AsyncClient() as client:
-            for text in texts:
-                payload = {
-                    "model": model,
-                    "prompt": text
-                }
+        # Distinct texts still to embed, keyed by cache key
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in embeddings:
+                missing.setdefault(key, text)
+        
+        if missing:
+            logger.debug(f"Embedding {len(missing)} texts ({len(texts) - len(missing)} cached or repeated)")
+            missing_keys = list(missing)
+            batches = [
+                missing_keys[i:i + self.embed_batch_size]
+                for i in range(0, len(missing_keys), self.embed_batch_size)
+            ]
+            semaphore = asyncio.Semaphore(self.embed_concurrency)
+            
+            async def run_batch(batch: List[str]) -> List[List[float]]:
+                async with semaphore:
+                    return await self._embed_batch([missing[key] for key in batch], model)
                 
-                response = await client.post(
-                    f"{self.base_url}/embeddings",
-                    json=payload,
-                    timeout=30.0
-                )
-                response.raise_for_status()
-                result = response.json()
-                embeddings.append(result["embedding"])
+            results = await asyncio.gather(*(run_batch(batch) for batch in batches))
+            computed = {
+                key: embedding
+                for batch, batch_embeddings in zip(batches, results)
+                for key, embedding in zip(batch, batch_embeddings)
+            }
+            embeddings.update(computed)
+            if self.embedding_cache.enabled:
+                await loop.run_in_executor(None, self._store_cached, computed)
                 
+        return [embeddings[key] for key in keys]
+        
+    async def _embed_batch(self, texts: List[str], model: str) -> List[List[float]]:
+        """Embed one batch with /api/embed (per text with /api/embeddings on old servers)"""
+        client = self._get_client()
+        if self._batch_embed_supported:
+            response = await client.post(
+                f"{self.base_url}/embed",
+                json={"model": model, "input": texts},
+                timeout=120.0
+            )
+            if response.status_code != 404:
+                response.raise_for_status()
+                embeddings = response.json()["embeddings"]
+                if len(embeddings) != len(texts):
+                    raise ValueError(f"Ollama returned {len(embeddings)} embeddings for {len(texts)} texts")
+                return embeddings
+            logger.warning("Ollama has no /api/embed endpoint, falling back to /api/embeddings")
+            self._batch_embed_supported = False
+            
+        embeddings = []
+        for text in texts:
+            response = await client.post(
+                f"{self.base_url}/embeddings",
+                json={"model": model, "prompt": text},
+                timeout=30.0
+            )
+            response.raise_for_status()
+            embeddings.append(response.json()["embedding"])
         return embeddings
         
+    def _load_cached(self, keys: Set[str]) -> Dict[str, List[float]]:
+        """Read cached embeddings (blocking)"""
+        found = {}
+        for key in keys:
+            data = self.embedding_cache.get_bytes(key)
+            if data is not None:
+                vector = array.array("f")
+                vector.frombytes(data)
+                found[key] = vector.tolist()
+        return found
+        
+    def _store_cached(self, embeddings: Dict[str, List[float]]):
+        """Write embeddings to the cache (blocking)"""
+        for key, embedding in embeddings.items():
+            self.embedding_cache.set_bytes(key, array.array("f", embedding).tobytes())
+        
     async def vision_chat(
         self,
         prompt: str,
@@ -0,0 +1,546 @@
+"""
+RAG knowledge base service
+Owns the RAGAnything instance (LLM, vision and embeddings served by Ollama),
+converts OCR job results into RAGAnything content lists and ingests them
+through a bounded, batching background queue
+"""
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.jobs import job_store, JobStatus, JobStep, QueueFullError
+from app.core.ollama_client import ollama_client
+from app.models.schemas import decode_columnar_layout
+
+logger = logging.getLogger(__name__)
+
+# Try to import RAG-Anything (and LightRAG, which it builds on)
+try:
+    import numpy as np
+    from lightrag import QueryParam
+    from lightrag.utils import EmbeddingFunc
+    from raganything import RAGAnything, RAGAnythingConfig
+    RAGANYTHING_AVAILABLE = True
+except ImportError:
+    RAGANYTHING_AVAILABLE = False
+    logger.warning("raganything not available. Install with: pip install raganything")
+
+# Token limit passed to LightRAG for embedding inputs
+EMBED_MAX_TOKEN_SIZE = 8192
+
+# System prompt for answering from a retrieved context (older LightRAG only)
+RAG_ANSWER_PROMPT = """Answer the user's question using only the knowledge base context below.
+If the context does not contain the answer, say so. Answer in the language of the question.
+
+---Context---
+{context}"""
+
+
+def build_content_list(result: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Convert an OCR job result into a RAGAnything content list
+
+    Layout blocks become text items (headings with ``text_level``) and table
+    items in reading order. AI-enhanced text, when present, replaces the
+    OCR text blocks since it has corrected spelling and tone marks.
+
+    Args:
+        result: OCR result dict (as stored by the job store)
+
+    Returns:
+        Content list items with ``page_idx`` (0-based)
+    """
+    layout = result.get("layout") or {}
+    if layout.get("format") == "columnar":
+        layout = decode_columnar_layout(layout)
+    enhanced_text = (result.get("enhancedText") or "").strip()
+
+    text_items: List[Dict[str, Any]] = []
+    content_list: List[Dict[str, Any]] = []
+    for page in layout.get("pages", []):
+        page_idx = max(0, page.get("page", 1) - 1)
+        for block in page.get("blocks", []):
+            text = (block.get("text") or "").strip()
+            if not text:
+                continue
+            block_type = block.get("type", "text")
+            if block_type == "table":
+                content_list.append({
+                    "type": "table",
+                    "table_body": text,
+                    "table_caption": [],
+                    "table_footnote": [],
+                    "page_idx": page_idx
+                })
+                continue
+            item = {"type": "text", "text": text, "page_idx": page_idx}
+            if block_type == "heading":
+                item["text_level"] = 1
+            text_items.append(item)
+            if not enhanced_text:
+                content_list.append(item)
+
+    if enhanced_text:
+        content_list.insert(0, {"type": "text", "text": enhanced_text, "page_idx": 0})
+    elif not text_items:
+        # No usable layout: fall back to per-page text
+        pages = [
+            {"type": "text", "text": page["text"].strip(), "page_idx": max(0, page.get("page", 1) - 1)}
+            for page in result.get("pages", []) if (page.get("text") or "").strip()
+        ]
+        if not pages and (result.get("fullText") or "").strip():
+            pages = [{"type": "text", "text": result["fullText"].strip(), "page_idx": 0}]
+        content_list = pages + content_list
+
+    structured = result.get("structured") or {}
+    if not any(item["type"] == "table" for item in content_list):
+        for table in structured.get("tables", []):
+            if table.get("data"):
+                content_list.append({
+                    "type": "table",
+                    "table_body": table["data"],
+                    "table_caption": [table["name"]] if table.get("name") else [],
+                    "table_footnote": [],
+                    "page_idx": max(0, table.get("page", 1) - 1)
+                })
+    for equation in structured.get("equations", []):
+        latex = equation.get("latex") or equation.get("text")
+        if latex:
+            content_list.append({
+                "type": "equation",
+                "latex": latex,
+                "text": equation.get("text", latex),
+                "page_idx": max(0, equation.get("page", 1) - 1)
+            })
+
+    return content_list
+
+
+async def _llm_complete(
+    prompt: str,
+    system_prompt: Optional[str] = None,
+    history_messages: Optional[List[Dict[str, Any]]] = None,
+    **kwargs
+) -> str:
+    """LightRAG LLM function on the Ollama chat model"""
+    messages = []
+    if system_prompt:
+        messages.append({"role": "system", "content": system_prompt})
+    messages.extend(history_messages or [])
+    messages.append({"role": "user", "content": prompt})
+    response = await ollama_client.chat(messages)
+    return response.get("message", {}).get("content", "")
+
+
+def _to_ollama_messages(messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Convert OpenAI-style multimodal messages to Ollama chat messages"""
+    converted = []
+    for message in messages:
+        content = message.get("content")
+        if not isinstance(content, list):
+            converted.append({"role": message.get("role", "user"), "content": content or ""})
+            continue
+        texts = []
+        images = []
+        for part in content:
+            if part.get("type") == "text":
+                texts.append(part.get("text", ""))
+            elif part.get("type") == "image_url":
+                url = part.get("image_url", {}).get("url", "")
+                # Ollama takes bare base64, not data URLs
+                images.append(url.split(",", 1)[1] if url.startswith("data:") else url)
+        item: Dict[str, Any] = {"role": message.get("role", "user"), "content": "\n".join(texts)}
+        if images:
+            item["images"] = images
+        converted.append(item)
+    return converted
+
+
+async def _vision_complete(
+    prompt: str,
+    system_prompt: Optional[str] = None,
+    history_messages: Optional[List[Dict[str, Any]]] = None,
+    image_data: Optional[str] = None,
+    messages: Optional[List[Dict[str, Any]]] = None,
+    **kwargs
+) -> str:
+    """RAGAnything vision function on the Ollama vision model"""
+    if messages:
+        chat_messages = _to_ollama_messages(messages)
+    elif image_data:
+        chat_messages = []
+        if system_prompt:
+            chat_messages.append({"role": "system", "content": system_prompt})
+        chat_messages.extend(history_messages or [])
+        chat_messages.append({"role": "user", "content": prompt, "images": [image_data]})
+    else:
+        return await _llm_complete(prompt, system_prompt, history_messages, **kwargs)
+
+    response = await ollama_client.chat(chat_messages, model=settings.OLLAMA_VISION_MODEL)
+    return response.get("message", {}).get("content", "")
+
+
+async def _embed(texts: List[str]) -> "np.ndarray":
+    """LightRAG embedding function on the Ollama embedding model"""
+    return np.array(await ollama_client.embed(texts), dtype=np.float32)
+
+
+@dataclass
+class IngestItem:
+    """A document waiting in the ingest queue"""
+    job_id: str  # Ingest job tracking progress
+    doc_id: str
+    file_path: str  # Source reference stored with the chunks
+    content_list: List[Dict[str, Any]]
+
+    @property
+    def text_only(self) -> bool:
+        """Whether the document has no tables, images or equations"""
+        return all(item.get("type") == "text" for item in self.content_list)
+
+    @property
+    def text(self) -> str:
+        """Text items joined as RAGAnything does before inserting them"""
+        return "\n\n".join(item["text"] for item in self.content_list if item.get("type") == "text")
+
+    @property
+    def chars(self) -> int:
+        """Text size, used to decide what can share an insert"""
+        return sum(len(item.get("text") or item.get("table_body") or "") for item in self.content_list)
+
+
+class RagIngestQueue:
+    """
+    Bounded ingest queue with one worker that batches small documents
+
+    Every LightRAG insert ends with a flush of the graph and vector
+    storages, so small text-only documents arriving close together are
+    combined into one insert (up to ``batch_size`` documents and
+    ``batch_max_chars`` characters). Documents with tables or equations,
+    or large ones, go through ``insert_content_list`` on their own.
+    Progress is tracked on an ingest job in the job store.
+    """
+
+    def __init__(
+        self,
+        service: "RAGService",
+        max_queue_size: int = 20,
+        batch_size: int = 8,
+        batch_max_chars: int = 200_000,
+        batch_window: float = 2.0
+    ):
+        """
+        Initialize queue
+
+        Args:
+            service: Service providing the RAGAnything instance
+            max_queue_size: Max waiting documents before submit() is rejected
+            batch_size: Max documents per combined insert
+            batch_max_chars: Max text characters per combined insert
+            batch_window: Seconds to wait for more documents to batch
+        """
+        self.service = service
+        self.max_queue_size = max(1, max_queue_size)
+        self.batch_size = max(1, batch_size)
+        self.batch_max_chars = batch_max_chars
+        self.batch_window = batch_window
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker_task: Optional[asyncio.Task] = None
+        self._running = 0
+        self._ingested = 0
+        self._failed = 0
+        self._inserts = 0
+
+    def start(self):
+        """Start the worker on the running event loop"""
+        self._ensure_started()
+
+    def _ensure_started(self):
+        """Create queue and worker if not running yet"""
+        if self._worker_task is not None and not self._worker_task.done():
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._worker_task = asyncio.create_task(self._worker_loop())
+        logger.info(f"Started RAG ingest queue (size {self.max_queue_size}, batch {self.batch_size})")
+
+    async def stop(self):
+        """Stop the worker and fail the ingest jobs of unfinished documents"""
+        if self._worker_task is not None:
+            self._worker_task.cancel()
+            try:
+                await self._worker_task
+            except asyncio.CancelledError:
+                pass
+            self._worker_task = None
+        
+        # Jobs left queued would stay QUEUED forever (and survive restarts
+        # with a persistent job store)
+        cancelled = 0
+        while self._queue is not None and not self._queue.empty():
+            self._cancel(self._queue.get_nowait())
+            cancelled += 1
+        if cancelled:
+            logger.info(f"Cancelled {cancelled} queued RAG ingestion(s) on shutdown")
+
+    @staticmethod
+    def _cancel(item: IngestItem):
+        """Mark a document's ingest job as cancelled by shutdown"""
+        job_store.update_job(item.job_id, status=JobStatus.ERROR, step=JobStep.DONE,
+                             message="Ingestion cancelled by shutdown",
+                             error="Ingestion cancelled by shutdown")
+
+    def submit(self, item: IngestItem):
+        """
+        Queue a document for ingestion
+
+        Args:
+            item: Document to ingest (its ingest job must exist)
+
+        Raises:
+            QueueFullError: If the queue is at capacity
+        """
+        self._ensure_started()
+        if self._queue.full():
+            raise QueueFullError(max(1, int(self.batch_window)))
+        self._queue.put_nowait(item)
+        job_store.update_job(item.job_id, status=JobStatus.QUEUED,
+                             message=f"Queued for ingestion at position {self._queue.qsize()}")
+
+    def _batchable(self, item: IngestItem) -> bool:
+        return item.text_only and item.chars <= self.batch_max_chars
+
+    async def _worker_loop(self):
+        """Collect batches off the queue and insert them"""
+        loop = asyncio.get_event_loop()
+        carry: Optional[IngestItem] = None
+        batch: List[IngestItem] = []
+        try:
+            while True:
+                first = carry or await self._queue.get()
+                carry = None
+                batch = [first]
+
+                if self._batchable(first):
+                    deadline = loop.time() + self.batch_window
+                    chars = first.chars
+                    while len(batch) < self.batch_size:
+                        timeout = deadline - loop.time()
+                        if timeout <= 0:
+                            break
+                        try:
+                            item = await asyncio.wait_for(self._queue.get(), timeout)
+                        except asyncio.TimeoutError:
+                            break
+                        if not self._batchable(item) or chars + item.chars > self.batch_max_chars:
+                            carry = item
+                            break
+                        batch.append(item)
+                        chars += item.chars
+
+                self._running = len(batch)
+                try:
+                    await self._ingest(batch)
+                except Exception as e:
+                    logger.error(f"RAG ingestion of {len(batch)} documents failed: {e}", exc_info=True)
+                    self._failed += len(batch)
+                    for item in batch:
+                        job_store.update_job(item.job_id, status=JobStatus.ERROR, step=JobStep.DONE,
+                                             message="Ingestion failed", error=str(e))
+                finally:
+                    self._running = 0
+                    for _ in batch:
+                        self._queue.task_done()
+                batch = []
+        except asyncio.CancelledError:
+            # Documents already taken off the queue but not ingested
+            for item in batch + ([carry] if carry else []):
+                self._cancel(item)
+            raise
+
+    async def _ingest(self, batch: List[IngestItem]):
+        """Insert one batch into the knowledge base"""
+        for item in batch:
+            others = f" with {len(batch) - 1} other documents" if len(batch) > 1 else ""
+            job_store.update_job(item.job_id, status=JobStatus.RUNNING, step=JobStep.INDEX, percent=30,
+                                 message=f"Indexing {item.doc_id}{others}")
+
+        rag = await self.service.get_rag()
+        if len(batch) == 1:
+            item = batch[0]
+            await rag.insert_content_list(
+                content_list=item.content_list,
+                file_path=item.file_path,
+                doc_id=item.doc_id,
+                display_stats=False
+            )
+        else:
+            # One pipeline run (and storage flush) for the whole batch
+            await rag.lightrag.ainsert(
+                [item.text for item in batch],
+                ids=[item.doc_id for item in batch],
+                file_paths=[item.file_path for item in batch]
+            )
+
+        self._inserts += 1
+        self._ingested += len(batch)
+        logger.info(f"Ingested {len(batch)} document(s) into the knowledge base")
+        for item in batch:
+            job_store.update_job(item.job_id, status=JobStatus.DONE, step=JobStep.DONE, percent=100,
+                                 message=f"Ingested {item.doc_id}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get queue statistics"""
+        return {
+            "queued": self._queue.qsize() if self._queue else 0,
+            "running": self._running,
+            "maxQueueSize": self.max_queue_size,
+            "ingested": self._ingested,
+            "failed": self._failed,
+            "inserts": self._inserts
+        }
+
+
+class RAGService:
+    """
+    Long-lived RAGAnything instance and its ingest queue
+
+    The instance is created once (at startup via start(), or on first use)
+    so storages, indexes and tokenizers are loaded once per process.
+    """
+
+    def __init__(self):
+        self._rag: Optional["RAGAnything"] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self.ingest_queue = RagIngestQueue(
+            self,
+            max_queue_size=settings.RAG_INGEST_QUEUE_SIZE,
+            batch_size=settings.RAG_INGEST_BATCH_SIZE,
+            batch_max_chars=settings.RAG_INGEST_BATCH_MAX_CHARS,
+            batch_window=settings.RAG_INGEST_BATCH_WINDOW
+        )
+
+    async def get_rag(self) -> "RAGAnything":
+        """
+        Get the RAGAnything instance, creating it and its storages on first use
+
+        Raises:
+            RuntimeError: If raganything is not installed or initialization fails
+        """
+        if not RAGANYTHING_AVAILABLE:
+            raise RuntimeError("raganything is not installed")
+        if self._rag is not None:
+            return self._rag
+
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if self._rag is None:
+                working_dir = settings.RAG_WORKING_DIR or settings.STORAGE_DIR / "rag"
+                working_dir.mkdir(parents=True, exist_ok=True)
+                rag = RAGAnything(
+                    config=RAGAnythingConfig(
+                        working_dir=str(working_dir),
+                        parser=settings.DEFAULT_PARSER,
+                        parse_method=settings.DEFAULT_PARSE_METHOD
+                    ),
+                    llm_model_func=_llm_complete,
+                    vision_model_func=_vision_complete,
+                    embedding_func=EmbeddingFunc(
+                        embedding_dim=settings.OLLAMA_EMBED_DIM,
+                        max_token_size=EMBED_MAX_TOKEN_SIZE,
+                        func=_embed
+                    )
+                )
+                status = await rag._ensure_lightrag_initialized()
+                if isinstance(status, dict) and not status.get("success", True):
+                    raise RuntimeError(f"RAGAnything initialization failed: {status.get('error')}")
+                self._rag = rag
+                logger.info(f"Initialized RAGAnything (working dir {working_dir})")
+        return self._rag
+
+    @property
+    def initialized(self) -> bool:
+        """Whether the RAGAnything instance is loaded"""
+        return self._rag is not None
+
+    async def start(self):
+        """Load the knowledge base and start the ingest worker"""
+        self.ingest_queue.start()
+        if not RAGANYTHING_AVAILABLE:
+            return
+        try:
+            await self.get_rag()
+        except Exception as e:
+            logger.error(f"RAGAnything initialization failed, retrying on first use: {e}")
+
+    async def query(self, question: str, mode: str = "hybrid", vlm_enhanced: bool = False) -> Tuple[str, List[Dict[str, Any]]]:
+        """
+        Answer a question from the knowledge base
+
+        The knowledge base is searched once and the answer is generated from
+        that retrieval, so the returned chunks are the ones the answer used.
+        VLM-enhanced queries let RAGAnything retrieve (it has to look at the
+        images itself); the chunks are fetched afterwards, when keyword
+        extraction and embeddings are already cached.
+
+        Args:
+            question: Question to answer
+            mode: LightRAG query mode (hybrid|local|global|naive|mix)
+            vlm_enhanced: Let the vision model look at images in the retrieved context
+
+        Returns:
+            (answer, retrieved chunks)
+        """
+        rag = await self.get_rag()
+        lightrag = rag.lightrag
+        if vlm_enhanced:
+            answer = await rag.aquery_vlm_enhanced(question, mode=mode)
+            return answer, await self._retrieve(lightrag, question, mode)
+
+        if hasattr(lightrag, "aquery_llm"):
+            # One retrieval returning both the structured context and the answer
+            result = await lightrag.aquery_llm(question, param=QueryParam(mode=mode))
+            answer = (result.get("llm_response") or {}).get("content") or ""
+            return answer, self._chunks(result)
+
+        # Older LightRAG: fetch the assembled context, then answer from it
+        context = await lightrag.aquery(question, param=QueryParam(mode=mode, only_need_context=True))
+        if not context:
+            return "", []
+        answer = await _llm_complete(question, system_prompt=RAG_ANSWER_PROMPT.format(context=context))
+        return answer, [{"content": context}]
+
+    @staticmethod
+    def _chunks(result: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Extract the chunks from a LightRAG structured query result"""
+        chunks = (result.get("data") or {}).get("chunks") or []
+        return [
+            {
+                "content": chunk.get("content", ""),
+                "filePath": chunk.get("file_path"),
+                "chunkId": chunk.get("chunk_id")
+            }
+            for chunk in chunks
+        ]
+
+    async def _retrieve(self, lightrag: Any, question: str, mode: str) -> List[Dict[str, Any]]:
+        """Retrieve the chunks for a query without generating an answer"""
+        if hasattr(lightrag, "aquery_data"):
+            return self._chunks(await lightrag.aquery_data(question, param=QueryParam(mode=mode)))
+
+        # Older LightRAG only returns the assembled context text
+        context = await lightrag.aquery(question, param=QueryParam(mode=mode, only_need_context=True))
+        return [{"content": context}] if context else []
+
+    async def shutdown(self):
+        """Stop ingestion and flush the knowledge base storages"""
+        await self.ingest_queue.stop()
+        if self._rag is not None and self._rag.lightrag is not None:
+            await self._rag.lightrag.finalize_storages()
+        self._rag = None
+
+
+# Global RAG service instance
+rag_service = RAGService()
@@ -2,28 +2,48 @@
 Document processing engine using Docling
 """
 import asyncio
+import hashlib
+import json
 import logging
+import sys
 import time
 from pathlib import Path
-from typing import Dict, Any, Optional, List
+from typing import Callable, Dict, Any, Optional, List, Tuple
 
 from app.core.config import settings
+from app.core.disk_cache import DiskLRUCache
+from app.core.docling_extractor import (
+    build_lines_from_text, convert_and_extract, merge_shard_results
+)
 from app.core.jobs import job_store, JobStatus, JobStep
+from app.models.schemas import encode_columnar_layout
+from app.utils.text import detect_vietnamese_script
 
 logger = logging.getLogger(__name__)
 
+# Bump when the result format changes so stale cache entries are ignored
+RESULT_CACHE_VERSION = 2
+
 # Try to import docling
 try:
     from docling.document_converter import DocumentConverter
     from docling.datamodel.base_models import InputFormat
+    from app.core.docling_pool import DoclingProcessPool
     DOCLING_AVAILABLE = True
 except ImportError:
     DOCLING_AVAILABLE = False
     logger.warning("Docling not available. Using simulation mode.")
 
+# Try to import pypdfium2 (installed with Docling) for cheap PDF page counts
+try:
+    import pypdfium2 as pdfium
+    PDFIUM_AVAILABLE = True
+except ImportError:
+    PDFIUM_AVAILABLE = False
+
 # Try to import AI provider manager
 try:
-    from app.core.ai_providers.provider_manager import AIProviderManager
+    from app.core.ai_providers.provider_manager import AIProviderManager, get_provider_manager, PROMPT_VERSION
     AI_ENHANCEMENT_AVAILABLE = True
 except ImportError:
     AI_ENHANCEMENT_AVAILABLE = False
@@ -41,9 +61,14 @@ except ImportError:
 class DocumentEngine:
     def __init__(self):
         self.converter = None
-        self.ai_provider_manager = None
-        
-        if DOCLING_AVAILABLE:
+        self.docling_pool: Optional["DoclingProcessPool"] = None
+        self.result_cache: Optional[DiskLRUCache] = None
+        
+        if DOCLING_AVAILABLE and settings.DOCLING_EXECUTION_MODE == "process":
+            # Converters live in worker processes; none is loaded in the API process
+            self.docling_pool = DoclingProcessPool(settings.DOCLING_PROCESS_WORKERS)
+            logger.info(f"Docling configured for process-pool execution ({settings.DOCLING_PROCESS_WORKERS} workers)")
+        elif DOCLING_AVAILABLE:
             try:
                 # Initialize converter with default settings
                 # Docling will automatically OCR everything it can
@@ -53,26 +78,121 @@ class DocumentEngine:
                 logger.error(f"Failed to initialize Docling converter: {e}")
                 self.converter = None
         
-        # Initialize AI provider manager if enabled
-        if settings.AI_ENHANCEMENT_ENABLED and AI_ENHANCEMENT_AVAILABLE:
-            try:
-                self.ai_provider_manager = AIProviderManager()
-                logger.info("AI Provider Manager initialized successfully")
-            except Exception as e:
-                logger.error(f"Failed to initialize AI Provider Manager: {e}")
-                self.ai_provider_manager = None
+        # Initialize result cache if enabled
+        if settings.RESULT_CACHE_ENABLED:
+            self.result_cache = DiskLRUCache(
+                settings.CACHE_DIR / "results",
+                max_bytes=settings.RESULT_CACHE_MAX_BYTES,
+                name="result"
+            )
+
+    @property
+    def ai_provider_manager(self) -> Optional["AIProviderManager"]:
+        """Shared AI provider manager (created on first use), or None if enhancement is off"""
+        if not (settings.AI_ENHANCEMENT_ENABLED and AI_ENHANCEMENT_AVAILABLE):
+            return None
+        try:
+            return get_provider_manager()
+        except Exception as e:
+            logger.error(f"Failed to initialize AI Provider Manager: {e}")
+            return None
+
+    @property
+    def docling_ready(self) -> bool:
+        """Whether Docling conversions can be run"""
+        return DOCLING_AVAILABLE and (self.converter is not None or self.docling_pool is not None)
+
+    async def start(self):
+        """Warm up converter workers (called from the app lifespan)"""
+        if self.docling_pool:
+            await self.docling_pool.warm_up()
+
+    async def shutdown(self):
+        """Release converter workers (called from the app lifespan)"""
+        if self.docling_pool:
+            self.docling_pool.shutdown()
+
+    def _enhancement_stream(self, job_id: str) -> Optional[Callable[[Dict[str, Any]], None]]:
+        """Callback publishing streamed enhanced text as `enhancement` job events"""
+        if not settings.AI_ENHANCEMENT_STREAMING:
+            return None
+        return lambda event: job_store.publish_event(job_id, "enhancement", event)
 
+    def _enhancement_fingerprint(self) -> str:
+        """
+        Describe the server-side AI enhancement config that shapes a result
+        
+        Covers whether enhancement runs, the loaded providers with their
+        models, the routing order, vision use and the prompt version, so
+        results built under another config are not served from the cache.
+        """
+        provider_manager = self.ai_provider_manager
+        if provider_manager is None:
+            return "off"
+        providers = sorted(
+            (name, provider.model, provider.vision_model or "")
+            for name, provider in provider_manager.providers.items()
+        )
+        config = {
+            "providers": providers,
+            "priority": settings.AI_PROVIDER_PRIORITY,
+            "routing": settings.AI_ROUTING_POLICY,
+            "vision": settings.AI_USE_VISION_WHEN_AVAILABLE,
+            "prompt": PROMPT_VERSION
+        }
+        return json.dumps(config, sort_keys=True, separators=(",", ":"), default=str)
+
+    def _result_cache_key(self, file_hash: str, file_path: Path, settings_dict: Dict[str, Any]) -> str:
+        """
+        Build result cache key from upload hash, canonical OCR settings and
+        the enhancement config
+        
+        The file extension is part of the key because it selects the parser.
+        """
+        canonical_settings = json.dumps(settings_dict, sort_keys=True, separators=(",", ":"), default=str)
+        key_source = (
+            f"v{RESULT_CACHE_VERSION}|{file_hash}|{file_path.suffix.lower()}|{canonical_settings}"
+            f"|{self._enhancement_fingerprint()}"
+        )
+        return hashlib.sha256(key_source.encode("utf-8")).hexdigest()
         
     async def process_document(
         self,
         job_id: str,
         file_path: Path,
-        settings_dict: Dict[str, Any]
+        settings_dict: Dict[str, Any],
+        file_hash: Optional[str] = None
     ) -> Dict[str, Any]:
-        """Process document with Docling or simulation"""
+        """
+        Process document with Docling or simulation
+        
+        Args:
+            job_id: Job ID to report progress on
+            file_path: Path to the uploaded file
+            settings_dict: OCR settings
+            file_hash: SHA-256 of the upload; enables the result cache when given
+        """
         start_time = time.time()
+        loop = asyncio.get_event_loop()
         
         try:
+            # Serve identical uploads with identical settings from the result cache
+            cache_key = None
+            if self.result_cache and file_hash:
+                cache_key = self._result_cache_key(file_hash, file_path, settings_dict)
+                cached_result = await loop.run_in_executor(None, self.result_cache.get, cache_key)
+                if cached_result is not None:
+                    logger.info(f"Result cache hit for job {job_id}")
+                    await job_store.complete_job(job_id, cached_result, status=JobStatus.DONE,
+                                                 step=JobStep.DONE, percent=100,
+                                                 message="Processing complete (cached)")
+                    return {
+                        "jobId": job_id,
+                        "status": "done",
+                        "result": cached_result,
+                        "error": None
+                    }
+            
             # Update job status
             job_store.update_job(job_id, status=JobStatus.RUNNING, step=JobStep.PREPROCESS, 
                                percent=10, message="Preprocessing document...")
@@ -89,11 +209,15 @@ class DocumentEngine:
             file_ext = file_path.suffix.lower()
             text_extensions = ['.txt', '.md', '.csv', '.json', '.xml', '.html']
             
+            # False once a requested AI enhancement fails, so the result is not cached
+            enhancement_ok = True
+            
             # Try to use Docling if available for non-text files
             if file_ext in text_extensions:
                 # Direct text file processing
                 result = await self._process_text_file(job_id, file_path, settings_dict)
-            elif DOCLING_AVAILABLE and self.converter:
+                enhancement_ok = result.pop("enhancementOk", True)
+            elif self.docling_ready:
                 try:
                     result = await self._process_with_docling(job_id, file_path, settings_dict)
                 except Exception as e:
@@ -101,6 +225,7 @@ class DocumentEngine:
                     # For text files, try direct reading as fallback
                     if file_ext in text_extensions:
                         result = await self._process_text_file(job_id, file_path, settings_dict)
+                        enhancement_ok = result.pop("enhancementOk", True)
                     else:
                         raise ValueError(f"OCR processing failed: {str(e)}")
             else:
@@ -133,13 +258,21 @@ class DocumentEngine:
                     logger.info(f"Full text length: {len(full_text)}, target_language: {target_language}")
                     
                     if full_text:
+                        # One scan, passed on to the Vietnamese processor
+                        script = detect_vietnamese_script(full_text)
+                        logger.info(
+                            f"Vietnamese diacritics: {script.diacritic_count} "
+                            f"({script.density:.2f} per word)"
+                        )
+                        
                         # Vietnamese processing (if requested)
                         if VIETNAMESE_PROCESSOR_AVAILABLE and target_language == "vi":
                             logger.info("Applying Vietnamese text processing...")
                             full_text = vietnamese_processor.process_vietnamese_text(
                                 full_text,
                                 restore_tones=True,
-                                normalize=True
+                                normalize=True,
+                                script=script
                             )
                             # Update result with processed text
                             result["result"]["fullText"] = full_text
@@ -157,11 +290,13 @@ class DocumentEngine:
                                 logger.warning(f"Could not read image for vision enhancement: {e}")
                         
                         # Enhance text with AI (includes language translation if needed)
+                        enhancement_ok = False
                         enhancement_result = await self.ai_provider_manager.enhance_text(
                             text=full_text,
                             document_type=document_type,
                             image_data=image_data,
-                            target_language=target_language
+                            target_language=target_language,
+                            on_delta=self._enhancement_stream(job_id)
                         )
                         
                         logger.info(f"Got enhancement result: {enhancement_result}")
@@ -178,8 +313,13 @@ class DocumentEngine:
                                 "processingTimeMs": enhancement_result.processing_time_ms,
                                 "improvements": enhancement_result.improvements,
                                 "fallbackOccurred": enhancement_result.fallback_occurred,
+                                "error": enhancement_result.error,
+                                "cached": enhancement_result.cached,
                                 "targetLanguage": target_language
                             }
+                            enhancement_ok = (
+                                enhancement_result.provider_used != "none" and not enhancement_result.error
+                            )
                             
                             logger.info(f"AI enhancement completed with {enhancement_result.provider_used}")
                             logger.info(f"Enhanced text length: {len(enhancement_result.enhanced_text)}")
@@ -193,9 +333,18 @@ class DocumentEngine:
                     logger.exception("Full traceback:")
                     # Continue without enhancement - don't fail the whole job
             
+            # Compact columnar layout on request (JSON layout stays the default)
+            if settings_dict.get("layoutFormat") == "columnar" and result.get("result", {}).get("layout"):
+                result["result"]["layout"] = encode_columnar_layout(result["result"]["layout"])
+            
+            # Cache the result only if a requested AI enhancement succeeded, so a
+            # transient provider outage or crash is not frozen into the cache
+            if cache_key and enhancement_ok:
+                await loop.run_in_executor(None, self.result_cache.set, cache_key, result["result"])
+            
             # Update job as done
-            job_store.update_job(job_id, status=JobStatus.DONE, step=JobStep.DONE, 
-                               percent=100, message="Processing complete", result=result)
+            await job_store.complete_job(job_id, result.get("result") or {}, status=JobStatus.DONE,
+                                         step=JobStep.DONE, percent=100, message="Processing complete")
             
             return result
             
@@ -219,399 +368,117 @@ class DocumentEngine:
         
         logger.info(f"Starting Docling conversion for: {file_path}")
         
-        # Run Docling conversion in thread pool to avoid blocking
+        # Planning opens the PDF to count its pages; keep that off the event loop
         loop = asyncio.get_event_loop()
-        result = await loop.run_in_executor(
-            None, 
-            lambda: self.converter.convert(str(file_path))
-        )
+        page_ranges = await loop.run_in_executor(None, self._plan_page_shards, file_path, settings_dict)
+        
+        if len(page_ranges) <= 1:
+            page_range = page_ranges[0] if page_ranges else None
+            result_data = await self._convert_range(file_path, settings_dict, page_range)
+        else:
+            # Convert page shards in parallel across converter workers
+            concurrency = self.docling_pool.workers
+            semaphore = asyncio.Semaphore(concurrency)
+            completed = 0
+            
+            async def convert_shard(page_range):
+                nonlocal completed
+                async with semaphore:
+                    shard_result = await self._convert_range(file_path, settings_dict, page_range)
+                completed += 1
+                job_store.update_job(job_id, percent=40 + int(40 * completed / len(page_ranges)),
+                                   message=f"Converted pages {page_range[0]}-{page_range[1]} "
+                                           f"({completed}/{len(page_ranges)} shards)")
+                return page_range[0], shard_result
+            
+            logger.info(f"Converting {file_path.name} in {len(page_ranges)} page shards (concurrency {concurrency})")
+            shard_results = await asyncio.gather(*[convert_shard(r) for r in page_ranges])
+            result_data = merge_shard_results(shard_results)
         
-        logger.info(f"Docling conversion completed, extracting content...")
+        logger.info(f"Docling conversion completed")
         
         # Update progress
         job_store.update_job(job_id, step=JobStep.POSTPROCESS, percent=80, 
                            message="Building output...")
         
-        # Extract text and structure from Docling result
-        doc = result.document
-        
-        # Get full text - try multiple methods to ensure we get EVERYTHING
-        full_text = ""
-        if hasattr(doc, 'export_to_text'):
-            # Export with all content including headers/footers
-            full_text = doc.export_to_text()
-        elif hasattr(doc, 'text'):
-            full_text = doc.text
-        else:
-            # Try to extract from body/content
-            full_text = str(doc)
-        
-        # Also try to get text from all items (including headers/footers)
-        if hasattr(doc, 'iterate_items'):
-            try:
-                all_text_parts = []
-                for item, level in doc.iterate_items():
-                    if hasattr(item, 'text') and item.text:
-                        all_text_parts.append(item.text)
-                
-                # If we got more text from items, use that
-                items_text = '\n'.join(all_text_parts)
-                if len(items_text) > len(full_text):
-                    logger.info(f"Using items text ({len(items_text)} chars) instead of export ({len(full_text)} chars)")
-                    full_text = items_text
-            except Exception as e:
-                logger.warning(f"Could not iterate items: {e}")
-        
-        logger.info(f"Extracted text length: {len(full_text)} chars")
-        
-        # Get markdown
-        markdown_text = ""
-        if hasattr(doc, 'export_to_markdown'):
-            markdown_text = doc.export_to_markdown()
-        else:
-            markdown_text = full_text
-        
-        # Build pages - try to get page-level content
-        pages = []
-        page_count = 1
-        
-        # Try different ways to get pages
-        if hasattr(doc, 'pages') and doc.pages:
-            page_count = len(doc.pages)
-            for i, page in enumerate(doc.pages):
-                page_text = ""
-                if hasattr(page, 'export_to_text'):
-                    page_text = page.export_to_text()
-                elif hasattr(page, 'text'):
-                    page_text = page.text
-                else:
-                    page_text = str(page)
-                pages.append({
-                    "page": i + 1,
-                    "text": page_text,
-                    "confidence": 0.95
-                })
-        elif hasattr(doc, 'num_pages'):
-            page_count = doc.num_pages
-            # Split text evenly across pages as fallback
-            if page_count > 1:
-                lines = full_text.split('\n')
-                lines_per_page = max(1, len(lines) // page_count)
-                for i in range(page_count):
-                    start = i * lines_per_page
-                    end = start + lines_per_page if i < page_count - 1 else len(lines)
-                    page_text = '\n'.join(lines[start:end])
-                    pages.append({
-                        "page": i + 1,
-                        "text": page_text,
-                        "confidence": 0.95
-                    })
-            else:
-                pages = [{"page": 1, "text": full_text, "confidence": 0.95}]
-        else:
-            pages = [{"page": 1, "text": full_text, "confidence": 0.95}]
-        
-        logger.info(f"Extracted {len(pages)} pages")
-        
-        # Build structured data
-        tables = []
-        if hasattr(doc, 'tables') and doc.tables:
-            for i, table in enumerate(doc.tables):
-                table_data = str(table)
-                if hasattr(table, 'export_to_dataframe'):
-                    try:
-                        df = table.export_to_dataframe()
-                        table_data = df.to_string()
-                    except:
-                        pass
-                tables.append({
-                    "id": f"table-{i+1}",
-                    "name": f"Table {i+1}",
-                    "data": table_data
-                })
-        
-        # Build layout with actual bounding boxes from Docling
-        layout_pages = self._extract_layout_from_docling(doc, pages, full_text)
-        
         return {
             "jobId": job_id,
             "status": "done",
-            "result": {
-                "fullText": full_text,
-                "markdownText": markdown_text,
-                "layoutText": full_text,
-                "pages": pages,
-                "structured": {
-                    "tables": tables,
-                    "equations": [],
-                    "images": []
-                },
-                "layout": {
-                    "pages": layout_pages
-                },
-                "meta": {
-                    "parser": "docling",
-                    "parse_method": settings_dict.get("parse_method", "auto"),
-                    "language": settings_dict.get("language", "auto"),
-                    "pageCount": len(pages),
-                    "avgConfidence": 0.95,
-                    "timings": {
-                        "parseMs": 0,
-                        "postMs": 100
-                    }
-                }
-            },
+            "result": result_data,
             "error": None
         }
 
-    def _extract_layout_from_docling(
+    async def _convert_range(
         self,
-        doc: Any,
-        pages: List[Dict],
-        full_text: str
-    ) -> List[Dict[str, Any]]:
-        """Extract detailed layout with bounding boxes from Docling document"""
-        layout_pages = []
+        file_path: Path,
+        settings_dict: Dict[str, Any],
+        page_range: Optional[Tuple[int, int]] = None
+    ) -> Dict[str, Any]:
+        """Convert a document or page range in a worker process or the thread pool"""
+        if self.docling_pool:
+            return await self.docling_pool.convert(file_path, settings_dict, page_range)
         
-        try:
-            # Try to get document items with bounding boxes
-            doc_items = []
-            page_dimensions = {}
-            
-            # Method 1: Try to get items from document body
-            if hasattr(doc, 'body') and doc.body:
-                for item in doc.body:
-                    doc_items.append(item)
-            
-            # Method 2: Try iterate_items method
-            if not doc_items and hasattr(doc, 'iterate_items'):
-                try:
-                    for item, level in doc.iterate_items():
-                        doc_items.append(item)
-                except:
-                    pass
-            
-            # Method 3: Try to get from pages directly
-            if hasattr(doc, 'pages') and doc.pages:
-                for page_no, page in enumerate(doc.pages):
-                    page_num = page_no + 1
-                    page_width = getattr(page, 'width', 1.0) or 1.0
-                    page_height = getattr(page, 'height', 1.414) or 1.414
-                    page_dimensions[page_num] = (page_width, page_height)
-                    
-                    # Try to get items from page
-                    if hasattr(page, 'items'):
-                        for item in page.items:
-                            if not hasattr(item, 'page_no'):
-                                item.page_no = page_num
-                            doc_items.append(item)
-            
-            # Group items by page
-            items_by_page = {}
-            for item in doc_items:
-                page_no = getattr(item, 'page_no', 1) or 1
-                if page_no not in items_by_page:
-                    items_by_page[page_no] = []
-                items_by_page[page_no].append(item)
-            
-            # Build layout pages
-            num_pages = max(len(pages), max(items_by_page.keys()) if items_by_page else 1)
-            
-            for page_num in range(1, num_pages + 1):
-                page_width, page_height = page_dimensions.get(page_num, (1.0, 1.414))
-                
-                blocks = []
-                page_items = items_by_page.get(page_num, [])
-                
-                for idx, item in enumerate(page_items):
-                    # Extract text
-                    item_text = ""
-                    if hasattr(item, 'text'):
-                        item_text = item.text
-                    elif hasattr(item, 'export_to_text'):
-                        item_text = item.export_to_text()
-                    else:
-                        item_text = str(item)
-                    
-                    if not item_text or not item_text.strip():
-                        continue
-                    
-                    # Extract bounding box
-                    bbox = self._extract_bbox(item, page_width, page_height)
-                    
-                    # Determine block type
-                    block_type = "text"
-                    if hasattr(item, 'label'):
-                        label = str(item.label).lower()
-                        if 'table' in label:
-                            block_type = "table"
-                        elif 'figure' in label or 'image' in label:
-                            block_type = "image"
-                        elif 'title' in label or 'heading' in label:
-                            block_type = "heading"
-                        elif 'list' in label:
-                            block_type = "list"
-                    
-                    # Build lines from text
-                    lines = self._build_lines_from_text(item_text, bbox)
-                    
-                    blocks.append({
-                        "type": block_type,
-                        "text": item_text,
-                        "bbox": bbox,
-                        "confidence": 0.95,
-                        "lines": lines
-                    })
-                
-                # If no blocks extracted, create from page text
-                if not blocks and page_num <= len(pages):
-                    page_text = pages[page_num - 1].get("text", "")
-                    if page_text:
-                        lines = self._build_lines_from_text(page_text, {"x": 0.05, "y": 0.05, "w": 0.9, "h": 0.9})
-                        blocks.append({
-                            "type": "text",
-                            "text": page_text,
-                            "bbox": {"x": 0.05, "y": 0.05, "w": 0.9, "h": 0.9},
-                            "confidence": 0.95,
-                            "lines": lines
-                        })
-                
-                layout_pages.append({
-                    "page": page_num,
-                    "width": 1.0,
-                    "height": page_height / page_width if page_width else 1.414,
-                    "blocks": blocks
-                })
-            
-            logger.info(f"Extracted layout: {len(layout_pages)} pages, {sum(len(p['blocks']) for p in layout_pages)} blocks")
-            
-        except Exception as e:
-            logger.warning(f"Failed to extract detailed layout: {e}, using fallback")
-            # Fallback to simple layout
-            for i, page_data in enumerate(pages):
-                page_text = page_data.get("text", "")
-                lines = self._build_lines_from_text(page_text, {"x": 0.05, "y": 0.05, "w": 0.9, "h": 0.9})
-                layout_pages.append({
-                    "page": i + 1,
-                    "width": 1.0,
-                    "height": 1.414,
-                    "blocks": [{
-                        "type": "text",
-                        "text": page_text,
-                        "bbox": {"x": 0.05, "y": 0.05, "w": 0.9, "h": 0.9},
-                        "confidence": 0.95,
-                        "lines": lines
-                    }]
-                })
+        # Run Docling conversion and extraction in thread pool to avoid blocking
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(
+            None, 
+            convert_and_extract, self.converter, str(file_path), settings_dict, page_range
+        )
+
+    def _plan_page_shards(self, file_path: Path, settings_dict: Dict[str, Any]) -> List[Tuple[int, int]]:
+        """
+        Plan 1-based inclusive page ranges to convert
         
-        return layout_pages
-    
-    def _extract_bbox(self, item: Any, page_width: float, page_height: float) -> Dict[str, float]:
-        """Extract normalized bounding box from Docling item"""
+        Honors startPage/endPage. With more than one converter worker
+        process, PDFs of at least DOCLING_SHARD_MIN_PAGES pages are split
+        into DOCLING_SHARD_PAGES-page shards; every shard re-opens the PDF,
+        so sharding only pays off when shards convert in parallel.
+        
+        Returns:
+            List of page ranges, or an empty list to convert the whole document
+        """
+        if file_path.suffix.lower() != ".pdf":
+            return []
+        
+        page_count = self._count_pdf_pages(file_path)
+        start_page = settings_dict.get("startPage") or 1
+        end_page = settings_dict.get("endPage")
+        
+        if not page_count:
+            # Page count unknown: only pass through an explicit range
+            if settings_dict.get("startPage") or end_page:
+                return [(start_page, end_page or sys.maxsize)]
+            return []
+        
+        end_page = min(end_page or page_count, page_count)
+        start_page = max(1, min(start_page, end_page))
+        
+        selected_pages = end_page - start_page + 1
+        parallel = self.docling_pool is not None and self.docling_pool.workers > 1
+        if not parallel or selected_pages < settings.DOCLING_SHARD_MIN_PAGES:
+            if (start_page, end_page) == (1, page_count):
+                return []
+            return [(start_page, end_page)]
+        
+        shard_size = max(1, settings.DOCLING_SHARD_PAGES)
+        return [
+            (first, min(first + shard_size - 1, end_page))
+            for first in range(start_page, end_page + 1, shard_size)
+        ]
+
+    def _count_pdf_pages(self, file_path: Path) -> Optional[int]:
+        """Count PDF pages without a full conversion (None if unavailable)"""
+        if not PDFIUM_AVAILABLE:
+            return None
         try:
-            # Try different bbox attributes
-            bbox = None
-            
-            if hasattr(item, 'prov') and item.prov:
-                # Docling provenance contains bbox info
-                for prov in item.prov:
-                    if hasattr(prov, 'bbox'):
-                        bbox = prov.bbox
-                        break
-            
-            if not bbox and hasattr(item, 'bbox'):
-                bbox = item.bbox
-            
-            if not bbox and hasattr(item, 'bounding_box'):
-                bbox = item.bounding_box
-            
-            if bbox:
-                # Normalize coordinates to 0-1 range
-                if hasattr(bbox, 'l'):  # Docling BoundingBox format
-                    x = bbox.l / page_width if page_width else bbox.l
-                    y = bbox.t / page_height if page_height else bbox.t
-                    w = (bbox.r - bbox.l) / page_width if page_width else (bbox.r - bbox.l)
-                    h = (bbox.b - bbox.t) / page_height if page_height else (bbox.b - bbox.t)
-                elif isinstance(bbox, (list, tuple)) and len(bbox) >= 4:
-                    x = bbox[0] / page_width if page_width else bbox[0]
-                    y = bbox[1] / page_height if page_height else bbox[1]
-                    w = (bbox[2] - bbox[0]) / page_width if page_width else (bbox[2] - bbox[0])
-                    h = (bbox[3] - bbox[1]) / page_height if page_height else (bbox[3] - bbox[1])
-                elif hasattr(bbox, 'x'):
-                    x = bbox.x / page_width if page_width else bbox.x
-                    y = bbox.y / page_height if page_height else bbox.y
-                    w = bbox.width / page_width if page_width and hasattr(bbox, 'width') else 0.9
-                    h = bbox.height / page_height if page_height and hasattr(bbox, 'height') else 0.05
-                else:
-                    return {"x": 0.05, "y": 0.05, "w": 0.9, "h": 0.1}
-                
-                # Clamp values to valid range
-                x = max(0, min(1, x))
-                y = max(0, min(1, y))
-                w = max(0.01, min(1 - x, w))
-                h = max(0.01, min(1 - y, h))
-                
-                return {"x": x, "y": y, "w": w, "h": h}
+            pdf = pdfium.PdfDocument(str(file_path))
+            try:
+                return len(pdf)
+            finally:
+                pdf.close()
         except Exception as e:
-            logger.debug(f"Failed to extract bbox: {e}")
-        
-        return {"x": 0.05, "y": 0.05, "w": 0.9, "h": 0.1}
-    
-    def _build_lines_from_text(self, text: str, parent_bbox: Dict[str, float]) -> List[Dict[str, Any]]:
-        """Build line-level layout from text content"""
-        lines = []
-        text_lines = text.split('\n')
-        
-        if not text_lines:
-            return lines
-        
-        line_height = min(0.04, parent_bbox["h"] / max(len(text_lines), 1))
-        line_gap = 0.01
-        
-        for idx, line_text in enumerate(text_lines):
-            if not line_text.strip():
-                continue
-            
-            y = parent_bbox["y"] + idx * (line_height + line_gap)
-            if y + line_height > parent_bbox["y"] + parent_bbox["h"]:
-                break
-            
-            # Build words
-            words = []
-            word_list = line_text.split()
-            if word_list:
-                word_width = min(0.15, parent_bbox["w"] / max(len(word_list), 1))
-                x_cursor = parent_bbox["x"]
-                
-                for word_text in word_list:
-                    # Estimate word width based on character count
-                    estimated_width = min(word_width * (len(word_text) / 5), parent_bbox["w"] - (x_cursor - parent_bbox["x"]))
-                    
-                    words.append({
-                        "text": word_text,
-                        "bbox": {
-                            "x": x_cursor,
-                            "y": y,
-                            "w": estimated_width,
-                            "h": line_height
-                        },
-                        "confidence": 0.95
-                    })
-                    x_cursor += estimated_width + 0.01
-            
-            lines.append({
-                "text": line_text,
-                "confidence": 0.95,
-                "bbox": {
-                    "x": parent_bbox["x"],
-                    "y": y,
-                    "w": parent_bbox["w"],
-                    "h": line_height
-                },
-                "words": words
-            })
-        
-        return lines
+            logger.warning(f"Could not count pages of {file_path.name}: {e}")
+            return None
 
     async def _process_text_file(
         self,
@@ -665,11 +532,12 @@ class DocumentEngine:
         
         # Build layout with lines for text files
         block_bbox = {"x": 0.05, "y": 0.05, "w": 0.9, "h": 0.9}
-        lines = self._build_lines_from_text(full_text, block_bbox)
+        lines = build_lines_from_text(full_text, block_bbox)
         
         # AI Enhancement (if enabled)
         enhanced_text = None
         ai_metadata = None
+        enhancement_ok = True
         target_language = settings_dict.get("language", "auto")
         
         if settings.AI_ENHANCEMENT_ENABLED and self.ai_provider_manager and full_text:
@@ -680,11 +548,13 @@ class DocumentEngine:
                 document_type = self._detect_document_type(file_path, full_text)
                 
                 # Enhance text
+                enhancement_ok = False
                 enhancement_result = await self.ai_provider_manager.enhance_text(
                     text=full_text,
                     document_type=document_type,
                     image_data=None,
-                    target_language=target_language
+                    target_language=target_language,
+                    on_delta=self._enhancement_stream(job_id)
                 )
                 
                 enhanced_text = enhancement_result.enhanced_text
@@ -694,8 +564,11 @@ class DocumentEngine:
                     "processingTimeMs": enhancement_result.processing_time_ms,
                     "improvements": enhancement_result.improvements,
                     "fallbackOccurred": enhancement_result.fallback_occurred,
+                    "error": enhancement_result.error,
+                    "cached": enhancement_result.cached,
                     "targetLanguage": target_language
                 }
+                enhancement_ok = enhancement_result.provider_used != "none" and not enhancement_result.error
                 
                 logger.info(f"AI enhancement completed: {len(enhanced_text)} chars")
                 logger.info(f"Enhanced text value: {enhanced_text[:200]}")
@@ -758,7 +631,9 @@ class DocumentEngine:
             "jobId": job_id,
             "status": "done",
             "result": result_dict,
-            "error": None
+            "error": None,
+            # Internal: popped by process_document to decide on caching
+            "enhancementOk": enhancement_ok
         }
 
     def _detect_document_type(self, file_path: Path, text: str) -> str:
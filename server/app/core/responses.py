@@ -0,0 +1,43 @@
+"""
+Fast JSON responses
+"""
+import json
+import logging
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+logger = logging.getLogger(__name__)
+
+# Try to import orjson
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+    logger.info("orjson not available, using stdlib json for responses")
+
+
+def dumps_json(content: Any) -> bytes:
+    """
+    Serialize content to compact UTF-8 JSON
+
+    Args:
+        content: JSON-compatible value
+
+    Returns:
+        Encoded JSON bytes
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        content, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson when available"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps_json(content)
+
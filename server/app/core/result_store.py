@@ -0,0 +1,222 @@
+"""
+On-disk storage of finished job results
+
+Each result is written to ``<job>/output/result.ocrr``: a small header, a
+JSON index and independently zlib-compressed sections, one per top-level
+field and one per page for ``pages`` and ``layout.pages``. Readers only
+decompress the sections they ask for.
+
+Layout::
+
+    magic "OCRR" | version (uint16) | index length (uint32) | index JSON | sections...
+"""
+import json
+import logging
+import os
+import struct
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.utils.files import get_job_storage_path, get_job_output_path
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"OCRR"
+FORMAT_VERSION = 1
+COMPRESSION_LEVEL = 6
+RESULT_FILE_NAME = "result.ocrr"
+
+_HEADER = struct.Struct("<4sHI")
+
+# Fields stored as one section per page
+PAGED_FIELDS = ("pages", "layout")
+
+
+# Limits on page selections, so a request cannot ask for absurd ranges
+MAX_PAGE_NUMBER = 100_000
+MAX_PAGE_RANGES = 100
+
+# Inclusive (start, end) page ranges, 1-based
+PageRanges = List[Tuple[int, int]]
+
+
+def parse_page_ranges(spec: str) -> PageRanges:
+    """
+    Parse a page selection such as ``3-5`` or ``1,4-6``
+
+    Ranges are kept as bounds rather than expanded, so a wide range costs
+    the same as a single page.
+
+    Args:
+        spec: Comma-separated pages and inclusive ranges (1-based)
+
+    Returns:
+        List of inclusive (start, end) ranges
+
+    Raises:
+        ValueError: If the selection is malformed or exceeds the limits
+    """
+    ranges: PageRanges = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        first, _, last = part.partition("-")
+        start = int(first)
+        end = int(last) if last else start
+        if start < 1 or end < start:
+            raise ValueError(f"Invalid page range '{part}'")
+        if end > MAX_PAGE_NUMBER:
+            raise ValueError(f"Page numbers are limited to {MAX_PAGE_NUMBER}")
+        ranges.append((start, end))
+        if len(ranges) > MAX_PAGE_RANGES:
+            raise ValueError(f"At most {MAX_PAGE_RANGES} page ranges are allowed")
+    if not ranges:
+        raise ValueError("Empty page selection")
+    return ranges
+
+
+def page_selected(page: Optional[int], ranges: Optional[PageRanges]) -> bool:
+    """Whether a page falls in a selection (None selects every page)"""
+    if ranges is None:
+        return True
+    return page is not None and any(start <= page <= end for start, end in ranges)
+
+
+class ResultStore:
+    """Writes and selectively reads job results in the segmented format"""
+
+    def _result_path(self, job_id: str) -> Path:
+        """Get result file path for a job (without creating directories)"""
+        return get_job_storage_path(job_id) / "output" / RESULT_FILE_NAME
+
+    @staticmethod
+    def _encode(value: Any) -> bytes:
+        """Serialize and compress one section"""
+        return zlib.compress(json.dumps(value, ensure_ascii=False).encode("utf-8"), COMPRESSION_LEVEL)
+
+    @staticmethod
+    def _decode(data: bytes) -> Any:
+        """Decompress and deserialize one section"""
+        return json.loads(zlib.decompress(data))
+
+    def save(self, job_id: str, result: Dict[str, Any]) -> int:
+        """
+        Write a job result to disk
+
+        Args:
+            job_id: Job ID
+            result: OCR result dict
+
+        Returns:
+            Size of the written file in bytes
+        """
+        sections: List[bytes] = []
+        offset = 0
+        index: Dict[str, Any] = {"fields": {}, "paged": {}}
+
+        def add(value: Any) -> List[int]:
+            nonlocal offset
+            data = self._encode(value)
+            sections.append(data)
+            entry = [offset, len(data)]
+            offset += len(data)
+            return entry
+
+        for name, value in result.items():
+            if name == "pages" and isinstance(value, list):
+                index["paged"]["pages"] = [[page.get("page"), *add(page)] for page in value]
+            elif name == "layout" and isinstance(value, dict) and isinstance(value.get("pages"), list):
+                index["fields"]["layout"] = add({k: v for k, v in value.items() if k != "pages"})
+                index["paged"]["layout"] = [[page.get("page"), *add(page)] for page in value["pages"]]
+            else:
+                index["fields"][name] = add(value)
+
+        index_bytes = json.dumps(index).encode("utf-8")
+        path = get_job_output_path(job_id) / RESULT_FILE_NAME
+        tmp_path = path.with_name(f"{RESULT_FILE_NAME}.{os.getpid()}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, len(index_bytes)))
+            f.write(index_bytes)
+            for data in sections:
+                f.write(data)
+        os.replace(tmp_path, path)
+
+        size = path.stat().st_size
+        logger.debug(f"Stored result for job {job_id}: {size} bytes")
+        return size
+
+    def exists(self, job_id: str) -> bool:
+        """Whether a result is stored for a job"""
+        return self._result_path(job_id).exists()
+
+    def load(
+        self,
+        job_id: str,
+        fields: Optional[Iterable[str]] = None,
+        pages: Optional[PageRanges] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Read a job result, decompressing only the requested sections
+
+        Args:
+            job_id: Job ID
+            fields: Top-level result fields to load (None for all)
+            pages: Page ranges to keep in ``pages`` and ``layout`` (None for all)
+
+        Returns:
+            Result dict (possibly partial) or None if no result is stored
+        """
+        path = self._result_path(job_id)
+        try:
+            f = open(path, "rb")
+        except FileNotFoundError:
+            return None
+
+        with f:
+            magic, version, index_length = _HEADER.unpack(f.read(_HEADER.size))
+            if magic != MAGIC or version != FORMAT_VERSION:
+                logger.error(f"Unsupported result file for job {job_id}")
+                return None
+            index = json.loads(f.read(index_length))
+            base = _HEADER.size + index_length
+
+            def read(offset: int, length: int) -> Any:
+                f.seek(base + offset)
+                return self._decode(f.read(length))
+
+            wanted = set(fields) if fields is not None else None
+            names = list(index["fields"]) + [name for name in index["paged"] if name not in index["fields"]]
+            result: Dict[str, Any] = {}
+
+            for name in names:
+                if wanted is not None and name not in wanted:
+                    continue
+                value = read(*index["fields"][name]) if name in index["fields"] else None
+                if name in index["paged"]:
+                    paged = [
+                        read(offset, length)
+                        for page, offset, length in index["paged"][name]
+                        if page_selected(page, pages)
+                    ]
+                    if name == "layout":
+                        value = {**(value or {}), "pages": paged}
+                    else:
+                        value = paged
+                result[name] = value
+
+        return result
+
+    def delete(self, job_id: str):
+        """Delete a stored result"""
+        try:
+            self._result_path(job_id).unlink()
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Could not delete result for job {job_id}: {e}")
+
+
+# Global result store instance
+result_store = ResultStore()
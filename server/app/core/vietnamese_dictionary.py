@@ -0,0 +1,458 @@
+"""
+Compiled Vietnamese phrase dictionary for tone restoration
+Maps unaccented syllables and phrases ("cong nghe thong tin") to their
+accented form ("công nghệ thông tin"). The phrase list is compiled once
+into a sorted binary table that is memory-mapped at startup, so opening
+tens of thousands of entries takes milliseconds. The restorer bulk-loads
+the table into a dict and a prefix set for lookups during restoration.
+"""
+import logging
+import mmap
+import os
+import re
+import struct
+import threading
+import unicodedata
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Bundled phrase list (accented phrase<TAB>frequency)
+DEFAULT_PHRASES_PATH = Path(__file__).resolve().parent.parent / "data" / "vietnamese_phrases.tsv"
+
+# Binary layout: header, then one fixed-size record per entry sorted by key
+# bytes, then the UTF-8 key and value strings the records point to
+MAGIC = b"VNPD"
+VERSION = 1
+_HEADER = struct.Struct("<4sHIH")  # magic, version, entry count, max syllables per key
+_RECORD = struct.Struct("<IHIH")  # key offset, key length, value offset, value length
+
+_ACCENTED = "àáảãạăằắẳẵặâầấẩẫậèéẻẽẹêềếểễệìíỉĩịòóỏõọôồốổỗộơờớởỡợùúủũụưừứửữựỳýỷỹỵđ"
+_BASE = "a" * 17 + "e" * 11 + "i" * 5 + "o" * 17 + "u" * 11 + "y" * 5 + "d"
+_STRIP_TABLE = str.maketrans(_ACCENTED + _ACCENTED.upper(), _BASE + _BASE.upper())
+
+# Runs of unaccented words separated by single spaces, not touching other
+# letters (so "Vi" in "Việt" is not a word); only these can need marks
+_ASCII_RUN = re.compile(r"(?<![^\W\d_])[A-Za-z]+(?: [A-Za-z]+)*(?![^\W\d_])")
+
+# Common English words that are also unaccented Vietnamese syllables
+# ("the" -> "thể"). On their own they are left alone, so English text
+# mixed into a Vietnamese document is not accented.
+COMMON_ENGLISH_WORDS = frozenset("""
+a am an and are as at be ban bang but by can con dam dan day den die do for from
+go ha hang he her hi his ho how i if in is it la lam let ma man me my no not of
+on or our so tan te ten than that the them then they this tie tin to ton up us
+van vat ve vi we what who will with ye you
+""".split())
+
+
+def strip_diacritics(text: str) -> str:
+    """
+    Remove Vietnamese tone and vowel marks ("Việt Nam" -> "Viet Nam")
+
+    Args:
+        text: Text in NFC form
+
+    Returns:
+        Text with every accented letter replaced by its base letter
+    """
+    return text.translate(_STRIP_TABLE)
+
+
+def load_tsv(path: Union[str, Path]) -> Dict[str, str]:
+    """
+    Read a phrase list into an unaccented -> accented mapping
+
+    Each line holds an accented phrase and an optional frequency separated
+    by a tab; lines starting with ``#`` are comments. When two phrases lose
+    their marks to the same key, the more frequent one wins.
+
+    Args:
+        path: Phrase list file
+
+    Returns:
+        Dict mapping lowercase unaccented phrase to accented phrase
+    """
+    best: Dict[str, Tuple[float, str]] = {}
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            phrase, _, frequency = line.partition("\t")
+            phrase = " ".join(unicodedata.normalize("NFC", phrase).lower().split())
+            try:
+                weight = float(frequency) if frequency.strip() else 1.0
+            except ValueError:
+                logger.warning(f"Invalid frequency on line {line_number} of {path}, ignoring line")
+                continue
+            key = strip_diacritics(phrase)
+            if key not in best or weight > best[key][0]:
+                best[key] = (weight, phrase)
+    return {key: phrase for key, (_, phrase) in best.items()}
+
+
+def build_dictionary(entries: Dict[str, str]) -> bytes:
+    """
+    Compile a mapping into the binary dictionary format
+
+    Args:
+        entries: Unaccented key -> accented phrase (same syllable count)
+
+    Returns:
+        Dictionary bytes for PhraseDictionary
+    """
+    items = sorted(
+        (key.encode("utf-8"), value.encode("utf-8"))
+        for key, value in entries.items()
+        if key and value
+    )
+    max_syllables = max((key.count(b" ") + 1 for key, _ in items), default=0)
+
+    strings_offset = _HEADER.size + _RECORD.size * len(items)
+    records = bytearray()
+    strings = bytearray()
+    for key, value in items:
+        key_offset = strings_offset + len(strings)
+        strings += key
+        value_offset = strings_offset + len(strings)
+        strings += value
+        records += _RECORD.pack(key_offset, len(key), value_offset, len(value))
+
+    return _HEADER.pack(MAGIC, VERSION, len(items), max_syllables) + bytes(records) + bytes(strings)
+
+
+def build_dictionary_file(source: Union[str, Path], output: Union[str, Path]) -> int:
+    """
+    Compile a phrase list file into a binary dictionary file
+
+    The output is written to a temporary file and renamed, so processes
+    that have the old dictionary mapped keep a consistent view.
+
+    Args:
+        source: Phrase list (see load_tsv)
+        output: Binary dictionary path
+
+    Returns:
+        Number of entries written
+    """
+    entries = load_tsv(source)
+    output = Path(output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = output.with_name(f"{output.name}.{os.getpid()}.tmp")
+    temp_path.write_bytes(build_dictionary(entries))
+    os.replace(temp_path, output)
+    return len(entries)
+
+
+class PhraseDictionary:
+    """
+    Read-only view of a compiled dictionary with binary-search lookup
+
+    Lookups read the records straight from the mapped buffer; nothing is
+    unpacked up front.
+    """
+
+    def __init__(self, buffer, source: str = "<memory>"):
+        """
+        Initialize dictionary
+
+        Args:
+            buffer: Dictionary bytes (bytes or mmap)
+            source: Description for log messages
+        """
+        if len(buffer) < _HEADER.size:
+            raise ValueError(f"Dictionary {source} is truncated")
+        magic, version, count, max_syllables = _HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"Dictionary {source} has an unsupported format")
+        if len(buffer) < _HEADER.size + _RECORD.size * count:
+            raise ValueError(f"Dictionary {source} is truncated")
+
+        self._buffer = buffer
+        self.source = source
+        self.count = count
+        self.max_syllables = max_syllables
+
+    @classmethod
+    def open(cls, path: Union[str, Path]) -> "PhraseDictionary":
+        """Memory-map a compiled dictionary file"""
+        with open(path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(buffer, str(path))
+
+    @classmethod
+    def from_entries(cls, entries: Dict[str, str]) -> "PhraseDictionary":
+        """Build an in-memory dictionary from a mapping"""
+        return cls(build_dictionary(entries))
+
+    def _key_at(self, index: int) -> bytes:
+        key_offset, key_length, _, _ = _RECORD.unpack_from(self._buffer, _HEADER.size + index * _RECORD.size)
+        return self._buffer[key_offset:key_offset + key_length]
+
+    def _value_at(self, index: int) -> str:
+        _, _, value_offset, value_length = _RECORD.unpack_from(self._buffer, _HEADER.size + index * _RECORD.size)
+        return self._buffer[value_offset:value_offset + value_length].decode("utf-8")
+
+    def find(self, key: str) -> Tuple[Optional[str], bool]:
+        """
+        Look up a phrase and whether longer phrases start with it
+
+        Because keys are sorted and a space sorts before every letter, the
+        phrases extending ``key`` by another syllable directly follow it,
+        so one binary search answers both questions (like walking one edge
+        of a trie).
+
+        Args:
+            key: Lowercase unaccented syllables separated by single spaces
+
+        Returns:
+            (accented phrase or None, True if some key starts with ``key + " "``)
+        """
+        target = key.encode("utf-8")
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self._key_at(middle) < target:
+                low = middle + 1
+            else:
+                high = middle
+
+        value = None
+        if low < self.count and self._key_at(low) == target:
+            value = self._value_at(low)
+            low += 1
+        has_longer = low < self.count and self._key_at(low).startswith(target + b" ")
+        return value, has_longer
+
+    def items(self) -> Iterator[Tuple[str, str]]:
+        """Iterate all (key, accented phrase) entries in key order"""
+        data = self._buffer[:]
+        records = data[_HEADER.size:_HEADER.size + _RECORD.size * self.count]
+        for key_offset, key_length, value_offset, value_length in _RECORD.iter_unpack(records):
+            yield (
+                data[key_offset:key_offset + key_length].decode("utf-8"),
+                data[value_offset:value_offset + value_length].decode("utf-8")
+            )
+
+    def lookup(self, key: str) -> Optional[str]:
+        """
+        Find the accented form of an unaccented lowercase phrase
+
+        Args:
+            key: Syllables separated by single spaces
+
+        Returns:
+            Accented phrase or None if the phrase is unknown
+        """
+        return self.find(key)[0]
+
+    def close(self):
+        """Release the mapping"""
+        if isinstance(self._buffer, mmap.mmap):
+            self._buffer.close()
+
+
+def _match_case(template: str, word: str) -> str:
+    """Apply the letter case of ``template`` to ``word``"""
+    if template.islower():
+        return word
+    if template.isupper() and len(template) > 1:
+        return word.upper()
+    if template[0].isupper():
+        return word[0].upper() + word[1:]
+    return word
+
+
+class ToneRestorer:
+    """
+    Restores tone marks in unaccented Vietnamese text
+
+    The dictionary is loaded into a dict of phrases and a set of phrase
+    prefixes. A regex finds the runs of unaccented words; within a run the
+    longest known phrase starting at each word (joined by single spaces)
+    is replaced by its accented form, so "cong nghe thong tin" picks the
+    phrase entry rather than four independent syllable guesses. Words that
+    already carry marks, unknown words, case, punctuation and whitespace
+    are kept as they are.
+
+    A single syllable that is also a common English word is only accented
+    next to other matches that are not, so "The total" stays English while
+    "toi la sinh vien" becomes "tôi là sinh viên".
+    """
+
+    def __init__(self, dictionary: PhraseDictionary):
+        """
+        Initialize restorer
+
+        Args:
+            dictionary: Phrase dictionary
+        """
+        self.dictionary = dictionary
+        self._phrases: Dict[str, str] = {}
+        self._prefixes: Set[str] = set()
+        for key, value in dictionary.items():
+            if value.count(" ") != key.count(" "):
+                continue
+            self._phrases[key] = value
+            # Every run of leading syllables can be extended; once a prefix
+            # is known, its own prefixes are too
+            prefix = key.rpartition(" ")[0]
+            while prefix and prefix not in self._prefixes:
+                self._prefixes.add(prefix)
+                prefix = prefix.rpartition(" ")[0]
+
+    def restore(self, text: str) -> str:
+        """
+        Restore tone marks
+
+        Args:
+            text: Input text
+
+        Returns:
+            Text with known unaccented words and phrases accented
+        """
+        return _ASCII_RUN.sub(self._restore_run, text)
+
+    def _restore_run(self, match: "re.Match") -> str:
+        """Restore one run of unaccented words separated by single spaces"""
+        run = match.group()
+        if run.islower():
+            return self._restore_lowercase(run)
+
+        # Restore the lowercase run, then carry each word's case over;
+        # phrases keep their syllable count, so words stay aligned
+        words = run.split(" ")
+        keys = run.lower().split(" ")
+        restored = self._restore_lowercase(" ".join(keys)).split(" ")
+        return " ".join([
+            word if syllable == key
+            else syllable if word.islower()
+            else syllable.capitalize() if word.istitle()
+            else _match_case(word, syllable)
+            for word, key, syllable in zip(words, keys, restored)
+        ])
+
+    def _restore_lowercase(self, run: str) -> str:
+        """Restore a lowercase run (longest known phrase at each word)"""
+        phrases = self._phrases
+        if " " not in run:
+            return run if run in COMMON_ENGLISH_WORDS else phrases.get(run, run)
+
+        prefixes = self._prefixes
+        keys = run.split(" ")
+        count = len(keys)
+        output: List[str] = []
+        append = output.append
+        # Consecutive matches form a cluster; English-looking single syllables
+        # stay tentative until the cluster has a match that is clearly Vietnamese
+        tentative: List[Tuple[int, int]] = []  # (output position, word index)
+        anchored = False
+        index = 0
+        while index < count:
+            # Extend the phrase word by word while longer entries exist,
+            # remembering the longest one that matched
+            key = keys[index]
+            last = index
+            match_end = -1
+            match_value = ""
+            while True:
+                value = phrases.get(key)
+                if value is not None:
+                    match_end = last
+                    match_value = value
+                if key not in prefixes:
+                    break
+                last += 1
+                if last >= count:
+                    break
+                key = key + " " + keys[last]
+
+            if match_end < 0:
+                if tentative and not anchored:
+                    for position, word_index in tentative:
+                        output[position] = keys[word_index]
+                tentative = []
+                anchored = False
+                append(keys[index])
+                index += 1
+                continue
+
+            if match_end == index and keys[index] in COMMON_ENGLISH_WORDS:
+                tentative.append((len(output), index))
+            else:
+                anchored = True
+            append(match_value)
+            index = match_end + 1
+
+        if tentative and not anchored:
+            for position, word_index in tentative:
+                output[position] = keys[word_index]
+        return " ".join(output)
+
+
+_restorer: Optional[ToneRestorer] = None
+_restorer_lock = threading.Lock()
+
+
+def _compiled_path(source: Path) -> Path:
+    return settings.CACHE_DIR / f"{source.stem}.vtd"
+
+
+def load_dictionary(source: Optional[Path] = None) -> PhraseDictionary:
+    """
+    Open the compiled form of a phrase list, compiling it when stale
+
+    The binary dictionary is kept in CACHE_DIR and rebuilt when the phrase
+    list is newer. If the cache directory is not writable the dictionary
+    is built in memory instead.
+
+    Args:
+        source: Phrase list (default: VIETNAMESE_DICTIONARY_PATH or the bundled list)
+
+    Returns:
+        Opened PhraseDictionary
+    """
+    source = Path(source or settings.VIETNAMESE_DICTIONARY_PATH or DEFAULT_PHRASES_PATH)
+    compiled = _compiled_path(source)
+    try:
+        if not compiled.exists() or compiled.stat().st_mtime < source.stat().st_mtime:
+            count = build_dictionary_file(source, compiled)
+            logger.info(f"Compiled Vietnamese phrase dictionary: {count} entries -> {compiled}")
+        return PhraseDictionary.open(compiled)
+    except OSError as e:
+        if not source.exists():
+            raise
+        logger.warning(f"Could not use compiled dictionary {compiled} ({e}), building in memory")
+        return PhraseDictionary.from_entries(load_tsv(source))
+
+
+def get_tone_restorer(fallback: Optional[Iterable[Tuple[str, str]]] = None) -> ToneRestorer:
+    """
+    Get the process-wide tone restorer, loading the dictionary on first use
+
+    Args:
+        fallback: (unaccented, accented) pairs used if the phrase list
+            cannot be loaded
+
+    Returns:
+        Shared ToneRestorer
+    """
+    global _restorer
+    if _restorer is None:
+        with _restorer_lock:
+            if _restorer is None:
+                try:
+                    dictionary = load_dictionary()
+                    logger.info(
+                        f"Loaded Vietnamese phrase dictionary ({dictionary.count} entries, "
+                        f"phrases up to {dictionary.max_syllables} syllables)"
+                    )
+                except (OSError, ValueError) as e:
+                    logger.error(f"Failed to load Vietnamese phrase dictionary: {e}")
+                    dictionary = PhraseDictionary.from_entries(dict(fallback or ()))
+                _restorer = ToneRestorer(dictionary)
+    return _restorer
@@ -4,8 +4,12 @@ Provides tone restoration and text normalization for Vietnamese
 """
 import logging
 import re
+import unicodedata
 from typing import Optional
 
+from app.core.vietnamese_dictionary import get_tone_restorer
+from app.utils.text import ScriptStats, detect_vietnamese_script
+
 logger = logging.getLogger(__name__)
 
 # Try to import Vietnamese NLP libraries
@@ -28,7 +32,7 @@ VIETNAMESE_TONE_MAP = {
     'd': ['đ']
 }
 
-# Common Vietnamese words dictionary (for basic tone restoration)
+# Common Vietnamese words (fallback when the phrase dictionary cannot be loaded)
 COMMON_VIETNAMESE_WORDS = {
     'viet': 'việt',
     'nam': 'nam',
@@ -78,6 +82,12 @@ COMMON_VIETNAMESE_WORDS = {
     'thuat': 'thuật',
 }
 
+# Common words that mark text as Vietnamese
+_VIETNAMESE_WORD_PATTERN = re.compile(r"\b(?:việt|nam|tiếng|người|nhà|học|trường)\b", re.IGNORECASE)
+
+# Spaces before punctuation (removed) or runs of two or more spaces (group 1, collapsed)
+_SPACING_PATTERN = re.compile(r" +(?=[,.;:!?])|( {2,})")
+
 
 class VietnameseProcessor:
     """Vietnamese text processor with tone restoration"""
@@ -87,47 +97,20 @@ class VietnameseProcessor:
         
     def has_vietnamese_chars(self, text: str) -> bool:
         """Check if text contains Vietnamese characters"""
-        vietnamese_chars = set('àáảãạăằắẳẵặâầấẩẫậèéẻẽẹêềếểễệìíỉĩịòóỏõọôồốổỗộơờớởỡợùúủũụưừứửữựỳýỷỹỵđ')
-        return any(c in vietnamese_chars for c in text.lower())
+        return detect_vietnamese_script(text).has_vietnamese
     
     def is_vietnamese_text(self, text: str) -> bool:
         """Detect if text is likely Vietnamese"""
-        # Check for Vietnamese-specific patterns
-        vietnamese_patterns = [
-            r'\b(việt|nam|tiếng|người|nhà|học|trường)\b',
-            r'[àáảãạăằắẳẵặâầấẩẫậèéẻẽẹêềếểễệìíỉĩịòóỏõọôồốổỗộơờớởỡợùúủũụưừứửữựỳýỷỹỵđ]'
-        ]
-        
-        for pattern in vietnamese_patterns:
-            if re.search(pattern, text.lower()):
-                return True
-        
-        # Check if text has Vietnamese tone marks
-        return self.has_vietnamese_chars(text)
+        return self.has_vietnamese_chars(text) or _VIETNAMESE_WORD_PATTERN.search(text) is not None
     
     def restore_tones_basic(self, text: str) -> str:
         """
         Basic tone restoration using dictionary lookup
-        This is a simple fallback method
+        Longest-match lookup of syllables and phrases in the compiled phrase
+        dictionary; case, punctuation and spacing are preserved
         """
-        words = text.lower().split()
-        restored_words = []
-        
-        for word in words:
-            # Remove punctuation for lookup
-            clean_word = re.sub(r'[^\w]', '', word)
-            
-            # Look up in dictionary
-            if clean_word in COMMON_VIETNAMESE_WORDS:
-                restored = COMMON_VIETNAMESE_WORDS[clean_word]
-                # Preserve original punctuation
-                if word != clean_word:
-                    restored = word.replace(clean_word, restored)
-                restored_words.append(restored)
-            else:
-                restored_words.append(word)
-        
-        return ' '.join(restored_words)
+        restorer = get_tone_restorer(fallback=COMMON_VIETNAMESE_WORDS.items())
+        return restorer.restore(text)
     
     def normalize_vietnamese(self, text: str) -> str:
         """
@@ -136,23 +119,10 @@ class VietnameseProcessor:
         - Standardize spacing
         - Fix tone marks
         """
-        # Fix common OCR errors for Vietnamese
-        replacements = {
-            'đ': 'đ',  # Normalize đ character
-            'Đ': 'Đ',
-            '  ': ' ',  # Multiple spaces
-            ' ,': ',',
-            ' .': '.',
-            ' ;': ';',
-            ' :': ':',
-            ' !': '!',
-            ' ?': '?',
-        }
-        
-        result = text
-        for old, new in replacements.items():
-            result = result.replace(old, new)
-        
+        # Compose decomposed tone marks (e.g. "a" + U+0301) into single letters
+        result = unicodedata.normalize("NFC", text)
+        # One pass: drop spaces before punctuation, collapse runs of spaces
+        result = _SPACING_PATTERN.sub(lambda match: " " if match.group(1) else "", result)
         return result.strip()
     
     def tokenize(self, text: str) -> list:
@@ -170,7 +140,8 @@ class VietnameseProcessor:
         self, 
         text: str, 
         restore_tones: bool = True,
-        normalize: bool = True
+        normalize: bool = True,
+        script: Optional[ScriptStats] = None
     ) -> str:
         """
         Process Vietnamese text with optional tone restoration
@@ -179,19 +150,27 @@ class VietnameseProcessor:
             text: Input text
             restore_tones: Whether to attempt tone restoration
             normalize: Whether to normalize text
+            script: Diacritic statistics of ``text`` if the caller already has them
             
         Returns:
             Processed text
         """
         result = text
         
+        # Normalization only changes the accented letters when it composes them
+        if script is not None and normalize and not unicodedata.is_normalized("NFC", text):
+            script = None
+        
         # Normalize first
         if normalize:
             result = self.normalize_vietnamese(result)
         
         # Restore tones if requested and text doesn't have tones
-        if restore_tones and not self.has_vietnamese_chars(result):
-            result = self.restore_tones_basic(result)
+        if restore_tones:
+            if script is None:
+                script = detect_vietnamese_script(result)
+            if not script.has_vietnamese:
+                result = self.restore_tones_basic(result)
         
         return result
 
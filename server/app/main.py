@@ -7,8 +7,14 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 
+from app.core.ai_providers.provider_manager import close_provider_manager
+from app.core.compression import CompressionMiddleware
 from app.core.config import settings
-from app.core.jobs import job_store
+from app.core.jobs import job_store, job_scheduler
+from app.core.ollama_client import ollama_client
+from app.core.rag_service import rag_service
+from app.core.raganything_engine import rag_engine
+from app.core.responses import FastJSONResponse
 from app.api import routes_ocr, routes_convert, routes_jobs, routes_rag
 
 # Configure logging
@@ -30,18 +36,37 @@ async def lifespan(app: FastAPI):
     # Create storage directory
     settings.STORAGE_DIR.mkdir(parents=True, exist_ok=True)
     
+    # Warm up converters and start job workers
+    await rag_engine.start()
+    await job_scheduler.start()
+    
+    # Create the shared AI provider manager and monitor provider health in the background
+    if rag_engine.ai_provider_manager:
+        await rag_engine.ai_provider_manager.start()
+    
+    # Load the knowledge base once so queries do not pay for storage setup
+    if settings.ENABLE_RAG:
+        await rag_service.start()
+    
     yield
     
     logger.info("Shutting down OCR Service...")
+    await job_scheduler.stop()
+    if settings.ENABLE_RAG:
+        await rag_service.shutdown()
+    await ollama_client.close()
+    await close_provider_manager()
+    await rag_engine.shutdown()
     # Cleanup jobs
-    job_store.cleanup_all()
+    job_store.shutdown()
 
 
 app = FastAPI(
     title="RAG-Anything OCR Service",
     description="OCR and document processing service with optional RAG capabilities",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse
 )
 
 # CORS middleware
@@ -53,6 +78,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Response compression (brotli/gzip)
+if settings.RESPONSE_COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.RESPONSE_COMPRESSION_MIN_SIZE,
+        gzip_level=settings.RESPONSE_GZIP_LEVEL,
+        brotli_quality=settings.RESPONSE_BROTLI_QUALITY
+    )
+
 # Include routers
 app.include_router(routes_ocr.router, prefix="/api/ocr", tags=["OCR"])
 app.include_router(routes_convert.router, prefix="/api/convert", tags=["Convert"])
@@ -76,9 +110,10 @@ async def health_check():
     
     # Check AI provider status
     ai_providers_status = {}
-    if settings.AI_ENHANCEMENT_ENABLED:
+    ai_routing_status = None
+    provider_manager = rag_engine.ai_provider_manager
+    if settings.AI_ENHANCEMENT_ENABLED and provider_manager:
         try:
-            from app.core.ai_providers.provider_manager import provider_manager
             provider_statuses = await provider_manager.get_provider_status()
             
             for name, status in provider_statuses.items():
@@ -87,8 +122,15 @@ async def health_check():
                     "responseTimeMs": status.response_time_ms,
                     "supportsVision": status.supports_vision,
                     "quotaExceeded": status.quota_exceeded,
-                    "unavailableReason": status.unavailable_reason
+                    "unavailableReason": status.unavailable_reason,
+                    "circuitState": status.circuit_state,
+                    "hedgesFired": status.hedges_fired,
+                    "hedgesWon": status.hedges_won
                 }
+            ai_routing_status = {
+                "policy": settings.AI_ROUTING_POLICY,
+                "stats": provider_manager.router.get_stats()
+            }
         except Exception as e:
             logger.warning(f"Could not get AI provider status: {e}")
     
@@ -99,7 +141,8 @@ async def health_check():
         "enableRag": settings.ENABLE_RAG,
         "ollamaReachable": ollama_reachable,
         "aiEnhancementEnabled": settings.AI_ENHANCEMENT_ENABLED,
-        "aiProviders": ai_providers_status if ai_providers_status else None
+        "aiProviders": ai_providers_status if ai_providers_status else None,
+        "aiRouting": ai_routing_status
     }
 
 
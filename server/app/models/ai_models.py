@@ -27,6 +27,8 @@ class ProviderConfig:
     priority: int = 99  # Lower number = higher priority
     timeout_seconds: int = 30
     max_retries: int = 2
+    requests_per_minute: Optional[int] = None  # Client-side request budget (None = unlimited)
+    tokens_per_minute: Optional[int] = None  # Client-side token budget (None = unlimited)
 
 
 @dataclass
@@ -41,7 +43,10 @@ class ProviderStatus:
     rate_limit_remaining: Optional[int] = None
     quota_exceeded: bool = False
     quota_reset_time: Optional[datetime] = None
-    unavailable_reason: Optional[str] = None  # "quota_exceeded", "rate_limit", "api_error", etc.
+    unavailable_reason: Optional[str] = None  # "quota_exceeded", "rate_limit", "circuit_open"
+    circuit_state: str = "closed"  # "closed", "open" or "half_open"
+    hedges_fired: int = 0  # Requests sent here as a hedge for a slow provider
+    hedges_won: int = 0  # Hedged requests answered here first
 
 
 @dataclass
@@ -57,6 +62,7 @@ class EnhancementResult:
     improvements: List[str] = field(default_factory=list)
     fallback_occurred: bool = False
     error: Optional[str] = None
+    cached: bool = False  # Served from the enhancement cache
 
 
 @dataclass
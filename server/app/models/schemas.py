@@ -1,7 +1,10 @@
 """
 Pydantic schemas for API requests and responses
 """
-from typing import Optional, List, Dict, Any, Union
+import base64
+import sys
+from array import array
+from typing import Optional, List, Dict, Any, Literal, Tuple, Union
 from pydantic import BaseModel, Field
 
 
@@ -27,6 +30,7 @@ class OcrSettings(BaseModel):
     mode: str = Field(default="balanced", description="Processing mode (fast|balanced|accurate)")
     preserveLayout: bool = True
     returnLayout: bool = True
+    layoutFormat: str = Field(default="json", pattern="^(json|columnar)$", description="Layout encoding (json|columnar)")
     startPage: Optional[int] = None
     endPage: Optional[int] = None
     preprocess: PreprocessSettings = Field(default_factory=PreprocessSettings)
@@ -73,6 +77,191 @@ class Layout(BaseModel):
     pages: List[LayoutPage]
 
 
+# Columnar layout
+#
+# Each page keeps one text buffer and, per level (blocks, lines, words),
+# parallel arrays encoded as base64 little-endian typed arrays:
+#   textOffset/textLength (uint32) - slice of the page text buffer
+#   x/y/w/h/confidence (float32)
+#   parent (uint32, lines and words only) - index into the level above
+class ColumnarLevel(BaseModel):
+    count: int
+    textOffset: str
+    textLength: str
+    x: str
+    y: str
+    w: str
+    h: str
+    confidence: str
+    parent: Optional[str] = None
+    type: Optional[List[str]] = None  # blocks only
+
+
+class ColumnarLayoutPage(BaseModel):
+    page: int
+    width: float
+    height: float
+    text: str
+    blocks: ColumnarLevel
+    lines: ColumnarLevel
+    words: ColumnarLevel
+
+
+class ColumnarLayout(BaseModel):
+    format: Literal["columnar"] = "columnar"
+    pages: List[ColumnarLayoutPage]
+
+
+_FLOAT_COLUMNS = ("x", "y", "w", "h", "confidence")
+
+
+def _pack_array(typecode: str, values: List[Any]) -> str:
+    """Encode values as a base64 little-endian typed array"""
+    data = array(typecode, values)
+    if sys.byteorder == "big":
+        data.byteswap()
+    return base64.b64encode(data.tobytes()).decode("ascii")
+
+
+def _unpack_array(typecode: str, encoded: str) -> array:
+    """Decode a base64 little-endian typed array"""
+    data = array(typecode)
+    data.frombytes(base64.b64decode(encoded))
+    if sys.byteorder == "big":
+        data.byteswap()
+    return data
+
+
+def encode_columnar_layout(layout: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Convert a JSON layout ({"pages": [...]} of blocks/lines/words) to the columnar format
+    
+    Args:
+        layout: Layout dict as produced by the OCR pipeline
+        
+    Returns:
+        ColumnarLayout-shaped dict
+    """
+    columnar_pages = []
+    
+    for page in layout.get("pages", []):
+        buffer: List[str] = []
+        buffer_length = 0
+        levels = {name: {"text": [], "box": [], "parent": [], "type": []} for name in ("blocks", "lines", "words")}
+        
+        def add_text(text: str, parent: Optional[Tuple[int, str]]) -> int:
+            """Point into the parent's text when it contains this text, else append it"""
+            nonlocal buffer_length
+            if parent is not None and text:
+                found = parent[1].find(text)
+                if found >= 0:
+                    return parent[0] + found
+            offset = buffer_length
+            buffer.append(text)
+            buffer_length += len(text)
+            return offset
+        
+        def add_item(level: str, item: Dict[str, Any], parent_index: int,
+                     parent: Optional[Tuple[int, str]]) -> Tuple[int, Tuple[int, str]]:
+            text = item.get("text", "")
+            offset = add_text(text, parent)
+            bbox = item.get("bbox") or {}
+            entry = levels[level]
+            entry["text"].append((offset, len(text)))
+            entry["box"].append((
+                bbox.get("x", 0.0), bbox.get("y", 0.0), bbox.get("w", 0.0), bbox.get("h", 0.0),
+                item.get("confidence", 0.0)
+            ))
+            entry["parent"].append(parent_index)
+            entry["type"].append(item.get("type", "text"))
+            return len(entry["text"]) - 1, (offset, text)
+        
+        for block in page.get("blocks", []):
+            block_index, block_slice = add_item("blocks", block, 0, None)
+            for line in block.get("lines", []):
+                line_index, line_slice = add_item("lines", line, block_index, block_slice)
+                for word in line.get("words", []):
+                    add_item("words", word, line_index, line_slice)
+        
+        encoded_levels = {}
+        for name, entry in levels.items():
+            encoded = {
+                "count": len(entry["text"]),
+                "textOffset": _pack_array("I", [offset for offset, _ in entry["text"]]),
+                "textLength": _pack_array("I", [length for _, length in entry["text"]]),
+            }
+            for column, key in enumerate(_FLOAT_COLUMNS):
+                encoded[key] = _pack_array("f", [box[column] for box in entry["box"]])
+            if name == "blocks":
+                encoded["type"] = entry["type"]
+            else:
+                encoded["parent"] = _pack_array("I", entry["parent"])
+            encoded_levels[name] = encoded
+        
+        columnar_pages.append({
+            "page": page.get("page", len(columnar_pages) + 1),
+            "width": page.get("width", 1.0),
+            "height": page.get("height", 1.0),
+            "text": "".join(buffer),
+            **encoded_levels
+        })
+    
+    return {"format": "columnar", "pages": columnar_pages}
+
+
+def decode_columnar_layout(layout: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Convert a columnar layout back to the nested JSON layout
+    
+    Args:
+        layout: ColumnarLayout-shaped dict
+        
+    Returns:
+        Layout-shaped dict ({"pages": [...]} of blocks/lines/words)
+    """
+    pages = []
+    
+    for page in layout.get("pages", []):
+        text = page.get("text", "")
+        decoded = {}
+        for name in ("blocks", "lines", "words"):
+            level = page[name]
+            columns = {key: _unpack_array("f", level[key]) for key in _FLOAT_COLUMNS}
+            offsets = _unpack_array("I", level["textOffset"])
+            lengths = _unpack_array("I", level["textLength"])
+            parents = _unpack_array("I", level["parent"]) if level.get("parent") else None
+            items = []
+            for i in range(level["count"]):
+                item = {
+                    "text": text[offsets[i]:offsets[i] + lengths[i]],
+                    "bbox": {key: round(columns[key][i], 6) for key in ("x", "y", "w", "h")},
+                    "confidence": round(columns["confidence"][i], 6)
+                }
+                if name == "blocks":
+                    item["type"] = level["type"][i]
+                items.append((parents[i] if parents is not None else None, item))
+            decoded[name] = items
+        
+        blocks = [item for _, item in decoded["blocks"]]
+        for block in blocks:
+            block["lines"] = []
+        lines = [item for _, item in decoded["lines"]]
+        for (parent, line) in decoded["lines"]:
+            line["words"] = []
+            blocks[parent]["lines"].append(line)
+        for (parent, word) in decoded["words"]:
+            lines[parent]["words"].append(word)
+        
+        pages.append({
+            "page": page["page"],
+            "width": page["width"],
+            "height": page["height"],
+            "blocks": blocks
+        })
+    
+    return {"pages": pages}
+
+
 class Page(BaseModel):
     page: int
     text: str
@@ -105,7 +294,7 @@ class OcrResult(BaseModel):
     layoutText: Optional[str] = None
     pages: List[Page]
     structured: Structured
-    layout: Layout
+    layout: Union[ColumnarLayout, Layout]
     meta: Meta
     enhancedText: Optional[str] = None  # AI-enhanced text
     aiMetadata: Optional[Dict[str, Any]] = None  # AI enhancement metadata
@@ -114,11 +303,13 @@ class OcrResult(BaseModel):
 class JobResponse(BaseModel):
     jobId: str
     status: str  # queued|running|done|error
-    step: str = Field(default="upload")  # upload|preprocess|parse|postprocess|done
+    step: str = Field(default="upload")  # upload|preprocess|parse|postprocess|index|done
     percent: int = Field(default=0, ge=0, le=100)
     message: str = Field(default="")
     result: Optional[OcrResult] = None
     error: Optional[str] = None
+    queuePosition: Optional[int] = None  # 1-based position while queued
+    etaSeconds: Optional[int] = None  # Estimated seconds until done
 
 
 class AsyncJobResponse(BaseModel):
@@ -126,6 +317,24 @@ class AsyncJobResponse(BaseModel):
     status: str
 
 
+class BatchChild(BaseModel):
+    jobId: str
+    fileName: str
+    status: str = Field(default="queued")
+    percent: int = Field(default=0, ge=0, le=100)
+    error: Optional[str] = None
+
+
+class BatchJobResponse(BaseModel):
+    jobId: str  # Parent job ID
+    status: str  # queued|running|done|error
+    step: str = Field(default="upload")
+    percent: int = Field(default=0, ge=0, le=100)
+    message: str = Field(default="")
+    children: List[BatchChild] = Field(default_factory=list)
+    skipped: List[Dict[str, str]] = Field(default_factory=list)  # {"fileName", "reason"}
+
+
 # Convert models
 class PdfOptions(BaseModel):
     pageSize: str = Field(default="A4")
@@ -148,8 +357,9 @@ class RagIngestRequest(BaseModel):
 
 class RagQueryRequest(BaseModel):
     question: str
-    mode: str = Field(default="hybrid", pattern="^(hybrid|local|global|naive)$")
+    mode: str = Field(default="hybrid", pattern="^(hybrid|local|global|naive|mix)$")
     vlmEnhanced: bool = Field(default=True)
+    timeoutSeconds: Optional[float] = Field(default=None, gt=0)  # Capped by RAG_QUERY_TIMEOUT
 
 
 class RagQueryResponse(BaseModel):
@@ -1,12 +1,17 @@
 """
 File handling utilities
 """
+import hashlib
+import json
 import os
 import shutil
+import zipfile
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, NamedTuple, Optional
 import logging
 
+import aiofiles
+
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
@@ -57,6 +62,156 @@ def save_uploaded_file(job_id: str, filename: str, content: bytes) -> Path:
     return file_path
 
 
+class FileTooLargeError(Exception):
+    """Raised when an upload exceeds the maximum allowed size"""
+    pass
+
+
+class SavedUpload(NamedTuple):
+    """Result of streaming an upload to disk"""
+    path: Path
+    size: int
+    sha256: str
+
+
+async def save_upload_stream(
+    job_id: str,
+    upload: Any,
+    max_size: Optional[int] = None,
+    chunk_size: Optional[int] = None
+) -> SavedUpload:
+    """
+    Stream an uploaded file to the job input directory chunk by chunk
+    
+    The file is hashed and size-checked while it is written, so no full
+    in-memory copy of the upload is ever made.
+    
+    Args:
+        job_id: Job ID owning the upload
+        upload: Upload object exposing ``filename`` and ``async read(size)``
+        max_size: Maximum allowed size in bytes (defaults to MAX_FILE_SIZE)
+        chunk_size: Read/write chunk size in bytes (defaults to UPLOAD_CHUNK_SIZE)
+        
+    Returns:
+        SavedUpload with file path, size and SHA-256 hex digest
+        
+    Raises:
+        FileTooLargeError: If the upload exceeds max_size (partial file is removed)
+    """
+    max_size = max_size if max_size is not None else settings.MAX_FILE_SIZE
+    chunk_size = chunk_size or settings.UPLOAD_CHUNK_SIZE
+    
+    # Reject early when the multipart parser already knows the size
+    declared_size = getattr(upload, "size", None)
+    if declared_size is not None and declared_size > max_size:
+        raise FileTooLargeError(f"Upload size {declared_size} exceeds {max_size} bytes")
+    
+    # Only the client's base name is used (no path traversal)
+    filename = Path(upload.filename or "").name
+    if filename in ("", ".", ".."):
+        filename = "upload"
+    file_path = get_job_input_path(job_id) / filename
+    digest = hashlib.sha256()
+    size = 0
+    
+    try:
+        async with aiofiles.open(file_path, "wb") as f:
+            while True:
+                chunk = await upload.read(chunk_size)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_size:
+                    raise FileTooLargeError(f"Upload exceeds {max_size} bytes")
+                digest.update(chunk)
+                await f.write(chunk)
+    except BaseException:
+        # Never leave a partial upload behind
+        try:
+            file_path.unlink()
+        except OSError:
+            pass
+        raise
+    
+    logger.info(f"Streamed uploaded file: {file_path} ({size} bytes)")
+    return SavedUpload(path=file_path, size=size, sha256=digest.hexdigest())
+
+
+def extract_zip_member(
+    zip_file: zipfile.ZipFile,
+    info: zipfile.ZipInfo,
+    job_id: str,
+    max_size: Optional[int] = None,
+    chunk_size: Optional[int] = None
+) -> SavedUpload:
+    """
+    Extract one archive member into a job input directory
+    
+    Only the member's base name is used (no path traversal), and the size
+    limit is enforced on the bytes actually inflated, not the size the
+    archive declares.
+    
+    Args:
+        zip_file: Open archive
+        info: Member to extract
+        job_id: Job ID owning the extracted file
+        max_size: Maximum allowed size in bytes (defaults to MAX_FILE_SIZE)
+        chunk_size: Read/write chunk size in bytes (defaults to UPLOAD_CHUNK_SIZE)
+        
+    Returns:
+        SavedUpload with file path, size and SHA-256 hex digest
+        
+    Raises:
+        FileTooLargeError: If the member exceeds max_size (partial file is removed)
+    """
+    max_size = max_size if max_size is not None else settings.MAX_FILE_SIZE
+    chunk_size = chunk_size or settings.UPLOAD_CHUNK_SIZE
+    
+    if info.file_size > max_size:
+        raise FileTooLargeError(f"Archive member size {info.file_size} exceeds {max_size} bytes")
+    
+    file_path = get_job_input_path(job_id) / Path(info.filename).name
+    digest = hashlib.sha256()
+    size = 0
+    
+    try:
+        with zip_file.open(info) as src, open(file_path, "wb") as dst:
+            while True:
+                chunk = src.read(chunk_size)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_size:
+                    raise FileTooLargeError(f"Archive member exceeds {max_size} bytes")
+                digest.update(chunk)
+                dst.write(chunk)
+    except BaseException:
+        try:
+            file_path.unlink()
+        except OSError:
+            pass
+        raise
+    
+    return SavedUpload(path=file_path, size=size, sha256=digest.hexdigest())
+
+
+def save_batch_manifest(job_id: str, manifest: Dict[str, Any]):
+    """Save the manifest (children and skipped files) of a batch job"""
+    path = get_job_storage_path(job_id)
+    path.mkdir(parents=True, exist_ok=True)
+    with open(path / "batch.json", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False)
+
+
+def load_batch_manifest(job_id: str) -> Optional[Dict[str, Any]]:
+    """Load the manifest of a batch job, or None if the job is not a batch"""
+    try:
+        with open(get_job_storage_path(job_id) / "batch.json", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
 def cleanup_job_files(job_id: str) -> bool:
     """Clean up all files for a job"""
     try:
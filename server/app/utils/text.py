@@ -3,12 +3,60 @@ Text processing utilities
 """
 import json
 import re
+from dataclasses import dataclass
 from typing import Dict, Any, Optional
 from pathlib import Path
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Vietnamese letters with tone or vowel marks (lowercase and uppercase)
+VIETNAMESE_DIACRITICS = "àáảãạăằắẳẵặâầấẩẫậèéẻẽẹêềếểễệìíỉĩịòóỏõọôồốổỗộơờớởỡợùúủũụưừứửữựỳýỷỹỵđ"
+VIETNAMESE_DIACRITICS += VIETNAMESE_DIACRITICS.upper()
+_DELETE_DIACRITICS = str.maketrans("", "", VIETNAMESE_DIACRITICS)
+
+# Diacritics per word above which text is treated as Vietnamese
+VIETNAMESE_DENSITY_THRESHOLD = 0.1
+
+
+@dataclass(frozen=True)
+class ScriptStats:
+    """Vietnamese diacritic statistics of a text"""
+    diacritic_count: int
+    word_count: int
+    
+    @property
+    def has_vietnamese(self) -> bool:
+        """Whether any Vietnamese accented letter occurs"""
+        return self.diacritic_count > 0
+    
+    @property
+    def density(self) -> float:
+        """Accented letters per word"""
+        return self.diacritic_count / self.word_count if self.word_count else 0.0
+    
+    @property
+    def is_vietnamese(self) -> bool:
+        """Whether the text is likely Vietnamese"""
+        return self.density > VIETNAMESE_DENSITY_THRESHOLD
+
+
+def detect_vietnamese_script(text: str) -> ScriptStats:
+    """
+    Count Vietnamese accented letters in one pass
+    
+    Nothing is cached; callers that need the statistics again for the
+    same text pass the returned ScriptStats along instead of rescanning.
+    
+    Args:
+        text: Text in NFC form
+        
+    Returns:
+        ScriptStats with diacritic count and density
+    """
+    diacritic_count = len(text) - len(text.translate(_DELETE_DIACRITICS))
+    return ScriptStats(diacritic_count, len(text.split()))
+
 
 def clean_text(text: str) -> str:
     """Clean and normalize text"""
@@ -66,20 +114,19 @@ def extract_metadata_from_text(text: str) -> Dict[str, Any]:
     if not text:
         return {}
         
-    word_count = len(text.split())
     char_count = len(text)
-    line_count = len(text.split('\n'))
+    line_count = text.count('\n') + 1
     
     # Detect language (simple heuristic)
-    vietnamese_chars = len(re.findall(r'[àáạảãâầấậẩẫăằắặẳẵèéẹẻẽêềếệểễìíịỉĩòóọỏõôồốộổỗơờớợởỡùúụủũưừứựửữỳýỵỷỹđ]', text.lower()))
-    language = "vi" if vietnamese_chars > word_count * 0.1 else "en"
+    script = detect_vietnamese_script(text)
+    language = "vi" if script.is_vietnamese else "en"
     
     return {
-        "wordCount": word_count,
+        "wordCount": script.word_count,
         "charCount": char_count,
         "lineCount": line_count,
         "detectedLanguage": language,
-        "hasVietnamese": vietnamese_chars > 0
+        "hasVietnamese": script.has_vietnamese
     }
 
 
@@ -0,0 +1,136 @@
+"""
+Micro-benchmark: JSON serialization and compression of a large OCR result
+
+Compares the default FastAPI path (response model + jsonable_encoder +
+stdlib json) with the orjson renderer used by FastJSONResponse, and shows
+the transfer size with gzip and brotli.
+
+Usage (from the server directory):
+    python benchmarks/bench_serialization.py [--pages 50] [--lines 40]
+"""
+import argparse
+import json
+import sys
+import time
+import zlib
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi.encoders import jsonable_encoder
+
+from app.core.compression import BROTLI_AVAILABLE
+from app.core.docling_extractor import build_lines_from_text
+from app.core.responses import ORJSON_AVAILABLE, dumps_json
+from app.models.schemas import JobResponse
+
+if BROTLI_AVAILABLE:
+    import brotli
+
+
+def build_result(page_count: int, line_count: int) -> dict:
+    """Build a synthetic multi-page result with word-level layout"""
+    block_bbox = {"x": 0.05, "y": 0.05, "w": 0.9, "h": 0.9}
+    pages = []
+    layout_pages = []
+
+    for page in range(1, page_count + 1):
+        text = "\n".join(
+            f"Trang {page} dòng {line}: văn bản mẫu tiếng Việt có dấu and some English words"
+            for line in range(line_count)
+        )
+        pages.append({"page": page, "text": text, "confidence": 0.95})
+        layout_pages.append({
+            "page": page,
+            "width": 612.0,
+            "height": 792.0,
+            "blocks": [{
+                "type": "text",
+                "text": text,
+                "bbox": block_bbox,
+                "confidence": 0.95,
+                "lines": build_lines_from_text(text, block_bbox)
+            }]
+        })
+
+    full_text = "\n\n".join(page["text"] for page in pages)
+    return {
+        "jobId": "benchmark",
+        "status": "done",
+        "step": "done",
+        "percent": 100,
+        "message": "Processing complete",
+        "error": None,
+        "result": {
+            "fullText": full_text,
+            "markdownText": full_text,
+            "layoutText": full_text,
+            "pages": pages,
+            "structured": {"tables": [], "equations": [], "images": []},
+            "layout": {"pages": layout_pages},
+            "meta": {
+                "parser": "docling",
+                "parse_method": "auto",
+                "language": "vi",
+                "pageCount": page_count,
+                "avgConfidence": 0.95,
+                "timings": {"parseMs": 0, "postMs": 0}
+            }
+        }
+    }
+
+
+def best_of(func, repeat: int) -> float:
+    """Best wall time of several runs in milliseconds"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=50, help="Number of pages")
+    parser.add_argument("--lines", type=int, default=40, help="Lines per page")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement")
+    args = parser.parse_args()
+
+    data = build_result(args.pages, args.lines)
+
+    def default_path() -> bytes:
+        content = jsonable_encoder(JobResponse(**data))
+        return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    print(f"Result: {args.pages} pages x {args.lines} lines (orjson available: {ORJSON_AVAILABLE})")
+    print()
+    print("Serialization")
+    default_ms = best_of(default_path, args.repeat)
+    stdlib_ms = best_of(
+        lambda: json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8"), args.repeat
+    )
+    fast_ms = best_of(lambda: dumps_json(data), args.repeat)
+    print(f"  response model + stdlib json : {default_ms:8.1f} ms")
+    print(f"  stdlib json on dict          : {stdlib_ms:8.1f} ms")
+    print(f"  FastJSONResponse             : {fast_ms:8.1f} ms  ({default_ms / fast_ms:.1f}x faster)")
+
+    body = dumps_json(data)
+    print()
+    print("Transfer size")
+    print(f"  identity : {len(body):>10,} bytes")
+
+    gzip_ms = best_of(lambda: zlib.compress(body, 6), args.repeat)
+    gzip_size = len(zlib.compress(body, 6))
+    print(f"  gzip -6  : {gzip_size:>10,} bytes  ({len(body) / gzip_size:5.1f}x smaller, {gzip_ms:.1f} ms)")
+
+    if BROTLI_AVAILABLE:
+        br_ms = best_of(lambda: brotli.compress(body, quality=4), args.repeat)
+        br_size = len(brotli.compress(body, quality=4))
+        print(f"  brotli 4 : {br_size:>10,} bytes  ({len(body) / br_size:5.1f}x smaller, {br_ms:.1f} ms)")
+    else:
+        print("  brotli   : not installed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Micro-benchmark: Vietnamese tone restoration
+
+Compiles a synthetic phrase dictionary (the bundled phrase list plus
+generated syllable combinations), measures how long it takes to open the
+memory-mapped dictionary and load it into a restorer, and reports
+restoration throughput on unaccented text.
+
+Usage (from the server directory):
+    python benchmarks/bench_tone_restoration.py [--entries 50000] [--size-mb 5]
+"""
+import argparse
+import itertools
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.core.vietnamese_dictionary import (
+    DEFAULT_PHRASES_PATH,
+    PhraseDictionary,
+    ToneRestorer,
+    build_dictionary,
+    load_tsv,
+    strip_diacritics,
+)
+from app.core.vietnamese_processor import COMMON_VIETNAMESE_WORDS
+
+SYLLABLES = [
+    "người", "học", "trường", "công", "nghệ", "thông", "tin", "việt", "nam", "tiếng",
+    "đại", "hội", "văn", "hóa", "kinh", "tế", "chính", "trị", "xã", "kỹ",
+    "thuật", "quản", "lý", "phát", "triển", "dữ", "liệu", "hệ", "thống", "giáo",
+    "dục", "khoa", "sinh", "viên", "số", "tiền", "ngày", "tháng", "năm", "địa",
+]
+
+
+def build_entries(count: int) -> dict:
+    """Bundled phrases plus generated two- and three-syllable phrases"""
+    entries = load_tsv(DEFAULT_PHRASES_PATH)
+    for length in (2, 3):
+        for combination in itertools.product(SYLLABLES, repeat=length):
+            if len(entries) >= count:
+                return entries
+            phrase = " ".join(combination)
+            entries.setdefault(strip_diacritics(phrase), phrase)
+    return entries
+
+
+def build_text(entries: dict, size_mb: float) -> str:
+    """Unaccented text of roughly ``size_mb`` megabytes"""
+    phrases = sorted(entries)[:2000]
+    sentence = ", ".join(phrase.capitalize() for phrase in phrases[:12]) + ". "
+    paragraph = " ".join(phrases) + ".\n"
+    block = sentence + paragraph + "Invoice 2024-001: total 1,250,000 VND.\n"
+    repeats = max(1, int(size_mb * 1024 * 1024 / len(block)))
+    return block * repeats
+
+
+def restore_per_word(text: str) -> str:
+    """Previous approach: lowercase, split, one regex and dict lookup per word"""
+    restored_words = []
+    for word in text.lower().split():
+        clean_word = re.sub(r"[^\w]", "", word)
+        if clean_word in COMMON_VIETNAMESE_WORDS:
+            restored_words.append(word.replace(clean_word, COMMON_VIETNAMESE_WORDS[clean_word]))
+        else:
+            restored_words.append(word)
+    return " ".join(restored_words)
+
+
+def best_of(func, repeat: int) -> float:
+    """Best wall time of several runs in seconds"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=50000, help="Dictionary entries")
+    parser.add_argument("--size-mb", type=float, default=5.0, help="Size of the text to restore")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement")
+    args = parser.parse_args()
+
+    entries = build_entries(args.entries)
+    start = time.perf_counter()
+    data = build_dictionary(entries)
+    compile_ms = (time.perf_counter() - start) * 1000
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = Path(temp_dir) / "bench.vtd"
+        path.write_bytes(data)
+
+        start = time.perf_counter()
+        dictionary = PhraseDictionary.open(path)
+        open_ms = (time.perf_counter() - start) * 1000
+
+        print(f"Dictionary: {dictionary.count:,} entries, {len(data) / 1024 / 1024:.1f} MB, "
+              f"phrases up to {dictionary.max_syllables} syllables")
+        print(f"  compile : {compile_ms:8.1f} ms")
+        print(f"  open    : {open_ms:8.3f} ms (memory-mapped)")
+
+        start = time.perf_counter()
+        restorer = ToneRestorer(dictionary)
+        load_ms = (time.perf_counter() - start) * 1000
+        print(f"  load    : {load_ms:8.1f} ms (phrase dict and prefix set)")
+
+        prose = build_text(entries, args.size_mb)
+        # Every word capitalized: the slowest case, each word needs its case restored
+        for label, text in (("prose", prose), ("Title Case", prose.title())):
+            size_mb = len(text.encode("utf-8")) / 1024 / 1024
+            print()
+            print(f"Restoration of {size_mb:.1f} MB unaccented text ({label})")
+
+            baseline = best_of(lambda: restore_per_word(text), args.repeat)
+            best = best_of(lambda: restorer.restore(text), args.repeat)
+            print(f"  per-word dict (previous) : {baseline * 1000:8.1f} ms  ({size_mb / baseline:.1f} MB/s)")
+            print(f"  ToneRestorer             : {best * 1000:8.1f} ms  ({size_mb / best:.1f} MB/s)")
+
+        sample = prose[:120].splitlines()[0]
+        print()
+        print(f"  in : {sample[:80]}")
+        print(f"  out: {restorer.restore(sample)[:80]}")
+        dictionary.close()
+
+
+if __name__ == "__main__":
+    main()
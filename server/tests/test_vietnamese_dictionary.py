@@ -0,0 +1,38 @@
+"""
+Tests for Vietnamese tone restoration
+"""
+from app.core.vietnamese_dictionary import PhraseDictionary, ToneRestorer
+
+ENTRIES = {
+    "toi": "tôi",
+    "la": "là",
+    "the": "thể",
+    "sinh vien": "sinh viên",
+    "hoa don": "hóa đơn",
+    "cong nghe thong tin": "công nghệ thông tin",
+}
+
+
+def make_restorer() -> ToneRestorer:
+    return ToneRestorer(PhraseDictionary.from_entries(ENTRIES))
+
+
+def test_restores_words_and_phrases():
+    restorer = make_restorer()
+    assert restorer.restore("Toi la sinh vien cong nghe thong tin") == "Tôi là sinh viên công nghệ thông tin"
+
+
+def test_keeps_english_in_mixed_text():
+    restorer = make_restorer()
+    assert restorer.restore("The total is 100 USD") == "The total is 100 USD"
+    assert restorer.restore("Hoa don: The total is 100 USD") == "Hóa đơn: The total is 100 USD"
+
+
+def test_english_syllable_next_to_vietnamese_is_restored():
+    restorer = make_restorer()
+    assert restorer.restore("toi la sinh vien") == "tôi là sinh viên"
+
+
+def test_keeps_accented_words_and_case():
+    restorer = make_restorer()
+    assert restorer.restore("Việt Nam, TOI LA SINH VIEN.") == "Việt Nam, TÔI LÀ SINH VIÊN."